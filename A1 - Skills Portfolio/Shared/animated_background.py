@@ -0,0 +1,219 @@
+# Animated screen backgrounds shared by the Math Quiz and Alexa Jokes windows.
+# Both apps put this folder on sys.path and import AnimatedBackground from here.
+
+# Import the os module to build cache file names and compare modification times
+import os
+
+# Import time to schedule each frame against the GIF's own delays
+import time
+
+# Import threading to composite frames without blocking the window
+import threading
+
+# Import mmap and struct to read the composited frames straight from the cache file
+import mmap
+import struct
+
+# Import zlib to keep the composited frames compressed on disk
+import zlib
+
+# Import OrderedDict to keep a small least-recently-used cache of frames handed to Tk
+from collections import OrderedDict
+
+# Import the PIL library to decode and composite the GIF
+from PIL import Image, ImageTk
+
+# How often to look again while the frames are still being composited, or while the window is minimised
+POLL_MS = 250
+
+# Largest cache file written for one animation; bigger animations just show their first frame
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+class AnimatedBackground:
+    """
+    Play an animated GIF on a full-window label from frames composited at the window size.
+
+    The first run composites every frame over the background colour and scales it on a background
+    thread, saving the zlib-compressed RGB frames and their delays to one cache file; the first frame
+    is shown meanwhile. Later runs memory-map that file, so playing only inflates frames and never
+    decodes or scales the GIF. The animation only runs while show() is in effect and the window is
+    not minimised.
+    """
+
+    # Width, height, frame count; then one uint32 delay (ms) per frame, one uint64 file offset per frame
+    # plus the end of the last one, then the compressed frames
+    HEADER = struct.Struct('<III')
+
+    def __init__(self, label, gif_path, size, cache_dir, background="black", cache_size=16, cpu_budget=0.25):
+        self.label = label
+        self.gif_path = gif_path
+        self.size = size
+        self.background = background
+        self.cache_size = cache_size  # Maximum number of frames kept as Tk images
+        self.cpu_budget = cpu_budget  # Maximum share of the CPU the animation may use
+        name = os.path.splitext(os.path.basename(gif_path))[0]
+        self.cache_path = os.path.join(cache_dir, f"{name}_{size[0]}x{size[1]}.frames")
+
+        self.photos = OrderedDict()     # Frame index -> PhotoImage, least recently used first
+        self.frames = None              # Memory-mapped cache file once it is ready
+        self.offsets = ()               # Where each compressed frame starts in the cache file, and where the last ends
+        self.durations = []             # Display time of each frame in seconds
+        self.ready = threading.Event()  # Set once the cache file is open
+
+        self.index = 0         # Frame on screen
+        self.due_at = 0        # When the frame on screen should be replaced
+        self.job = None        # Pending after() callback, or None while stopped
+        self.showing = False   # Whether the owning screen is on top
+        self.frames_rendered = 0
+        self.frames_dropped = 0
+
+        if self._cache_is_fresh():
+            try:
+                self._open_cache()
+            except (OSError, ValueError) as e:
+                print(f"Rebuilding animation cache {self.cache_path}: {e}")
+        if not self.ready.is_set():
+            self._show_first_frame()
+            threading.Thread(target=self._build_cache, daemon=True).start()
+
+    def _cache_is_fresh(self):
+        return (os.path.exists(self.cache_path)
+                and os.path.getmtime(self.cache_path) >= os.path.getmtime(self.gif_path))
+
+    def _composite(self, gif):
+        """Return the GIF's current frame flattened onto the background colour at the window size."""
+        frame = gif.convert("RGBA")
+        flat = Image.new("RGB", frame.size, self.background)
+        flat.paste(frame, mask=frame)
+        return flat.resize(self.size)
+
+    def _show_first_frame(self):
+        """Composite just the first frame on the UI thread so the screen is not blank while the cache builds."""
+        with Image.open(self.gif_path) as gif:
+            photo = ImageTk.PhotoImage(self._composite(gif))
+        self.label.configure(image=photo)
+        self.label.image = photo  # Keep a reference to prevent garbage collection
+
+    def _build_cache(self):
+        """Composite and compress every frame and write the cache file, then open it."""
+        temp_path = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with Image.open(self.gif_path) as gif, open(temp_path, 'wb') as f:
+                frame_count = getattr(gif, "n_frames", 1)
+                f.write(self.HEADER.pack(self.size[0], self.size[1], frame_count))
+                for index in range(frame_count):
+                    gif.seek(index)
+                    f.write(struct.pack('<I', max(gif.info.get("duration") or 100, 20)))  # GIFs without a delay default to 100 ms
+                offsets_at = f.tell()
+                f.write(bytes(8 * (frame_count + 1)))  # Offsets are filled in once the frames are written
+                offsets = [f.tell()]
+                for index in range(frame_count):
+                    gif.seek(index)
+                    f.write(zlib.compress(self._composite(gif).tobytes()))
+                    offsets.append(f.tell())
+                    if offsets[-1] > MAX_CACHE_BYTES:
+                        raise ValueError(f"frames take more than {MAX_CACHE_BYTES // (1024 * 1024)} MB")
+                f.seek(offsets_at)
+                f.write(struct.pack(f'<{frame_count + 1}Q', *offsets))
+            os.replace(temp_path, self.cache_path)  # Only complete files ever appear under the cache name
+            self._open_cache()
+        except (OSError, ValueError) as e:
+            print(f"Could not build animation cache {self.cache_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _open_cache(self):
+        """Map the cache file and read the frame delays from its header, raising ValueError if the file is incomplete."""
+        with open(self.cache_path, 'rb') as f:
+            frames = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        width, height, frame_count = self.HEADER.unpack_from(frames, 0) if len(frames) >= self.HEADER.size else (0, 0, 0)
+        offsets_at = self.HEADER.size + 4 * frame_count
+        frames_at = offsets_at + 8 * (frame_count + 1)
+        offsets = struct.unpack_from(f'<{frame_count + 1}Q', frames, offsets_at) if len(frames) >= frames_at else ()
+        found = len(frames)
+        if (width, height) != tuple(self.size) or not offsets or offsets[0] != frames_at or offsets[-1] != found:
+            frames.close()
+            raise ValueError(f"incomplete cache of {self.size[0]}x{self.size[1]} frames ({found} bytes)")
+        durations = struct.unpack_from(f'<{frame_count}I', frames, self.HEADER.size)
+        self.durations = [duration / 1000 for duration in durations]
+        self.offsets = offsets
+        self.frames = frames
+        self.ready.set()
+
+    def photo(self, index):
+        """Return the Tk image for a frame, inflating it from the cache file if it is not already held."""
+        if index in self.photos:
+            self.photos.move_to_end(index)
+            return self.photos[index]
+
+        pixels = zlib.decompress(self.frames[self.offsets[index]:self.offsets[index + 1]])
+        image = Image.frombuffer("RGB", self.size, pixels, "raw", "RGB", 0, 1)
+        photo = ImageTk.PhotoImage(image)
+        self.photos[index] = photo
+        if len(self.photos) > self.cache_size:
+            self.photos.popitem(last=False)  # Drop the least recently shown frame
+        return photo
+
+    def _render(self, index):
+        self.label.configure(image=self.photo(index))
+        self.label.image = self.photo(index)  # Keep a reference to prevent garbage collection
+        self.frames_rendered += 1
+
+    def show(self):
+        """Start or resume the animation because its screen is now on top."""
+        self.showing = True
+        if self.job is None:
+            self.due_at = time.perf_counter()
+            self.job = self.label.after(0, self._tick)
+
+    def hide(self):
+        """Stop the animation because its screen is hidden, so it uses no CPU."""
+        self.showing = False
+        if self.job is not None:
+            self.label.after_cancel(self.job)
+            self.job = None
+
+    def _tick(self):
+        """Show the frame that is due now, skipping any frames the event loop fell behind on."""
+        self.job = None
+        if not self.showing:
+            return
+
+        # Wait, without rendering, until the frames are composited and while the window is minimised
+        if not self.ready.is_set() or not self.label.winfo_viewable():
+            self.job = self.label.after(POLL_MS, self._tick)
+            return
+
+        started = time.perf_counter()
+        frame_count = len(self.durations)
+        if frame_count == 1:
+            self._render(0)
+            return  # A still image never needs another frame
+
+        # If the loop stalled for longer than a whole cycle, resynchronise instead of catching up
+        if started - self.due_at > sum(self.durations):
+            self.due_at = started
+
+        # Advance past every frame whose display time has already ended, counting the ones never shown
+        advanced = 0
+        while started >= self.due_at:
+            self.index = (self.index + 1) % frame_count
+            self.due_at += self.durations[self.index]
+            advanced += 1
+        self.frames_dropped += max(advanced - 1, 0)
+        self._render(self.index)
+
+        # Prepare the following frame while the event loop is idle, ahead of when it is needed
+        self.label.after_idle(self.photo, (self.index + 1) % frame_count)
+
+        # Wait until the next frame is due, but never longer than the CPU budget allows
+        cost = time.perf_counter() - started
+        delay = max(self.due_at - started, cost / self.cpu_budget)
+        self.job = self.label.after(max(int(delay * 1000), 1), self._tick)
+
+    def stats(self):
+        """Return the frames-rendered and frames-dropped counters."""
+        return {"frames_rendered": self.frames_rendered, "frames_dropped": self.frames_dropped}
@@ -0,0 +1,115 @@
+# Background music and sound effects shared by the Math Quiz and Alexa Jokes windows.
+# Both apps put this folder on sys.path and import AudioEngine from here.
+
+# Import the os module to build cache file names and compare modification times
+import os
+
+# Import threading so audio can load without delaying the first window
+import threading
+
+# pygame is imported by AudioEngine on its loading thread, so the import never delays the window
+
+class AudioEngine:
+    """Load and play the app's audio on a background thread so the window never waits for it."""
+
+    def __init__(self, cache_dir, channel_count=8, extra_channels=0, music_volume=0.5, sfx_volume=1.0):
+        """
+        Args:
+            cache_dir: Where decoded sound effects are kept between runs.
+            channel_count (int): Size of the channel pool used for sound effects.
+            extra_channels (int): Channels reserved after the pool; the first one plays pre-rendered speech.
+            music_volume (float): Starting background music volume (0.0 to 1.0).
+            sfx_volume (float): Starting sound effect volume (0.0 to 1.0).
+        """
+        self.cache_dir = cache_dir
+        self.channel_count = channel_count
+        self.extra_channels = extra_channels
+        self.music_volume = music_volume
+        self.sfx_volume = sfx_volume
+        self.sounds = {}                    # Sound effect name -> pygame.mixer.Sound
+        self.next_channel = 0               # Channel to reuse when every channel is busy
+        self.ready = threading.Event()      # Set once the mixer and sound effects are loaded
+
+    def start(self, music_path, sound_paths):
+        """Initialise the mixer, start the music and load the sound effects in the background."""
+        threading.Thread(target=self._load, args=(music_path, sound_paths), daemon=True).start()
+
+    def _load(self, music_path, sound_paths):
+        """Background thread: import pygame, set up the mixer and load every sound."""
+        global pygame
+        import pygame
+        try:
+            pygame.mixer.init()
+            total_channels = self.channel_count + self.extra_channels
+            pygame.mixer.set_num_channels(total_channels)
+            pygame.mixer.set_reserved(total_channels)  # Keep the pool for our own round-robin use
+
+            # pygame.mixer.music streams the file from disk instead of decoding it all up front
+            pygame.mixer.music.load(music_path)
+            pygame.mixer.music.set_volume(self.music_volume)
+            pygame.mixer.music.play(loops=-1)
+
+            for name, path in sound_paths.items():
+                self.sounds[name] = self._load_sound(path)
+        except pygame.error as e:
+            print(f"Audio unavailable: {e}")  # The app still runs silently without an audio device
+            return
+        self.ready.set()
+
+    def _load_sound(self, path):
+        """Load a sound effect from the decoded PCM cache, decoding the original file only if needed."""
+        frequency, size, channels = pygame.mixer.get_init()
+        name = os.path.basename(path)
+        cache_file = os.path.join(self.cache_dir, f"{name}.{frequency}_{size}_{channels}.pcm")
+
+        try:
+            if os.path.getmtime(cache_file) >= os.path.getmtime(path):
+                with open(cache_file, 'rb') as f:
+                    return pygame.mixer.Sound(buffer=f.read())
+        except OSError:
+            pass  # Missing or unreadable cache; decode the original file instead
+
+        sound = pygame.mixer.Sound(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_file, 'wb') as f:
+                f.write(sound.get_raw())  # Raw samples already in the mixer's format
+        except OSError as e:
+            print(f"Could not write audio cache {cache_file}: {e}")
+        return sound
+
+    def play(self, name):
+        """Play a sound effect on a free pool channel so rapid clicks overlap instead of cutting off."""
+        if not self.ready.is_set():
+            return  # Still loading; skip the click rather than block the UI
+
+        # Prefer an idle channel, otherwise take over the one that has been playing longest
+        channel_index = self.next_channel
+        for offset in range(self.channel_count):
+            index = (self.next_channel + offset) % self.channel_count
+            if not pygame.mixer.Channel(index).get_busy():
+                channel_index = index
+                break
+        self.next_channel = (channel_index + 1) % self.channel_count
+
+        channel = pygame.mixer.Channel(channel_index)
+        channel.set_volume(self.sfx_volume)
+        channel.play(self.sounds[name])
+
+    def play_voice(self, path):
+        """Play a pre-rendered speech file on the first extra channel and return that channel, or None if audio is not ready."""
+        if not self.ready.is_set() or not self.extra_channels:
+            return None
+        channel = pygame.mixer.Channel(self.channel_count)
+        channel.play(pygame.mixer.Sound(path))
+        return channel
+
+    def set_music_volume(self, volume):
+        """Change the background music volume (0.0 to 1.0)."""
+        self.music_volume = volume
+        if self.ready.is_set():
+            pygame.mixer.music.set_volume(volume)
+
+    def set_sfx_volume(self, volume):
+        """Change the volume used for sound effects from now on (0.0 to 1.0)."""
+        self.sfx_volume = volume
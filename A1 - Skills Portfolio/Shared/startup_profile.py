@@ -0,0 +1,54 @@
+# Startup profiling shared by the Math Quiz, Alexa Jokes and Student Records windows.
+# Every phase is timed from when this module is first imported; run an app with --profile-startup
+# to print the table once its window has been drawn for the first time.
+
+# Import the time module to measure how long each startup phase takes
+import time
+
+# Import sys to read command-line options such as --profile-startup
+import sys
+
+startup_started = time.perf_counter()
+startup_timings = []  # (phase, seconds taken, finished at) in the order the phases finished
+profile_startup = "--profile-startup" in sys.argv
+
+def mark_startup(phase):
+    """Record how long a startup phase took since the previous mark."""
+    now = time.perf_counter()
+    previous = startup_timings[-1][2] if startup_timings else startup_started
+    startup_timings.append((phase, now - previous, now))
+
+def startup_elapsed_ms():
+    """Return how long ago, in milliseconds, the last phase finished after starting."""
+    finished = startup_timings[-1][2] if startup_timings else startup_started
+    return (finished - startup_started) * 1000
+
+def report_startup():
+    """Mark the first paint and, when profiling, print how long each startup phase took."""
+    mark_startup("first paint")
+    if not profile_startup:
+        return
+    print("Startup profile:")
+    for phase, seconds, _ in startup_timings:
+        print(f"  {phase:<40}{seconds * 1000:8.1f} ms")
+    print(f"  {'total to first paint':<40}{startup_elapsed_ms():8.1f} ms")
+
+def report_after_first_paint(root):
+    """Call report_startup once the window has been mapped and the redraw that follows has run."""
+    reported = False
+
+    def on_map(event):
+        nonlocal reported
+        if reported or event.widget is not root:
+            return  # Child widgets are mapped before the window itself is shown
+        reported = True
+        root.after_idle(report_startup)  # Tk draws the newly mapped window in its next idle pass
+
+    root.bind("<Map>", on_map, add="+")
+
+def timed_build(builder):
+    """Run a screen's builder, printing how long it took when profiling."""
+    started = time.perf_counter()
+    builder()
+    if profile_startup:
+        print(f"Built {builder.__name__} in {(time.perf_counter() - started) * 1000:.1f} ms")
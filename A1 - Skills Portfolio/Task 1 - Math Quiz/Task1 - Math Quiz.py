@@ -1,26 +1,54 @@
+# Import the time module to time each answer and the event loop
+import time
+
+# Import os and sys to find the folder of components shared between the apps
+import os
+import sys
+
+# Put the folder of components shared between the apps on the import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Shared"))
+
+# Import the startup profiler shared by all three apps, which times each phase from here on
+from startup_profile import mark_startup, report_after_first_paint, timed_build
+
 # Import the customtkinter library for creating modern-looking Tkinter widgets
 import customtkinter
+mark_startup("import customtkinter")
 
 # Import the tkinter library for creating GUI applications
 import tkinter as tk
 
 # Import the messagebox module from tkinter to display warning messages to the user
 from tkinter import messagebox
+mark_startup("import tkinter")
 
-# Import the PIL library for handling images, including GIFs, in the application
-from PIL import Image, ImageTk, ImageSequence
+# Import the PIL library for handling images in the application
+from PIL import Image
+mark_startup("import PIL")
 
-# Import the os module to interact with the operating system, such as handling file paths
-import os
+# Import deque to hold the rolling window of recent answers for adaptive mode
+from collections import deque
 
 # Import the random module to generate random numbers for quiz questions
 import random
 
-# Import the pygame library to handle audio playback in the application
-import pygame
+# Import the json module to export the per-session timing histograms
+import json
+
+# Import sqlite3 to keep finished sessions and leaderboards between runs
+import sqlite3
+
+# Import the quiz rules, which live in their own module so they can also be simulated headlessly
+from quiz_engine import (
+    QUESTIONS_PER_QUIZ, decide_operation, make_problem, grade_answer, calculate_ranking
+)
+
+# Import the animated background shared with the Alexa Jokes app
+from animated_background import AnimatedBackground
 
-# Initialize Pygame mixer for audio playback
-pygame.mixer.init()
+# Import the audio engine shared with the Alexa Jokes app, which loads pygame on its own thread
+from audio_engine import AudioEngine
+mark_startup("import standard library and quiz engine")
 
 # Set initial volume levels for background music and sound effects
 initial_bgm_volume = 0.25  # 25% volume
@@ -31,44 +59,111 @@ def resource_path(relative_path):
     base_path = os.path.join("A1 - Skills Portfolio", "Task 1 - Math Quiz", "Assets")
     return os.path.join(base_path, relative_path)
 
+# Decoded background images shared between screens, keyed by (path, size)
+image_cache = {}
+
+# Keep raw pre-scaled pixels on disk so later launches skip PNG decoding and resizing
+use_disk_image_cache = True
+image_cache_dir = os.path.join("A1 - Skills Portfolio", "Task 1 - Math Quiz", "Assets", "cache")
+
+def load_image(relative_path, size):
+    """Return a shared CTkImage for the given asset, decoding and scaling it only once."""
+    key = (relative_path, size)
+    if key in image_cache:
+        return image_cache[key]  # Reuse the image already built for another screen
+
+    source_path = resource_path(relative_path)
+    name = os.path.splitext(relative_path)[0]
+    cache_file = os.path.join(image_cache_dir, f"{name}_{size[0]}x{size[1]}.rgba")
+    pil_image = None
+
+    # Load the raw RGBA pixels if the disk cache is newer than the source image
+    if (use_disk_image_cache and os.path.exists(cache_file)
+            and os.path.getmtime(cache_file) >= os.path.getmtime(source_path)):
+        try:
+            with open(cache_file, 'rb') as f:
+                pil_image = Image.frombytes("RGBA", size, f.read())
+        except (OSError, ValueError):
+            pil_image = None  # Fall back to decoding the source if the cache is unreadable
+
+    if pil_image is None:
+        pil_image = Image.open(source_path).convert("RGBA").resize(size)
+        if use_disk_image_cache:
+            try:
+                os.makedirs(image_cache_dir, exist_ok=True)
+                with open(cache_file, 'wb') as f:
+                    f.write(pil_image.tobytes())
+            except OSError as e:
+                print(f"Could not write image cache {cache_file}: {e}")
+
+    image = customtkinter.CTkImage(pil_image, size=size)
+    image_cache[key] = image
+    return image
+
+# Audio is loaded in the background once the window is up (see the end of this file)
+audio = AudioEngine(
+    os.path.join("A1 - Skills Portfolio", "Task 1 - Math Quiz", "Assets", "cache"),
+    music_volume=initial_bgm_volume,
+    sfx_volume=initial_sfx_volume,
+)
+
 def update_bgm_volume(volume):
     """Adjust the background music volume based on the slider's current value."""
-    pygame.mixer.music.set_volume(float(volume) / 100)
+    audio.set_music_volume(float(volume) / 100)
 
 def update_sfx_volume(volume):
     """Adjust the sound effect volume based on the slider's current value."""
-    button_sound_effect.set_volume(float(volume) / 100)
+    audio.set_sfx_volume(float(volume) / 100)
 
-def bgmusic():
-    """Load and continuously play the background music in a loop."""
-    music_path = resource_path("Gonna Fly Now (From the Film- Rocky).mp3")
-    pygame.mixer.music.load(music_path)
-    pygame.mixer.music.set_volume(initial_bgm_volume)
-    pygame.mixer.music.play(loops=-1)
-
-# Start playing the background music when the application launches
-bgmusic()
-
-# Load the button click sound effect and set its initial volume
-button_sound_effect = pygame.mixer.Sound(resource_path("Click Sound Effect.mp3"))
-button_sound_effect.set_volume(initial_sfx_volume)
+def start_audio():
+    """Start the background music and load the click sound without holding up the window."""
+    audio.start(
+        resource_path("Gonna Fly Now (From the Film- Rocky).mp3"),
+        {"click": resource_path("Click Sound Effect.mp3")},
+    )
 
 def buttonsound():
     """Play the button click sound effect whenever a button is pressed."""
-    button_sound_effect.play()
+    audio.play("click")
 
 # Create and configure the main application window using customtkinter
 root = customtkinter.CTk()
 root.title("Quiz Game - Exercise 1")  # Set the window title for clarity
 root.geometry("1440x900")             # Define the window size to match design specifications
 root.resizable(False, False)          # Prevent the window from being resized to maintain layout integrity
+mark_startup("create window")
+
+# Screens that are only built the first time they are shown (set lazy_screens to False to build everything up front)
+lazy_screens = True
+screen_builders = {}  # Frame -> function that creates its widgets
+built_screens = set()
+
+def ensure_built(frame):
+    """Build a lazily constructed screen the first time it is needed."""
+    if frame in screen_builders and frame not in built_screens:
+        built_screens.add(frame)
+        timed_build(screen_builders[frame])
+
 
 def show_frame(frame):
     """Display the specified frame while hiding all others to manage different views."""
+    ensure_built(frame)                    # Create the screen's widgets on its first visit
     for f in all_frames:
         f.pack_forget()                    # Hide every frame to ensure only the desired one is visible
     frame.pack(fill=tk.BOTH, expand=True)  # Show the chosen frame, allowing it to fill the window
 
+    # Only animate the title background while it is on screen, so hidden screens cost no CPU
+    if frame is title_frame:
+        title_background.show()
+    else:
+        title_background.hide()
+
+    # Only probe the event loop while a quiz is being played, which is what the timings describe
+    if frame is quiz_frame:
+        start_lag_probe()
+    else:
+        stop_lag_probe()
+
 # Initialize global variables to keep track of the quiz state
 score = 0
 question_count = 0
@@ -77,6 +172,48 @@ option = None
 first_attempt = True
 num1, num2, operation, correct_answer = None, None, None, None
 
+# Every session draws its questions from its own seeded generator so it can be replayed later.
+# Passing --seed N on the command line makes every session use that seed.
+base_seed = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None
+quiz_rng = random.Random()
+session_seed = None
+session_answers = []  # Every graded answer in submission order, saved with the session recording
+
+# Timing state used to measure how long students (and the UI) take per question
+question_shown_at = None   # When the current question was displayed
+answer_submitted_at = None # When the latest answer was submitted
+question_timings = []      # One entry per submitted answer in the current session
+loop_lag_samples = deque(maxlen=6000)  # Event-loop lag measurements in milliseconds, at most the last 10 minutes
+LAG_PROBE_INTERVAL = 100   # How often (ms) the event-loop lag probe is scheduled
+lag_probe_job = None       # Pending probe while a quiz is on screen, or None
+HISTOGRAM_BIN_MS = 50      # Width of each histogram bucket in milliseconds
+timings_path = os.path.join("A1 - Skills Portfolio", "Task 1 - Math Quiz", "quiz_timings.jsonl")  # One session per line
+
+# Results database: sessions are only ever appended, and an index keeps each leaderboard sorted
+results_db_path = os.path.join("A1 - Skills Portfolio", "Task 1 - Math Quiz", "quiz_results.db")
+results_db = None        # Opened the first time a session is saved or a leaderboard is read
+LEADERBOARD_SIZE = 100   # Number of entries shown for each difficulty and option
+
+# Adaptive mode picks each question from a pre-built pool, ordered from easiest to hardest.
+# Each level is a (difficulty, operations) pair using the same digit ranges as quiz_engine.random_int.
+ADAPTIVE_OPTION = 4
+ADAPTIVE_LEVELS = [
+    (1, ('+', '-')),
+    (1, ('*', '/')),
+    (2, ('+', '-')),
+    (2, ('*', '/')),
+    (3, ('+', '-')),
+    (3, ('*', '/')),
+    (4, ('+', '-')),
+    (4, ('*', '/')),
+]
+POOL_SIZE_PER_LEVEL = 500   # Problems pre-generated for every level
+POOL_SEED = 2024            # Fixed seed so the adaptive pool is the same on every run
+TARGET_ANSWER_MS = 8000     # Answers faster than this count as comfortable for the level
+problem_pool = []           # problem_pool[level] -> list of (num1, operation, num2, answer)
+adaptive_skill = 0.0        # Current estimate of the student's level (index into ADAPTIVE_LEVELS)
+recent_results = deque(maxlen=5)  # Rolling window of (correct, answer_ms) for recent questions
+
 # Dictionaries to manage CheckBox variables for quiz options and difficulty levels
 option_vars = {}
 difficulty_vars = {}
@@ -95,7 +232,7 @@ def difficulty_selected(selected_value):
 
 def start_quiz():
     """Initialize and start the quiz based on the user's selected options and difficulty."""
-    global difficulty, option, score, question_count, first_attempt
+    global difficulty, option, score, question_count, first_attempt, adaptive_skill, session_seed
     feedback_label.pack_forget()  # Hide any existing feedback to start fresh
 
     # Retrieve the selected quiz options and difficulty level from the CheckBoxes
@@ -112,80 +249,86 @@ def start_quiz():
     score = 0
     question_count = 0
     first_attempt = True
+    question_timings.clear()  # Start a fresh timing log for the new session
+    loop_lag_samples.clear()
+    session_answers.clear()
+
+    # Seed this session's generator so the same questions can be reproduced from the recording
+    session_seed = base_seed if base_seed is not None else random.randrange(2 ** 32)
+    quiz_rng.seed(session_seed)
+
+    if option == ADAPTIVE_OPTION:
+        build_problem_pool()
+        # Start at the easiest level that uses the digit range the student picked
+        adaptive_skill = float(next(i for i, (d, _) in enumerate(ADAPTIVE_LEVELS) if d == difficulty))
+        recent_results.clear()
 
     generate_problem()  # Generate the first question for the quiz
     show_frame(quiz_frame)  # Transition to the quiz frame to begin
 
-def random_int():
-    """Generate a random integer within a range based on the current difficulty level."""
-    if difficulty == 1:
-        return random.randint(1, 9)
-    elif difficulty == 2:
-        return random.randint(10, 99)
-    elif difficulty == 3:
-        return random.randint(1000, 9999)
-    elif difficulty == 4:
-        return random.randint(10000, 99999)
-
-def decide_operation():
-    """Select a random mathematical operation based on the chosen quiz option."""
-    if option in [2, 3]:
-        return random.choice(['+', '-', '*', '/'])  # More operations depending on the options
-    else:
-        return random.choice(['+', '-'])            # Main operations for default options
-
 def generate_problem():
     """Create a new math problem tailored to the current difficulty and selected operations."""
     global num1, num2, operation, correct_answer, first_attempt, question_count
 
-    if question_count >= 10:
+    if question_count >= QUESTIONS_PER_QUIZ:
         show_results()              # End the quiz if the maximum number of questions is reached
         return
 
     first_attempt = True            # Reset attempt status for the new question
-    operation = decide_operation()  # Choose the operation for the current problem
-    num1 = random_int()             # Generate the first operand
-    num2 = random_int()             # Generate the second operand
-
-    # Adjust operands to ensure valid and challenging problems
-    if operation == '/':
-        while num2 == 0:
-            num2 = random_int()     # Prevent division by zero
-        quotient = random.randint(1, max_value() // num2)
-        num1 = num2 * quotient      # Ensure the division results in a whole number
-    elif operation == '*':
-        max_multiplier = max_value() // num1 if num1 != 0 else 1
-        num2 = random.randint(1, max_multiplier)  # Avoid excessively large results
-    elif operation == '-':
-        if num1 < num2:
-            num1, num2 = num2, num1  # Ensure a non-negative result
-
-    # Calculate the correct answer based on the chosen operation
-    if operation == '+':
-        correct_answer = num1 + num2
-    elif operation == '-':
-        correct_answer = num1 - num2
-    elif operation == '*':
-        correct_answer = num1 * num2
-    elif operation == '/':
-        correct_answer = num1 // num2
-
-    question_count_label.configure(text=f"Question {question_count + 1} of 10")  # Update the question counter
+
+    if option == ADAPTIVE_OPTION:
+        num1, operation, num2, correct_answer = next_adaptive_problem()
+    else:
+        operation = decide_operation(option, quiz_rng)  # Choose the operation for the current problem
+        num1, num2, correct_answer = make_problem(difficulty, operation, quiz_rng)
+
+    question_count_label.configure(text=f"Question {question_count + 1} of {QUESTIONS_PER_QUIZ}")  # Update the question counter
     display_problem()  # Show the generated problem to the user
 
-def max_value():
-    """Return the maximum allowed value for operands based on the current difficulty."""
-    if difficulty == 1:
-        return 9
-    elif difficulty == 2:
-        return 99
-    elif difficulty == 3:
-        return 9999
-    elif difficulty == 4:
-        return 99999
+def build_problem_pool():
+    """Pre-generate the adaptive problem pool once, so choosing a question never needs to retry."""
+    if problem_pool:
+        return  # The pool is reused across sessions
+    pool_rng = random.Random(POOL_SEED)
+    for level, operations in ADAPTIVE_LEVELS:
+        bucket = []
+        for _ in range(POOL_SIZE_PER_LEVEL):
+            op = pool_rng.choice(operations)
+            a, b, answer = make_problem(level, op, pool_rng)
+            bucket.append((a, op, b, answer))
+        problem_pool.append(bucket)
+
+def next_adaptive_problem():
+    """Pick a problem from the pool bucket that matches the current skill estimate in constant time."""
+    return quiz_rng.choice(problem_pool[round(adaptive_skill)])
+
+def update_adaptive_skill(correct):
+    """Move the skill estimate up or down using rolling accuracy and answer speed."""
+    global adaptive_skill
+    answer_ms = question_timings[-1]["answer_ms"] if question_timings else TARGET_ANSWER_MS
+    recent_results.append((correct, answer_ms))
+
+    accuracy = sum(1 for c, _ in recent_results if c) / len(recent_results)
+    average_ms = sum(ms for _, ms in recent_results) / len(recent_results)
+
+    # Correct and quick answers step up a full level; slow correct answers only half a level
+    if correct:
+        step = 1.0 if answer_ms <= TARGET_ANSWER_MS else 0.5
+    else:
+        step = -1.0
+
+    # Lean further in the same direction when the recent window agrees
+    if accuracy >= 0.8 and average_ms <= TARGET_ANSWER_MS:
+        step += 0.5
+    elif accuracy < 0.5:
+        step -= 0.5
+
+    adaptive_skill = min(max(adaptive_skill + step, 0), len(ADAPTIVE_LEVELS) - 1)
 
 def display_problem():
     """Display the current math problem to the user and prepare the answer entry."""
+    global question_shown_at
+    question_shown_at = time.perf_counter()       # Timestamp when the question appears
     question_text = f"{num1} {operation} {num2} = "
     question_label.configure(text=question_text)  # Update the question label with the new problem
     answer_entry.delete(0, tk.END)                # Clear any previous input from the answer entry
@@ -193,7 +336,8 @@ def display_problem():
 
 def check_answer(event=None):
     """Validate the user's answer and update the score based on correctness."""
-    global score, question_count, first_attempt
+    global score, question_count, first_attempt, answer_submitted_at
+    answer_submitted_at = time.perf_counter()  # Timestamp the submission before doing any work
     user_answer = answer_entry.get().strip()
     answer_entry.delete(0, tk.END)        # Clear the answer entry after submission
 
@@ -204,34 +348,168 @@ def check_answer(event=None):
         feedback_label.pack(pady=(5, 0))  # Show error feedback for invalid input
         return
 
-    if user_answer == correct_answer:
-        # Award more points if the correct answer is given on the first attempt
-        score_increment = 10 if first_attempt else 5
+    # Apply the scoring rules shared with the simulation harness
+    score_increment, outcome, next_first_attempt = grade_answer(user_answer, correct_answer, first_attempt, option)
+    record_answer_timing(outcome == "correct")  # Log how long this answer took
+    session_answers.append(user_answer)         # Keep the answer for the session recording
+
+    if outcome == "correct":
         score += score_increment
         score_label.configure(text=f"Score: {score}")  # Update the score display
+        if option == ADAPTIVE_OPTION:
+            update_adaptive_skill(first_attempt)         # Only first-try answers count as mastered
         feedback_label.configure(text="Correct!", text_color="white", fg_color="green")
         feedback_label.pack(pady=(5, 0))               # Provide positive feedback
         quiz_frame.after(1000, lambda: [feedback_label.pack_forget(), next_question()])  # Proceed to next question after a short delay
+    elif outcome == "retry":
+        # Allow another attempt ("Easy Mode" keeps the full first-attempt points)
+        first_attempt = next_first_attempt
+        feedback_label.configure(text="Incorrect! Try again.", text_color="white", fg_color="red")
+        feedback_label.pack(pady=(5, 0))
     else:
-        if option == 1:
-            # Immediate feedback without allowing a retry for option 1 which is "Easy Mode"
-            feedback_label.configure(text="Incorrect! Try again.", text_color="white", fg_color="red")
-            feedback_label.pack(pady=(5, 0))
-        else:
-            if first_attempt:
-                # Allow a second attempt for options other than "Easy Mode"
-                first_attempt = False
-                feedback_label.configure(text="Incorrect! Try again.", text_color="white", fg_color="red")
-                feedback_label.pack(pady=(5, 0))
-            else:
-                # Reveal the correct answer after the second incorrect attempt
-                feedback_label.configure(
-                    text=f"Incorrect! The correct answer was {correct_answer}.",
-                    text_color="white",
-                    fg_color="red"
-                )
-                feedback_label.pack(pady=(5, 0))
-                quiz_frame.after(1000, lambda: [feedback_label.pack_forget(), next_question()])  # Proceed after showing the correct answer
+        # Reveal the correct answer after the second incorrect attempt
+        first_attempt = next_first_attempt
+        if option == ADAPTIVE_OPTION:
+            update_adaptive_skill(False)
+        feedback_label.configure(
+            text=f"Incorrect! The correct answer was {correct_answer}.",
+            text_color="white",
+            fg_color="red"
+        )
+        feedback_label.pack(pady=(5, 0))
+        quiz_frame.after(1000, lambda: [feedback_label.pack_forget(), next_question()])  # Proceed after showing the correct answer
+
+def record_answer_timing(correct):
+    """Store the think time for this answer and measure when its feedback is rendered."""
+    entry = {
+        "question": question_count + 1,
+        "first_attempt": first_attempt,
+        "correct": correct,
+        "answer_ms": (answer_submitted_at - question_shown_at) * 1000,
+        "feedback_ms": None,
+    }
+    question_timings.append(entry)
+
+    def feedback_rendered():
+        """Record the delay between submitting and the feedback being drawn."""
+        entry["feedback_ms"] = (time.perf_counter() - answer_submitted_at) * 1000
+
+    # Idle callbacks run once Tk has processed pending redraws, so this marks the feedback paint
+    root.after_idle(feedback_rendered)
+
+def probe_loop_lag(scheduled_at=None):
+    """Measure how late the event loop runs a timer compared with when it was due."""
+    global lag_probe_job
+    now = time.perf_counter()
+    if scheduled_at is not None:
+        lag = (now - scheduled_at) * 1000 - LAG_PROBE_INTERVAL
+        loop_lag_samples.append(max(lag, 0))
+    lag_probe_job = root.after(LAG_PROBE_INTERVAL, probe_loop_lag, now)  # Schedule the next probe
+
+def start_lag_probe():
+    """Start probing the event loop, unless it is already being probed."""
+    if lag_probe_job is None:
+        probe_loop_lag()
+
+def stop_lag_probe():
+    """Stop probing the event loop, keeping the samples taken so far."""
+    global lag_probe_job
+    if lag_probe_job is not None:
+        root.after_cancel(lag_probe_job)
+        lag_probe_job = None
+
+def build_histogram(values):
+    """Group millisecond values into fixed-width buckets and count them."""
+    histogram = {}
+    for value in values:
+        bucket = int(value // HISTOGRAM_BIN_MS) * HISTOGRAM_BIN_MS
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    return {f"{bucket}-{bucket + HISTOGRAM_BIN_MS}ms": histogram[bucket] for bucket in sorted(histogram)}
+
+def get_results_db():
+    """Open the results database, creating the sessions table and leaderboard index if needed."""
+    global results_db
+    if results_db is None:
+        results_db = sqlite3.connect(results_db_path)
+        results_db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "finished TEXT NOT NULL, "
+            "difficulty INTEGER NOT NULL, "
+            "option INTEGER NOT NULL, "
+            "score INTEGER NOT NULL, "
+            "ranking TEXT NOT NULL, "
+            "questions TEXT NOT NULL)"
+        )
+        # SQLite updates this index on every insert, so reading a top-N never scans the table
+        results_db.execute(
+            "CREATE INDEX IF NOT EXISTS leaderboard ON sessions (difficulty, option, score DESC, id)"
+        )
+    return results_db
+
+def save_session(ranking):
+    """Append the finished session, including each question's outcome and timing, to the results database."""
+    try:
+        db = get_results_db()
+        with db:  # Commit the insert as a single transaction
+            db.execute(
+                "INSERT INTO sessions (finished, difficulty, option, score, ranking, questions) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (time.strftime("%Y-%m-%d %H:%M:%S"), difficulty, option or 0, score, ranking,
+                 json.dumps(question_timings)),
+            )
+    except sqlite3.Error as e:
+        print(f"Could not save quiz results: {e}")
+
+def top_scores(for_difficulty, for_option, limit=LEADERBOARD_SIZE):
+    """Return the best (score, ranking, finished) rows for a difficulty and option, highest first."""
+    try:
+        return get_results_db().execute(
+            "SELECT score, ranking, finished FROM sessions "
+            "WHERE difficulty = ? AND option = ? ORDER BY score DESC, id LIMIT ?",
+            (for_difficulty, for_option or 0, limit),
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Could not read leaderboard: {e}")
+        return []
+
+def show_leaderboard():
+    """Fill the results screen leaderboard with the top scores for the mode just played."""
+    lines = [
+        f"{place:>3}. {row_score:>3} ({row_ranking})  {finished}"
+        for place, (row_score, row_ranking, finished) in enumerate(top_scores(difficulty, option), start=1)
+    ]
+    leaderboard_box.configure(state="normal")
+    leaderboard_box.delete("1.0", tk.END)
+    leaderboard_box.insert(tk.END, "Leaderboard\n" + ("\n".join(lines) if lines else "No scores yet."))
+    leaderboard_box.configure(state="disabled")  # Read-only for the player
+
+def export_timings():
+    """Append this session's timings and histograms to the local timings file as one JSON line."""
+    feedback_times = [t["feedback_ms"] for t in question_timings if t["feedback_ms"] is not None]
+    session = {
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seed": session_seed,                # With the answers below this replays the session
+        "answers": session_answers,
+        "difficulty": difficulty,
+        "option": option,
+        "score": score,
+        "questions": question_timings,
+        "histograms": {
+            "answer_ms": build_histogram(t["answer_ms"] for t in question_timings),
+            "feedback_ms": build_histogram(feedback_times),
+            "loop_lag_ms": build_histogram(loop_lag_samples),
+        },
+        "max_loop_lag_ms": max(loop_lag_samples, default=0),
+        "title_animation": title_background.stats(),
+    }
+
+    try:
+        # Appending never rereads earlier sessions, so saving costs the same however long the history is
+        with open(timings_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(session) + "\n")
+    except OSError as e:
+        print(f"Could not save quiz timings: {e}")
 
 def next_question():
     """Move to the next question or end the quiz if all questions have been answered."""
@@ -239,7 +517,7 @@ def next_question():
     question_count += 1   # Increment the question counter
     first_attempt = True  # Reset the attempt status for the new question
 
-    if question_count >= 10:
+    if question_count >= QUESTIONS_PER_QUIZ:
         show_results()      # Show results if the quiz is complete
     else:
         generate_problem()  # Generate and display the next problem
@@ -247,25 +525,13 @@ def next_question():
 
 def show_results():
     """Display the final score and ranking to the user upon quiz completion."""
-    ranking = calculate_ranking()                                             # Determine the user's ranking based on their score
+    ranking = calculate_ranking(score)                                        # Determine the user's ranking based on their score
+    export_timings()                                                          # Save the per-question timings for this session
+    save_session(ranking)                                                     # Keep this session for the leaderboards
     results_label.configure(text=f"Your Score: {score}\nRanking: {ranking}")  # Update the results display
+    show_leaderboard()                                                        # List the best scores for this mode
     show_frame(results_frame)                                                 # Transition to the results frame to show the final outcome
 
-def calculate_ranking():
-    """Determine the user's ranking based on their final score."""
-    if score >= 95:
-        return "A+"
-    elif score >= 85:
-        return "A"
-    elif score >= 75:
-        return "B"
-    elif score >= 65:
-        return "C"
-    elif score >= 50:
-        return "D"
-    else:
-        return "F"
-
 def reset_variables():
     """Reset all quiz-related variables and UI elements to their default states."""
     global score, question_count, difficulty, option, first_attempt
@@ -282,7 +548,7 @@ def reset_variables():
     # Reset UI components to their initial states
     feedback_label.pack_forget()
     score_label.configure(text="Score: 0")
-    question_count_label.configure(text="Question 1 of 10")
+    question_count_label.configure(text=f"Question 1 of {QUESTIONS_PER_QUIZ}")
     answer_entry.delete(0, tk.END)
 
     # Deselect all option and difficulty CheckBoxes
@@ -291,28 +557,13 @@ def reset_variables():
     for var in difficulty_vars.values():
         var.set(0)
 
-def update_frame():
-    """Animate the background GIF by cycling through its frames at regular intervals."""
-    global frame_index
-    frame_index = (frame_index + 1) % frame_count
-    titlebg.configure(image=frames[frame_index])  # Update the background image to the next frame
-    root.after(14, update_frame)                  # Schedule the next frame update after 14 milliseconds
-
-# Load background images and prepare frames for GIF animation
-background_image = Image.open(resource_path("titlebg.gif"))
-menu_bg_image = customtkinter.CTkImage(
-    Image.open(resource_path("descbg.png")), size=(1440, 900)
-)
-quiz_bg_img = customtkinter.CTkImage(
-    Image.open(resource_path("descbg.png")), size=(1440, 900)
-)
-options_bg_img = customtkinter.CTkImage(
-    Image.open(resource_path("descbg.png")), size=(1440, 900)
-)
+# The menu, quiz and options screens share one decoded copy of the same background
+menu_bg_image = load_image("descbg.png", (1440, 900))
+quiz_bg_img = load_image("descbg.png", (1440, 900))
+options_bg_img = load_image("descbg.png", (1440, 900))
 
-frames = [ImageTk.PhotoImage(frame.convert("RGBA")) for frame in ImageSequence.Iterator(background_image)]
-frame_count = len(frames)
-frame_index = 0  # Initialize the frame index for animation
+animation_cpu_budget = 0.05  # Maximum share of the CPU the title animation may use
+mark_startup("load background images")
 
 # Create frames for different sections of the application
 title_frame = customtkinter.CTkFrame(root)
@@ -335,11 +586,14 @@ all_frames = [
 ]
 
 # Setting up the title screen background with the first frame of my animated background.
-titlebg = customtkinter.CTkLabel(
-    title_frame, text="", image=frames[0], width=1440, height=900
-)
+titlebg = customtkinter.CTkLabel(title_frame, text="", width=1440, height=900)
 titlebg.place(x=0, y=0)
 
+# Frames are composited at the window size once and then played from the disk cache
+title_background = AnimatedBackground(
+    titlebg, resource_path("titlebg.gif"), (1440, 900), image_cache_dir, cpu_budget=animation_cpu_budget
+)
+
 # Creating the 'Audio' button on the title screen to navigate to the audio settings.
 # I wanted it to be prominent, so I used a large font size.
 title_audio = customtkinter.CTkButton(
@@ -386,147 +640,156 @@ title_start = customtkinter.CTkButton(
 )
 title_start.pack(side=tk.BOTTOM, pady=(0, 10))
 
-# Setting up the audio settings screen with the same background for consistency.
-audiobg = customtkinter.CTkLabel(
-    audio_frame,
-    text="",
-    image=options_bg_img,
-    width=1440,
-    height=900
-)
-audiobg.place(x=0, y=0)
-
-# Adding a header label 'Audio:' to indicate the current settings screen.
-audio_header = customtkinter.CTkLabel(
-    audio_frame,
-    text="Audio:",
-    fg_color="#5a825d",
-    font=("Montserrat", 72, 'bold')
-)
-audio_header.pack(side=tk.TOP, pady=(150, 5))
-
-# Adding a label and slider for the background music volume.
-# Starting at 25% volume to keep the music subtle initially.
-bgm_volume_label = customtkinter.CTkLabel(
-    audio_frame,
-    text="Background Music Volume:",
-    font=('Montserrat', 32, 'bold'),
-    fg_color="#5a825d"
-)
-bgm_volume_label.pack(pady=(20, 10))
-
-bgm_volume_slider = customtkinter.CTkSlider(
-    audio_frame,
-    from_=0,
-    to=100,
-    command=update_bgm_volume,
-    width=400,
-    height=30,
-    bg_color="#5a825d",
-    fg_color="white",
-    button_color="darkgreen"
-)
-bgm_volume_slider.set(25)
-bgm_volume_slider.pack()
-
-# Adding a label and slider for the sound effects volume.
-# Set to 100% so the button clicks are noticeable.
-sfx_volume_label = customtkinter.CTkLabel(
-    audio_frame,
-    text="Sound Effect Volume:",
-    font=('Montserrat', 32, 'bold'),
-    fg_color="#5a825d"
-)
-sfx_volume_label.pack(pady=(50, 10))
-
-sfx_volume_slider = customtkinter.CTkSlider(
-    audio_frame,
-    from_=0,
-    to=100,
-    command=update_sfx_volume,
-    width=400,
-    height=30,
-    bg_color="#5a825d",
-    fg_color="white",
-    button_color="darkgreen"
-)
-sfx_volume_slider.set(100)
-sfx_volume_slider.pack()
+def build_audio_screen():
+    """Create the audio settings screen."""
+    # Setting up the audio settings screen with the same background for consistency.
+    audiobg = customtkinter.CTkLabel(
+        audio_frame,
+        text="",
+        image=options_bg_img,
+        width=1440,
+        height=900
+    )
+    audiobg.place(x=0, y=0)
+
+    # Adding a header label 'Audio:' to indicate the current settings screen.
+    audio_header = customtkinter.CTkLabel(
+        audio_frame,
+        text="Audio:",
+        fg_color="#5a825d",
+        font=("Montserrat", 72, 'bold')
+    )
+    audio_header.pack(side=tk.TOP, pady=(150, 5))
+
+    # Adding a label and slider for the background music volume.
+    # Starting at 25% volume to keep the music subtle initially.
+    bgm_volume_label = customtkinter.CTkLabel(
+        audio_frame,
+        text="Background Music Volume:",
+        font=('Montserrat', 32, 'bold'),
+        fg_color="#5a825d"
+    )
+    bgm_volume_label.pack(pady=(20, 10))
+
+    bgm_volume_slider = customtkinter.CTkSlider(
+        audio_frame,
+        from_=0,
+        to=100,
+        command=update_bgm_volume,
+        width=400,
+        height=30,
+        bg_color="#5a825d",
+        fg_color="white",
+        button_color="darkgreen"
+    )
+    bgm_volume_slider.set(25)
+    bgm_volume_slider.pack()
+
+    # Adding a label and slider for the sound effects volume.
+    # Set to 100% so the button clicks are noticeable.
+    sfx_volume_label = customtkinter.CTkLabel(
+        audio_frame,
+        text="Sound Effect Volume:",
+        font=('Montserrat', 32, 'bold'),
+        fg_color="#5a825d"
+    )
+    sfx_volume_label.pack(pady=(50, 10))
+
+    sfx_volume_slider = customtkinter.CTkSlider(
+        audio_frame,
+        from_=0,
+        to=100,
+        command=update_sfx_volume,
+        width=400,
+        height=30,
+        bg_color="#5a825d",
+        fg_color="white",
+        button_color="darkgreen"
+    )
+    sfx_volume_slider.set(100)
+    sfx_volume_slider.pack()
+
+    # Adding a 'BACK' button at the bottom-left to navigate back to the title screen.
+    # Chose red to make it easily identifiable as a navigation button.
+    audio_back_button = customtkinter.CTkButton(
+        audio_frame,
+        text="BACK",
+        font=('League Gothic', 48),
+        width=400,
+        height=100,
+        fg_color='red',
+        hover_color='maroon',
+        cursor="hand2",
+        command=lambda: [show_frame(title_frame), buttonsound()],
+        border_width=5,
+        border_color='black'
+    )
+    audio_back_button.place(relx=0.0, rely=1.0, anchor=tk.SW, x=50, y=-50)
 
-# Adding a 'BACK' button at the bottom-left to navigate back to the title screen.
-# Chose red to make it easily identifiable as a navigation button.
-audio_back_button = customtkinter.CTkButton(
-    audio_frame,
-    text="BACK",
-    font=('League Gothic', 48),
-    width=400,
-    height=100,
-    fg_color='red',
-    hover_color='maroon',
-    cursor="hand2",
-    command=lambda: [show_frame(title_frame), buttonsound()],
-    border_width=5,
-    border_color='black'
-)
-audio_back_button.place(relx=0.0, rely=1.0, anchor=tk.SW, x=50, y=-50)
+def build_options_screen():
+    """Create the quiz options screen."""
+    # Setting up the options screen background.
+    optionsbg = customtkinter.CTkLabel(
+        options_frame, text="", image=options_bg_img, width=1440, height=900
+    )
+    optionsbg.place(x=0, y=0)
 
-# Setting up the options screen background.
-optionsbg = customtkinter.CTkLabel(
-    options_frame, text="", image=options_bg_img, width=1440, height=900
-)
-optionsbg.place(x=0, y=0)
+    # Adding the 'Options:' header to clearly indicate the settings screen.
+    options_header = customtkinter.CTkLabel(
+        options_frame,
+        text="Options:",
+        fg_color="#5a825d",
+        font=("Montserrat", 72, 'bold')
+    )
+    options_header.pack(side=tk.TOP, pady=(150, 5))
+
+    # Defining the quiz options for the player to choose from.
+    # Wanted to provide varying levels of challenge.
+    quiz_options = [
+        ("IMPOSSIBLE Mode - Adds Multiplication and Division AND 5-digit questions.", 3),
+        ("Multiplication and Division - Adds Multiplication and Division.", 2),
+        ("Easy Mode - You have INFINITE Retries.", 1),
+        ("Adaptive Mode - Questions get harder or easier to match how you are doing.", ADAPTIVE_OPTION),
+    ]
 
-# Adding the 'Options:' header to clearly indicate the settings screen.
-options_header = customtkinter.CTkLabel(
-    options_frame,
-    text="Options:",
-    fg_color="#5a825d",
-    font=("Montserrat", 72, 'bold')
-)
-options_header.pack(side=tk.TOP, pady=(150, 5))
-
-# Defining the quiz options for the player to choose from.
-# Wanted to provide varying levels of challenge.
-quiz_options = [
-    ("IMPOSSIBLE Mode - Adds Multiplication and Division AND 5-digit questions.", 3),
-    ("Multiplication and Division - Adds Multiplication and Division.", 2),
-    ("Easy Mode - You have INFINITE Retries.", 1),
-]
+    # Creating checkboxes for each quiz option.
+    # Ensuring only one option can be selected at a time.
+    for text, value in quiz_options:
+        var = tk.IntVar(value=0)
+        option_vars[value] = var
 
-# Creating checkboxes for each quiz option.
-# Ensuring only one option can be selected at a time.
-for text, value in quiz_options:
-    var = tk.IntVar(value=0)
-    option_vars[value] = var
+        cb = customtkinter.CTkCheckBox(
+            options_frame,
+            text=text,
+            variable=var,
+            onvalue=1,
+            offvalue=0,
+            command=lambda v=value: option_selected(v),
+            font=('Poppins', 24, 'bold'),
+            bg_color="#5a825d",
+            cursor="hand2",
+        )
+        cb.pack(anchor=tk.CENTER, pady=30)
 
-    cb = customtkinter.CTkCheckBox(
+    # Adding a 'BACK' button to return to the title screen from the options menu.
+    options_back = customtkinter.CTkButton(
         options_frame,
-        text=text,
-        variable=var,
-        onvalue=1,
-        offvalue=0,
-        command=lambda v=value: option_selected(v),
-        font=('Poppins', 24, 'bold'),
-        bg_color="#5a825d",
+        text="BACK",
+        font=('League Gothic', 48),
+        width=400,
+        height=100,
+        fg_color='red',
+        hover_color='maroon',
         cursor="hand2",
+        command=lambda: [show_frame(title_frame), buttonsound()],
+        border_width=5,
+        border_color='black'
     )
-    cb.pack(anchor=tk.CENTER, pady=30)
+    options_back.place(relx=0.0, rely=1.0, anchor=tk.SW, x=50, y=-50)
 
-# Adding a 'BACK' button to return to the title screen from the options menu.
-options_back = customtkinter.CTkButton(
-    options_frame,
-    text="BACK",
-    font=('League Gothic', 48),
-    width=400,
-    height=100,
-    fg_color='red',
-    hover_color='maroon',
-    cursor="hand2",
-    command=lambda: [show_frame(title_frame), buttonsound()],
-    border_width=5,
-    border_color='black'
-)
-options_back.place(relx=0.0, rely=1.0, anchor=tk.SW, x=50, y=-50)
+screen_builders[audio_frame] = build_audio_screen
+screen_builders[options_frame] = build_options_screen
+mark_startup("build title screen")
 
 def update_difficulty_options(*args):
     """Dynamic update of difficulty options based on the selected quiz mode.
@@ -590,7 +853,7 @@ menu_header.pack(side=tk.TOP, pady=(150, 5))
 menu_text = customtkinter.CTkLabel(
     menu_frame,
     text=(
-        "This Quiz has 10 questions to solve. Each question is worth 10 points. "
+        f"This Quiz has {QUESTIONS_PER_QUIZ} questions to solve. Each question is worth 10 points. "
         "If you get an answer wrong, you get another attempt worth 5 points. "
         "You can choose between 3 difficulties:\n\n"
         "Easy (1-digit questions)\n\n"
@@ -705,7 +968,7 @@ score_label.pack(pady=(130, 0))
 # Showing the question count so the player knows their progress.
 question_count_label = customtkinter.CTkLabel(
     quiz_frame,
-    text="Question 1 of 10",
+    text=f"Question 1 of {QUESTIONS_PER_QUIZ}",
     fg_color="#5a825d",
     font=('Poppins', 48, 'bold')
 )
@@ -784,7 +1047,17 @@ results_label = customtkinter.CTkLabel(
     font=('Montserrat', 72, 'bold'),
     fg_color='green'
 )
-results_label.pack(pady=(150, 50))
+results_label.pack(pady=(100, 20))
+
+# Scrollable leaderboard of the best scores for the difficulty and option just played.
+leaderboard_box = customtkinter.CTkTextbox(
+    results_frame,
+    width=700,
+    height=250,
+    font=('Poppins', 24),
+    fg_color="#5a825d"
+)
+leaderboard_box.pack()
 
 # Adding a 'PLAY AGAIN?' button for the player to retry the quiz.
 play_again_button = customtkinter.CTkButton(
@@ -818,11 +1091,22 @@ exit_button = customtkinter.CTkButton(
 )
 exit_button.place(relx=1.0, rely=1.0, anchor=tk.SE, x=-50, y=-50)
 
-# Starting the background animation for the title screen.
-update_frame()
+mark_startup("build menu, quiz and results screens")
+
+# Build every screen now unless lazy construction is enabled.
+if not lazy_screens:
+    for screen in screen_builders:
+        ensure_built(screen)
 
 # Displaying the title screen as the initial frame when the application launches.
+# This also starts the background animation for the title screen.
 show_frame(title_frame)
 
+# Loading audio once the event loop is idle lets the window appear before any sound is decoded.
+root.after_idle(start_audio)
+
+# Report startup timings once the window has been mapped and first drawn.
+report_after_first_paint(root)
+
 # Starting the main application loop.
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,133 @@
+# Quiz rules shared by the Math Quiz window and the headless simulation harness.
+# Nothing in here touches the GUI, so these functions can run in worker processes.
+
+# Import the random module for the default (unseeded) random number generator
+import random
+
+# Number of questions in a single play of the quiz
+QUESTIONS_PER_QUIZ = 10
+
+# Easy Mode allows unlimited retries, so headless sessions stop after this many tries
+MAX_SIMULATED_ATTEMPTS = 10
+
+def random_int(level, rng=random):
+    """Generate a random integer within a range based on the given difficulty level."""
+    if level == 1:
+        return rng.randint(1, 9)
+    elif level == 2:
+        return rng.randint(10, 99)
+    elif level == 3:
+        return rng.randint(1000, 9999)
+    elif level == 4:
+        return rng.randint(10000, 99999)
+
+def max_value(level):
+    """Return the maximum allowed value for operands based on the given difficulty level."""
+    if level == 1:
+        return 9
+    elif level == 2:
+        return 99
+    elif level == 3:
+        return 9999
+    elif level == 4:
+        return 99999
+
+def decide_operation(option, rng=random):
+    """Select a random mathematical operation based on the chosen quiz option."""
+    if option in [2, 3]:
+        return rng.choice(['+', '-', '*', '/'])  # More operations depending on the options
+    else:
+        return rng.choice(['+', '-'])            # Main operations for default options
+
+def make_problem(level, operation, rng=random):
+    """Create operands for the given difficulty level and operation and return them with the answer."""
+    num1 = random_int(level, rng)   # Generate the first operand
+    num2 = random_int(level, rng)   # Generate the second operand
+
+    # Adjust operands to ensure valid and challenging problems
+    if operation == '/':
+        while num2 == 0:
+            num2 = random_int(level, rng)  # Prevent division by zero
+        quotient = rng.randint(1, max_value(level) // num2)
+        num1 = num2 * quotient      # Ensure the division results in a whole number
+    elif operation == '*':
+        max_multiplier = max_value(level) // num1 if num1 != 0 else 1
+        num2 = rng.randint(1, max_multiplier)  # Avoid excessively large results
+    elif operation == '-':
+        if num1 < num2:
+            num1, num2 = num2, num1  # Ensure a non-negative result
+
+    # Calculate the correct answer based on the chosen operation
+    if operation == '+':
+        answer = num1 + num2
+    elif operation == '-':
+        answer = num1 - num2
+    elif operation == '*':
+        answer = num1 * num2
+    elif operation == '/':
+        answer = num1 // num2
+
+    return num1, num2, answer
+
+def grade_answer(user_answer, correct_answer, first_attempt, option):
+    """
+    Grade a submitted answer using the quiz scoring rules.
+
+    Returns (points, outcome, first_attempt), where outcome is "correct", "retry" or "wrong"
+    and first_attempt says whether the next try still counts as a first attempt.
+    """
+    if user_answer == correct_answer:
+        # Award more points if the correct answer is given on the first attempt
+        return (10 if first_attempt else 5), "correct", first_attempt
+    if option == 1:
+        return 0, "retry", first_attempt  # Easy Mode retries never lose the first-attempt bonus
+    if first_attempt:
+        return 0, "retry", False          # One more chance, worth fewer points
+    return 0, "wrong", False              # Second miss: the answer is revealed
+
+def calculate_ranking(score):
+    """Determine the user's ranking based on their final score."""
+    if score >= 95:
+        return "A+"
+    elif score >= 85:
+        return "A"
+    elif score >= 75:
+        return "B"
+    elif score >= 65:
+        return "C"
+    elif score >= 50:
+        return "D"
+    else:
+        return "F"
+
+def play_session(seed, level, option, answer_for, max_attempts=MAX_SIMULATED_ATTEMPTS):
+    """
+    Play a whole quiz without a window, asking answer_for(num1, operation, num2, correct_answer,
+    first_attempt) for each submission. Problems are drawn in the same order as the GUI, so a
+    session recorded with a seed and its answers plays back to the same score.
+    """
+    rng = random.Random(seed)
+    score = 0
+    answers = []
+
+    for _ in range(QUESTIONS_PER_QUIZ):
+        operation = decide_operation(option, rng)
+        num1, num2, correct_answer = make_problem(level, operation, rng)
+        first_attempt = True
+
+        for _ in range(max_attempts):
+            user_answer = answer_for(num1, operation, num2, correct_answer, first_attempt)
+            answers.append(user_answer)
+            points, outcome, first_attempt = grade_answer(user_answer, correct_answer, first_attempt, option)
+            score += points
+            if outcome != "retry":
+                break
+
+    return {
+        "seed": seed,
+        "difficulty": level,
+        "option": option,
+        "answers": answers,
+        "score": score,
+        "ranking": calculate_ranking(score),
+    }
@@ -0,0 +1,143 @@
+# Headless simulation and replay harness for the Math Quiz.
+#
+# Simulate many sessions in parallel worker processes:
+#     python quiz_simulation.py --sessions 1000000 --difficulty 2 --option 2 --strategy second_try
+# Replay the sessions recorded by the quiz window and check their scores still match:
+#     python quiz_simulation.py --replay quiz_timings.jsonl
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import json to read recorded sessions
+import json
+
+# Import os to choose a sensible default number of worker processes
+import os
+
+# Import random to give each simulated player its own seeded generator
+import random
+
+# Import time to measure total throughput
+import time
+
+# Import Counter to tally scores and rankings across many sessions
+from collections import Counter
+
+# Import ProcessPoolExecutor to spread sessions over several CPU cores
+from concurrent.futures import ProcessPoolExecutor
+
+# Import the same quiz rules used by the quiz window
+from quiz_engine import play_session
+
+# Sessions handed to a worker at a time
+BATCH_SIZE = 10000
+
+def always_right(rng):
+    """Answer every question correctly on the first attempt."""
+    return lambda num1, operation, num2, correct_answer, first_attempt: correct_answer
+
+def second_try(rng):
+    """Miss every first attempt and get the second one right."""
+    return lambda num1, operation, num2, correct_answer, first_attempt: (
+        correct_answer + 1 if first_attempt else correct_answer
+    )
+
+def always_wrong(rng):
+    """Never give the right answer."""
+    return lambda num1, operation, num2, correct_answer, first_attempt: correct_answer + 1
+
+def coin_flip(rng):
+    """Answer correctly 70% of the time, like a typical student."""
+    return lambda num1, operation, num2, correct_answer, first_attempt: (
+        correct_answer if rng.random() < 0.7 else correct_answer + 1
+    )
+
+# Scripted answer strategies that can be chosen with --strategy
+STRATEGIES = {
+    "always_right": always_right,
+    "second_try": second_try,
+    "always_wrong": always_wrong,
+    "coin_flip": coin_flip,
+}
+
+def run_batch(first_seed, count, level, option, strategy):
+    """Play a batch of seeded sessions in a worker and return the tallied scores and rankings."""
+    scores = Counter()
+    rankings = Counter()
+    for seed in range(first_seed, first_seed + count):
+        answer_for = STRATEGIES[strategy](random.Random(seed))
+        result = play_session(seed, level, option, answer_for)
+        scores[result["score"]] += 1
+        rankings[result["ranking"]] += 1
+    return scores, rankings
+
+def simulate(sessions, level, option, strategy, workers, seed):
+    """Run the simulated sessions across worker processes and print the totals and throughput."""
+    scores = Counter()
+    rankings = Counter()
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_batch, seed + start, min(BATCH_SIZE, sessions - start), level, option, strategy)
+            for start in range(0, sessions, BATCH_SIZE)
+        ]
+        for future in futures:
+            batch_scores, batch_rankings = future.result()
+            scores.update(batch_scores)
+            rankings.update(batch_rankings)
+
+    elapsed = time.perf_counter() - started
+    mean_score = sum(score * n for score, n in scores.items()) / sessions if sessions else 0
+
+    print(f"Sessions: {sessions} with {workers} workers in {elapsed:.2f}s "
+          f"({sessions / elapsed:,.0f} sessions/s)")
+    print(f"Mean score: {mean_score:.2f}")
+    for ranking in ["A+", "A", "B", "C", "D", "F"]:
+        print(f"  {ranking:>2}: {rankings[ranking]}")
+
+def replay(path):
+    """Replay every recorded session in a timings file and report whether its score matches."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        sessions = json.loads(text)  # Timings files written before sessions were saved one per line
+    else:
+        sessions = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    matched = 0
+    replayed = 0
+    for session in sessions:
+        # Adaptive sessions depend on answer timing as well as answers, and old recordings have no seed
+        if session.get("seed") is None or session.get("option") == 4:
+            continue
+        answers = iter(session["answers"])
+        result = play_session(
+            session["seed"], session["difficulty"], session["option"],
+            lambda *problem: next(answers, None),  # Questions left unanswered when the session ended score nothing
+            max_attempts=len(session["answers"]) or 1,
+        )
+        replayed += 1
+        if result["score"] == session["score"]:
+            matched += 1
+        else:
+            print(f"Mismatch for session {session['finished']}: "
+                  f"recorded {session['score']}, replayed {result['score']}")
+
+    print(f"Replayed {replayed} sessions, {matched} matched their recorded score.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate or replay Math Quiz sessions without the GUI.")
+    parser.add_argument("--sessions", type=int, default=100000, help="number of sessions to simulate")
+    parser.add_argument("--difficulty", type=int, choices=[1, 2, 3, 4], default=1)
+    parser.add_argument("--option", type=int, choices=[1, 2, 3], default=None)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="coin_flip")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first session")
+    parser.add_argument("--replay", help="timings file recorded by the quiz to replay instead")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay)
+    else:
+        simulate(args.sessions, args.difficulty, args.option, args.strategy, args.workers, args.seed)
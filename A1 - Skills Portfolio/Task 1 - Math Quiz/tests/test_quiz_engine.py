@@ -0,0 +1,72 @@
+# Tests for the seeded quiz engine and replaying recorded sessions.
+
+# Import json to write recorded sessions the way the quiz does
+import json
+
+# Import random to play sessions with answers that are sometimes wrong
+import random
+
+# Import the engine and the simulation harness under test
+from quiz_engine import QUESTIONS_PER_QUIZ, play_session
+from quiz_simulation import replay
+
+def always_right(num1, operation, num2, correct_answer, first_attempt):
+    return correct_answer
+
+def test_perfect_session_scores_full_marks():
+    session = play_session(7, 2, 2, always_right)
+    assert session["score"] == 10 * QUESTIONS_PER_QUIZ
+    assert session["ranking"] == "A+"
+    assert len(session["answers"]) == QUESTIONS_PER_QUIZ
+
+def test_same_seed_draws_the_same_problems():
+    problems = []
+    for _ in range(2):
+        drawn = []
+        play_session(42, 3, 3, lambda *problem: drawn.append(problem) or problem[3])
+        problems.append(drawn)
+    assert problems[0] == problems[1]
+
+def test_recorded_answers_replay_to_the_same_score():
+    guesser = random.Random(1)
+    recorded = play_session(
+        99, 1, 2, lambda num1, operation, num2, answer, first: answer if guesser.random() < 0.5 else answer + 1)
+    answers = iter(recorded["answers"])
+    replayed = play_session(99, 1, 2, lambda *problem: next(answers))
+    assert replayed["score"] == recorded["score"]
+    assert replayed["answers"] == recorded["answers"]
+
+def test_easy_mode_keeps_the_first_attempt_bonus():
+    attempts = []
+
+    def wrong_then_right(num1, operation, num2, answer, first_attempt):
+        attempts.append(first_attempt)
+        return answer if len(attempts) % 3 == 0 else answer + 1
+
+    session = play_session(3, 1, 1, wrong_then_right)
+    assert all(attempts)
+    assert session["score"] == 10 * QUESTIONS_PER_QUIZ
+
+def record(seed, option, answer_for):
+    session = play_session(seed, 2, option, answer_for)
+    session["finished"] = f"session {seed}"
+    return session
+
+def test_replay_reads_json_lines(tmp_path, capsys):
+    sessions = [record(seed, 2, always_right) for seed in range(3)]
+    short = record(10, 3, always_right)
+    short["answers"] = short["answers"][:4]  # The player closed the window part way through
+    short["score"] = 40
+    path = tmp_path / "quiz_timings.jsonl"
+    path.write_text("".join(json.dumps(session) + "\n" for session in sessions + [short]), encoding="utf-8")
+
+    replay(str(path))
+    assert "Replayed 4 sessions, 4 matched" in capsys.readouterr().out
+
+def test_replay_reads_legacy_json_array_and_skips_unseeded(tmp_path, capsys):
+    sessions = [record(5, 2, always_right), {"seed": None, "option": 2, "answers": [], "score": 0}]
+    path = tmp_path / "quiz_timings.json"
+    path.write_text(json.dumps(sessions), encoding="utf-8")
+
+    replay(str(path))
+    assert "Replayed 1 sessions, 1 matched" in capsys.readouterr().out
@@ -1,62 +1,87 @@
+# Import the time module to time how long jokes wait to be spoken
+import time
+
+# Import os and sys to find the folder of components shared between the apps
+import os
+import sys
+
+# Put the folder of components shared between the apps on the import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Shared"))
+
+# Import the startup profiler shared by all three apps, which times each phase from here on
+from startup_profile import mark_startup, report_after_first_paint, timed_build
+
 # Import the customtkinter library for creating modern-looking Tkinter widgets
 import customtkinter
+mark_startup("import customtkinter")
 
 # Import the standard tkinter library for creating GUI applications
 import tkinter as tk
+mark_startup("import tkinter")
 
-# Import the PIL library for handling images, including GIFs
-from PIL import Image, ImageTk, ImageSequence
-
-# Import the random module to select random jokes from a list
-import random
+# Import the PIL library for handling images
+from PIL import Image
+mark_startup("import PIL")
 
-# Import the os module for interacting with the operating system, such as file paths
-import os
+# Import deque to keep the most recent speech latencies
+from collections import deque
 
-# Import the pyttsx3 library for text-to-speech functionality
-import pyttsx3
+# pyttsx3 is imported by the speech worker thread, so the import never delays the window
 
 # Import the threading module to handle concurrent execution of threads
 import threading
 
-# Import the pygame library for handling audio playback
-import pygame
+# Import queue for the bounded, prioritised queue of utterances waiting to be spoken
+import queue
+
+# Import itertools to number utterances so equal priorities keep their order
+import itertools
+
+# Import the animated background shared with the Math Quiz
+from animated_background import AnimatedBackground
+
+# Import the headless joke service, which deals jokes and shares the voice settings and speech cache naming
+from joke_service import JokeService, SPEECH_RATE, configure_voice, speech_cache_path
+
+# Import the audio engine shared with the Math Quiz, which loads pygame on its own thread
+from audio_engine import AudioEngine
+mark_startup("import standard library")
 
 # Configure the appearance mode to light and set the default color theme to dark blue for the customtkinter widgets
 customtkinter.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
 customtkinter.set_default_color_theme("A1 - Skills Portfolio\\Task 2 - Alexa Tell me A Joke\\Assets\\pink.json")
-
-# Initialize the Pygame mixer to handle audio playback within the application
-pygame.mixer.init()
+mark_startup("load theme")
 
 # Define the initial volume levels for background music and sound effects
 initial_bgm_volume = 0.25  # This sets the initial volume for background music to 25%
 initial_sfx_volume = 0.5   # This sets the initial volume for sound effects to 50%
 
+# Audio is loaded in the background once the window is up (see the end of this file)
+audio = AudioEngine(
+    os.path.join("A1 - Skills Portfolio", "Task 2 - Alexa Tell me A Joke", "Assets", "cache"),
+    extra_channels=1,  # One channel kept for pre-rendered speech
+    music_volume=initial_bgm_volume,
+    sfx_volume=initial_sfx_volume,
+)
+
 def update_bgm_volume(volume):
     """Adjust the background music volume based on the slider's value."""
-    pygame.mixer.music.set_volume(float(volume) / 100)
+    audio.set_music_volume(float(volume) / 100)
 
 def update_sfx_volume(volume):
     """Adjust the sound effect volume based on the slider's value."""
-    button_sound_effect.set_volume(float(volume) / 100)
-
-def bgmusic():
-    """Load and continuously play the background music on a loop."""
-    pygame.mixer.music.load("A1 - Skills Portfolio\\Task 2 - Alexa Tell me A Joke\\Assets\\The Builder.mp3")
-    pygame.mixer.music.set_volume(initial_bgm_volume)
-    pygame.mixer.music.play(loops=-1)
+    audio.set_sfx_volume(float(volume) / 100)
 
-# Start playing the background music as soon as the application launches
-bgmusic()
-
-# Load the button click sound effect and set its initial volume
-button_sound_effect = pygame.mixer.Sound("A1 - Skills Portfolio\\Task 2 - Alexa Tell me A Joke\\Assets\\Robot Click Sound Effect.mp3")
-button_sound_effect.set_volume(initial_sfx_volume)
+def start_audio():
+    """Start the background music and load the click sound without holding up the window."""
+    audio.start(
+        resource_path("The Builder.mp3"),
+        {"click": resource_path("Robot Click Sound Effect.mp3")},
+    )
 
 def buttonsound():
     """Play the button click sound effect when a button is pressed."""
-    button_sound_effect.play()
+    audio.play("click")
 
 # Initialize the main application window using customtkinter
 root = customtkinter.CTk()
@@ -68,68 +93,87 @@ root.resizable(False, False)     # Prevent the window from being resizable
 title_frame = customtkinter.CTkFrame(root)
 main_frame = customtkinter.CTkFrame(root)
 options_frame = customtkinter.CTkFrame(root)
-
-# Initialize the text-to-speech engine using pyttsx3
-engine = pyttsx3.init()
-engine_lock = threading.Lock()  # Create a lock to manage concurrent access to the TTS engine
-
-# Configure the speech rate and select the second available voice for the TTS engine
-engine.setProperty('rate', 200)
-voices = engine.getProperty('voices')
-engine.setProperty('voice', voices[1].id)
+mark_startup("create window")
+
+# Speech is handled by one long-lived worker thread that owns the TTS engine.
+# Lower priority numbers are spoken first, so a punchline jumps ahead of a waiting setup.
+SPEECH_QUEUE_SIZE = 8
+PUNCHLINE_PRIORITY = 0
+SETUP_PRIORITY = 1
+speech_queue = queue.PriorityQueue(maxsize=SPEECH_QUEUE_SIZE)
+speech_order = itertools.count()  # Tie-breaker that keeps utterances of equal priority in order
+speech_joke_id = 0                # Utterances queued for an older joke are stale and skipped
+punchline_joke_id = -1            # Setups for this joke are skipped once its punchline is requested
+
+# Counters for queue depth and how long utterances wait before speech starts
+speech_metrics = {
+    "queued": 0,
+    "spoken": 0,
+    "cancelled": 0,
+    "dropped": 0,
+    "max_queue_depth": 0,
+    "latencies_ms": deque(maxlen=100),
+    "cache_hits": 0,
+    "cache_misses": 0,
+}
+
+# Pre-rendered speech: one audio file per setup or punchline, named by a hash of text, voice and rate
+tts_cache_dir = os.path.join("A1 - Skills Portfolio", "Task 2 - Alexa Tell me A Joke", "Assets", "tts_cache")
+PRERENDER_AHEAD = 3    # Upcoming jokes in the deck rendered while the speech worker is idle
+TTS_CACHE_FILES = 500  # Rendered utterances kept; the least recently played are removed at startup
 
 def resource_path(relative_path):
     """Construct the absolute path to a resource file within the project directory."""
-    return os.path.join("A1 - Skills Portfolio\\Task 2 - Alexa Tell me A Joke\\Assets", relative_path)
-
-def load_gif(widget, gif_path, update_interval=14):
-    """Load a GIF image and animate it on the specified widget at the given interval."""
-    gif_image = Image.open(resource_path(gif_path))  # Open the GIF image from the resource path
-    frames = [ImageTk.PhotoImage(frame.convert("RGBA")) for frame in ImageSequence.Iterator(gif_image)]
-    frame_count = len(frames)
-
-    def update_frame(frame_index=0):
-        """Update the widget with the next frame of the GIF animation."""
-        frame_index = (frame_index + 1) % frame_count
-        widget.configure(image=frames[frame_index])
-        widget.image = frames[frame_index]                        # Keep a reference to prevent garbage collection
-        widget.after(update_interval, update_frame, frame_index)  # Schedule the next frame update
-
-    widget.configure(image=frames[0])  # Set the initial frame of the GIF
-    widget.image = frames[0]
-    update_frame()                     # Start the animation loop
-
-# Load the background image for the options frame and set its size to cover the entire window
-options_bg_image = customtkinter.CTkImage(
-    Image.open(resource_path("alexaoptions.png")), size=(1280, 720)
-)
+    return os.path.join("A1 - Skills Portfolio", "Task 2 - Alexa Tell me A Joke", "Assets", relative_path)
 
 # Position all frames to occupy the full window area
 for frame in (title_frame, main_frame, options_frame):
     frame.place(relx=0, rely=0, relwidth=1, relheight=1)
 
+# Screens that are only built the first time they are shown (set lazy_screens to False to build everything up front)
+lazy_screens = True
+screen_builders = {}  # Frame -> function that creates its widgets
+built_screens = set()
+
+def ensure_built(frame):
+    """Build a lazily constructed screen the first time it is needed."""
+    if frame in screen_builders and frame not in built_screens:
+        built_screens.add(frame)
+        timed_build(screen_builders[frame])
+
+# Animated backgrounds by the frame they belong to; only the one on top is animated
+backgrounds = {}
+
 def show_frame(frame):
     """Bring the specified frame to the front, making it visible to the user."""
+    ensure_built(frame)  # Create the screen's widgets on its first visit
     frame.tkraise()
 
-# Load jokes from the "randomJokes.txt" file and store them as tuples of setup and punchline
-jokes = []
-with open(resource_path("randomJokes.txt"), 'r', encoding='utf-8') as f:
-    for line in f:
-        line = line.strip()
-        if line and '?' in line:
-            setup, punchline = line.split('?', 1)
-            setup += '?'
-            jokes.append((setup.strip(), punchline.strip()))
+    # Frames raised over one another stay mapped, so hidden backgrounds have to be stopped explicitly
+    for owner, background in backgrounds.items():
+        if owner is frame:
+            background.show()
+        else:
+            background.hide()
+
+# Load the joke corpus (rebuilding it if a joke pack changed) and resume the shuffled deck from the last run
+joke_service = JokeService(resource_path(""))
+jokes = joke_service.jokes
+mark_startup("index jokes")
+
+ANY_CATEGORY = "Any"  # Category menu entry that deals from the whole deck
 
 current_joke = None  # Initialize the variable to keep track of the current joke being displayed
 
 def show_joke_setup():
     """Select a random joke and display its setup while preparing to show the punchline."""
     global current_joke
-    current_joke = random.choice(jokes)          # Choose a random joke from the list
+    category = category_menu.get()
+    joke = joke_service.next_joke(None if category == ANY_CATEGORY else category)  # "Any" deals with no repeats
+    current_joke = (joke["setup"], joke["punchline"])
     joke_text.configure(text=current_joke[0])    # Display the joke's setup
-    speak_text(current_joke[0])                  # Use TTS to speak the setup
+    cancel_speech()                              # Stop speaking the previous joke
+    speak_text(current_joke[0], "setup")         # Use TTS to speak the setup
     show_punchline_button.pack(pady=(10))        # Show the "Show Punchline" button
     tell_joke_button.pack_forget()               # Hide the "Tell Joke" button
     another_joke_button.pack_forget()            # Hide the "Another Joke" button
@@ -138,7 +182,8 @@ def show_joke_setup():
 def show_joke_punchline():
     """Display the punchline of the current joke and provide options for another joke or quitting."""
     joke_text.configure(text=f"{current_joke[0]}\n\n{current_joke[1]}")  # Show both setup and punchline
-    speak_text(current_joke[1])          # Use TTS to speak the punchline
+    if current_joke[1]:
+        speak_text(current_joke[1], "punchline")  # Use TTS to speak the punchline (one-liners have none)
     show_punchline_button.pack_forget()  # Hide the "Show Punchline" button
     another_joke_button.pack(pady=(10))  # Show the "Another Joke" button
     quit_button.pack(pady=10)            # Show the "Quit" button
@@ -152,27 +197,193 @@ def another_joke():
 
 def quit_button_click():
     """Handle the event when the user clicks the quit button, resetting the interface."""
+    cancel_speech()                       # Stop speaking the joke that is being left
     tell_joke_button.pack(pady=(10))      # Show the "Tell Joke" button
     joke_text.configure(text="")          # Clear the joke text
     show_punchline_button.pack_forget()   # Hide the "Show Punchline" button
     another_joke_button.pack_forget()     # Hide the "Another Joke" button
     quit_button.pack_forget()             # Hide the "Quit" button
 
-def speak_text(text):
-    """Use the text-to-speech engine to speak the provided text in a separate thread."""
-    def run_speech():
-        with engine_lock:       # Ensure that only one thread accesses the TTS engine at a time
-            engine.say(text)    # Queue the text to be spoken
-            engine.runAndWait() # Execute the speech
-
-    threading.Thread(target=run_speech).start()  # Start the speech in a new thread to avoid blocking the main thread
+def speech_is_stale(kind, joke_id):
+    """Return True if an utterance belongs to a joke that is no longer on screen or has been superseded."""
+    return joke_id != speech_joke_id or (kind == "setup" and joke_id == punchline_joke_id)
+
+def tts_cache_path(text, voice_id, rate):
+    """Return the cache file for this text spoken with this voice and rate; changing either gives a new file."""
+    return speech_cache_path(tts_cache_dir, text, voice_id, rate)
+
+def sweep_tts_cache():
+    """Remove unfinished renders, then the least recently played files beyond TTS_CACHE_FILES."""
+    os.makedirs(tts_cache_dir, exist_ok=True)
+    rendered = []
+    for entry in os.scandir(tts_cache_dir):
+        if entry.name.endswith(".tmp"):
+            os.remove(entry.path)  # Left by a render that was interrupted; nothing is rendering yet
+        elif entry.name.endswith(".wav"):
+            rendered.append((entry.stat().st_mtime, entry.path))
+    rendered.sort()
+    for _, path in rendered[:max(len(rendered) - TTS_CACHE_FILES, 0)]:
+        os.remove(path)  # Files for a voice or rate no longer used are never played, so they go first
+
+def next_prerender(voice_id, rate, attempted):
+    """Return (path, text) for the first line of the next few jokes in the deck with no rendered file, or None."""
+    for joke_id in joke_service.upcoming(PRERENDER_AHEAD):
+        for text in jokes[joke_id]:
+            if not text:
+                continue  # A one-liner has no punchline to say
+            path = tts_cache_path(text, voice_id, rate)
+            if path not in attempted and not os.path.exists(path):
+                return path, text
+    return None
+
+def prerender_one(engine, path, text):
+    """Synthesize one utterance to its cache file, writing to a temporary name first."""
+    temp_path = path + ".tmp"
+    engine.save_to_file(text, temp_path)
+    engine.runAndWait()
+    if os.path.exists(temp_path):
+        os.replace(temp_path, path)  # Only complete files ever appear under the cache name
+
+def play_cached_speech(path, kind, joke_id):
+    """Play a pre-rendered file, stopping early if it goes stale. Returns False if audio is not available."""
+    channel = audio.play_voice(path)
+    if channel is None:
+        return False
+    while channel.get_busy():
+        if speech_is_stale(kind, joke_id):
+            channel.stop()
+            break
+        time.sleep(0.02)
+    return True
+
+def speech_worker():
+    """Own the TTS engine and speak queued utterances one at a time, skipping any that went stale."""
+    import pyttsx3
+    engine = pyttsx3.init()
+
+    # Configure the speech rate and select the second available voice for the TTS engine
+    voice_id = configure_voice(engine)
+
+    # Pre-render the jokes about to be dealt while nothing is waiting to be spoken
+    try:
+        sweep_tts_cache()
+        prerendering = True
+        attempted = set()  # Renders already tried, so one that fails is not tried again and again
+    except OSError as e:
+        print(f"Speech cache unavailable: {e}")
+        prerendering = False
+
+    speaking = {}  # Details of the utterance currently being spoken
+
+    def on_start(name):
+        """Record how long the utterance waited between being queued and starting to play."""
+        speech_metrics["latencies_ms"].append((time.perf_counter() - speaking["queued_at"]) * 1000)
+
+    def on_word(name, location, length):
+        """Stop speaking mid-sentence if the utterance was superseded while it played."""
+        if speech_is_stale(speaking["kind"], speaking["joke_id"]):
+            engine.stop()
+
+    engine.connect('started-utterance', on_start)
+    engine.connect('started-word', on_word)
+
+    while True:
+        render = next_prerender(voice_id, SPEECH_RATE, attempted) if prerendering else None
+        try:
+            # Only wait briefly while there is pre-rendering left to do in the background
+            item = speech_queue.get(timeout=0.1) if render else speech_queue.get()
+        except queue.Empty:
+            attempted.add(render[0])
+            prerender_one(engine, *render)
+            continue
+
+        priority, order, kind, joke_id, text, queued_at = item
+        if speech_is_stale(kind, joke_id):
+            speech_metrics["cancelled"] += 1
+            continue
+        speaking.update(kind=kind, joke_id=joke_id, queued_at=queued_at)
+
+        # Play the pre-rendered file if there is one, otherwise synthesize live
+        cache_path = tts_cache_path(text, voice_id, SPEECH_RATE)
+        if os.path.exists(cache_path):
+            os.utime(cache_path)  # Recently played files are the last to be swept
+            speech_metrics["latencies_ms"].append((time.perf_counter() - queued_at) * 1000)
+            if play_cached_speech(cache_path, kind, joke_id):
+                speech_metrics["cache_hits"] += 1
+                speech_metrics["spoken"] += 1
+                continue
+            speech_metrics["latencies_ms"].pop()  # Audio was not ready; the live engine records its own latency
+        speech_metrics["cache_misses"] += 1
+        engine.say(text)
+        engine.runAndWait()
+        speech_metrics["spoken"] += 1
+
+def start_speech_worker():
+    """Start the speech worker thread; the TTS engine is created there, off the UI thread."""
+    threading.Thread(target=speech_worker, daemon=True).start()
+
+def cancel_speech():
+    """Supersede everything queued or being spoken, e.g. when a new joke is requested."""
+    global speech_joke_id
+    speech_joke_id += 1
+    while True:
+        try:
+            speech_queue.get_nowait()
+        except queue.Empty:
+            break
+        speech_metrics["cancelled"] += 1
+
+def speak_text(text, kind):
+    """Queue text for the speech worker; kind is "setup" or "punchline" for the current joke."""
+    global punchline_joke_id
+    if kind == "punchline":
+        punchline_joke_id = speech_joke_id  # The punchline preempts this joke's setup
+        priority = PUNCHLINE_PRIORITY
+    else:
+        priority = SETUP_PRIORITY
+
+    try:
+        speech_queue.put_nowait((priority, next(speech_order), kind, speech_joke_id, text, time.perf_counter()))
+        speech_metrics["queued"] += 1
+    except queue.Full:
+        speech_metrics["dropped"] += 1  # Never block the UI waiting for the worker
+    speech_metrics["max_queue_depth"] = max(speech_metrics["max_queue_depth"], speech_queue.qsize())
+
+def report_speech_metrics():
+    """Print the speech queue counters and latency when run with --speech-metrics."""
+    if "--speech-metrics" not in sys.argv:
+        return
+    latencies = speech_metrics["latencies_ms"]
+    average = sum(latencies) / len(latencies) if latencies else 0
+    print("Speech metrics:")
+    for key in ("queued", "spoken", "cancelled", "dropped", "max_queue_depth", "cache_hits", "cache_misses"):
+        print(f"  {key:<20}{speech_metrics[key]}")
+    print(f"  {'average latency':<20}{average:.1f} ms over the last {len(latencies)} utterances")
+
+def report_animation_stats():
+    """Print each animated background's frame counters when run with --animation-stats."""
+    if "--animation-stats" not in sys.argv:
+        return
+    print("Animation stats:")
+    for background in backgrounds.values():
+        stats = background.stats()
+        print(f"  {os.path.basename(background.gif_path):<20}"
+              f"{stats['frames_rendered']} rendered, {stats['frames_dropped']} dropped")
+
+def on_close():
+    """Report speech metrics and animation stats if requested and close the window."""
+    report_speech_metrics()
+    report_animation_stats()
+    root.destroy()
 
 # Add a background label to the title frame and place it to cover the entire frame
 title_bg = customtkinter.CTkLabel(title_frame, text="")
 title_bg.place(x=0, y=0, relwidth=1, relheight=1)
 
-# Load and animate the title GIF on the title frame's background label
-load_gif(title_bg, "alexatitle.gif")
+# Animate the title GIF on the title frame's background label from frames composited at the window size
+backgrounds[title_frame] = AnimatedBackground(
+    title_bg, resource_path("alexatitle.gif"), (1280, 720), resource_path("cache")
+)
 
 # Create the "Start" button on the title frame with specified styling and functionality
 title_start = customtkinter.CTkButton(
@@ -197,90 +408,100 @@ title_options = customtkinter.CTkButton(
 )
 title_options.pack(side="top", anchor="w", padx=(350, 50))  # Position the "Options" button
 
-# Add a background image to the options frame and ensure it covers the entire frame
-options_bg = customtkinter.CTkLabel(
-    options_frame,
-    image=options_bg_image,
-    text=""
-)
-options_bg.place(relx=0, rely=0, relwidth=1, relheight=1)
-
-# Add a header label for the audio settings in the options frame with specified styling
-audio_header = customtkinter.CTkLabel(
-    options_frame,
-    text="Audio:",
-    text_color="purple",
-    bg_color="black",
-    font=("Montserrat", 48, 'bold')
-)
-audio_header.pack(side=tk.TOP, pady=(300, 0))  # Position the audio header label
-
-# Create and position the background music volume label in the options frame
-bgm_volume_label = customtkinter.CTkLabel(
-    options_frame,
-    text="Background Music Volume:",
-    font=('Poppins', 24, 'bold'),
-    text_color="white",
-    bg_color="black",
-)
-bgm_volume_label.pack(pady=(20, 0))  # Add spacing above the label
-
-# Create and configure the background music volume slider with specified range and command
-bgm_volume_slider = customtkinter.CTkSlider(
-    options_frame,
-    from_=0,
-    to=100,
-    orientation="horizontal",
-    command=update_bgm_volume,  # Call the update_bgm_volume function when the slider is moved
-    width=400,
-    height=30,
-    bg_color="black",
-)
-bgm_volume_slider.set(25)  # Set the initial position of the slider to match initial_bgm_volume
-bgm_volume_slider.pack()    # Position the background music volume slider
-
-# Create and position the sound effect volume label in the options frame
-sfx_volume_label = customtkinter.CTkLabel(
-    options_frame,
-    text="Sound Effect Volume:",
-    font=('Poppins', 24, 'bold'),
-    text_color="white",
-    bg_color="black",
-)
-sfx_volume_label.pack(pady=(20, 0))  # Add spacing above the label
-
-# Create and configure the sound effect volume slider with specified range and command
-sfx_volume_slider = customtkinter.CTkSlider(
-    options_frame,
-    from_=0,
-    to=100,
-    orientation="horizontal",
-    command=update_sfx_volume,  # Call the update_sfx_volume function when the slider is moved
-    width=400,
-    height=30,
-    bg_color="black",
-)
-sfx_volume_slider.set(50)  # Set the initial position of the slider to match initial_sfx_volume
-sfx_volume_slider.pack()    # Position the sound effect volume slider
-
-# Create the "BACK" button in the options frame to return to the title frame and play a button sound
-options_back = customtkinter.CTkButton(
-    options_frame,
-    text="BACK",
-    width=200,
-    height=75,
-    font=("Montserrat", 32, "bold"),
-    bg_color="black",
-    command=lambda: [show_frame(title_frame), buttonsound()]
-)
-options_back.pack(side="bottom", anchor="w", padx=(50, 50), pady=(0, 40))  # Position the "BACK" button at the bottom
+def build_options_screen():
+    """Create the audio options screen."""
+    # Load the background image for the options frame and set its size to cover the entire window
+    options_bg_image = customtkinter.CTkImage(
+        Image.open(resource_path("alexaoptions.png")), size=(1280, 720)
+    )
+
+    # Add a background image to the options frame and ensure it covers the entire frame
+    options_bg = customtkinter.CTkLabel(
+        options_frame,
+        image=options_bg_image,
+        text=""
+    )
+    options_bg.place(relx=0, rely=0, relwidth=1, relheight=1)
+
+    # Add a header label for the audio settings in the options frame with specified styling
+    audio_header = customtkinter.CTkLabel(
+        options_frame,
+        text="Audio:",
+        text_color="purple",
+        bg_color="black",
+        font=("Montserrat", 48, 'bold')
+    )
+    audio_header.pack(side=tk.TOP, pady=(300, 0))  # Position the audio header label
+
+    # Create and position the background music volume label in the options frame
+    bgm_volume_label = customtkinter.CTkLabel(
+        options_frame,
+        text="Background Music Volume:",
+        font=('Poppins', 24, 'bold'),
+        text_color="white",
+        bg_color="black",
+    )
+    bgm_volume_label.pack(pady=(20, 0))  # Add spacing above the label
+
+    # Create and configure the background music volume slider with specified range and command
+    bgm_volume_slider = customtkinter.CTkSlider(
+        options_frame,
+        from_=0,
+        to=100,
+        orientation="horizontal",
+        command=update_bgm_volume,  # Call the update_bgm_volume function when the slider is moved
+        width=400,
+        height=30,
+        bg_color="black",
+    )
+    bgm_volume_slider.set(25)  # Set the initial position of the slider to match initial_bgm_volume
+    bgm_volume_slider.pack()    # Position the background music volume slider
+
+    # Create and position the sound effect volume label in the options frame
+    sfx_volume_label = customtkinter.CTkLabel(
+        options_frame,
+        text="Sound Effect Volume:",
+        font=('Poppins', 24, 'bold'),
+        text_color="white",
+        bg_color="black",
+    )
+    sfx_volume_label.pack(pady=(20, 0))  # Add spacing above the label
+
+    # Create and configure the sound effect volume slider with specified range and command
+    sfx_volume_slider = customtkinter.CTkSlider(
+        options_frame,
+        from_=0,
+        to=100,
+        orientation="horizontal",
+        command=update_sfx_volume,  # Call the update_sfx_volume function when the slider is moved
+        width=400,
+        height=30,
+        bg_color="black",
+    )
+    sfx_volume_slider.set(50)  # Set the initial position of the slider to match initial_sfx_volume
+    sfx_volume_slider.pack()    # Position the sound effect volume slider
+
+    # Create the "BACK" button in the options frame to return to the title frame and play a button sound
+    options_back = customtkinter.CTkButton(
+        options_frame,
+        text="BACK",
+        width=200,
+        height=75,
+        font=("Montserrat", 32, "bold"),
+        bg_color="black",
+        command=lambda: [show_frame(title_frame), buttonsound()]
+    )
+    options_back.pack(side="bottom", anchor="w", padx=(50, 50), pady=(0, 40))  # Position the "BACK" button at the bottom
 
 # Add a background label to the main frame and place it to cover the entire frame
 main_bg = customtkinter.CTkLabel(main_frame, text="")
 main_bg.place(x=0, y=0, relwidth=1, relheight=1)
 
-# Load and animate the main GIF on the main frame's background label
-load_gif(main_bg, "alexamain.gif")
+def build_main_background():
+    """Load and animate the main GIF on the main frame's background label."""
+    backgrounds[main_frame] = AnimatedBackground(
+        main_bg, resource_path("alexamain.gif"), (1280, 720), resource_path("cache")
+    )
 
 # Create a prompt label in the main frame to instruct the user on how to hear a joke
 prompt_label = customtkinter.CTkLabel(
@@ -292,6 +513,17 @@ prompt_label = customtkinter.CTkLabel(
 )
 prompt_label.pack(pady=(190, 10))  # Position the prompt label with vertical padding
 
+# Create a menu in the main frame to ask for a joke from one category
+category_menu = customtkinter.CTkOptionMenu(
+    main_frame,
+    values=[ANY_CATEGORY] + [category.title() for category in joke_service.categories.categories],
+    width=200,
+    font=("Montserrat", 18),
+    bg_color="black",
+)
+category_menu.set(ANY_CATEGORY)
+category_menu.pack(pady=(0, 10))  # Position the category menu above the "Tell Joke" button
+
 # Create the "Alexa, Tell me a Joke!" button in the main frame to initiate joke telling and play a button sound
 tell_joke_button = customtkinter.CTkButton(
     main_frame,
@@ -349,8 +581,29 @@ quit_button = customtkinter.CTkButton(
     command=lambda: [show_frame(title_frame), quit_button_click(), buttonsound()]  # Return to title frame, reset, and play sound when clicked
 )
 
+screen_builders[options_frame] = build_options_screen
+screen_builders[main_frame] = build_main_background
+mark_startup("build screens")
+
+# Build every screen now unless lazy construction is enabled
+if not lazy_screens:
+    for screen in screen_builders:
+        ensure_built(screen)
+
 # Start the application by displaying the title frame first
 show_frame(title_frame)
 
+# Loading audio once the event loop is idle lets the window appear before any sound is decoded
+root.after_idle(start_audio)
+
+# Start the speech worker once the window is up, so creating the TTS engine never delays it
+root.after_idle(start_speech_worker)
+
+# Report startup timings once the window has been mapped and first drawn
+report_after_first_paint(root)
+
+# Print the speech metrics (when requested) as the window closes
+root.protocol("WM_DELETE_WINDOW", on_close)
+
 # Run the main event loop to keep the application window open and responsive to user interactions
 root.mainloop()
\ No newline at end of file
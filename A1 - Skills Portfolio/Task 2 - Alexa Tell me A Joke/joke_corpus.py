@@ -0,0 +1,210 @@
+# Joke storage shared by the Alexa Jokes window and the ingestion tool.
+# Nothing in here touches the GUI, so jokes can be read without opening a window.
+
+# Import the os module for file sizes, modification times and directories
+import os
+
+# Import re to find where a joke's setup ends and its punchline starts
+import re
+
+# Import the random module to shuffle the deck and pick jokes from a category
+import random
+
+# Import json to read the table of contents at the start of the category index
+import json
+
+# Import mmap, array and struct to read jokes, the shuffle deck and the category index straight from disk
+import mmap
+import array
+import struct
+
+# "Q: ... A: ..." jokes, as found in some joke packs
+QA_PATTERN = re.compile(r'^\s*Q[:.]\s*(.+?)\s+A[:.]\s*(.+)$')
+
+# A question ending in one or more '?' (possibly mixed with '!'), followed by the punchline
+QUESTION_PATTERN = re.compile(r'^(.+?\?[?!]*)\s*(\S.*)$')
+
+# The first sentence of a joke that is not a question
+SENTENCE_PATTERN = re.compile(r'^(.+?[.!]+)\s+(\S.*)$')
+
+def split_joke(line):
+    """
+    Split a joke line into (setup, punchline).
+
+    Compiled corpus lines separate the two with a tab. Otherwise "Q: ... A: ..." jokes are split
+    at the answer, questions after their first '?' along with any '?!' that follow it, and
+    anything else after its first sentence. A line with none of these is a one-liner.
+    """
+    line = line.rstrip('\r\n')  # Other whitespace could be the tab before an empty punchline
+    if '\t' in line:
+        setup, punchline = line.split('\t', 1)
+        return setup.strip(), punchline.strip()
+    line = line.strip()
+    for pattern in (QA_PATTERN, QUESTION_PATTERN, SENTENCE_PATTERN):
+        match = pattern.match(line)
+        if match:
+            return match.group(1).strip(), match.group(2).strip()
+    return line, ""  # A one-liner: the whole joke is the setup
+
+class JokeCorpus:
+    """Read jokes on demand from the text file using a binary index of line offsets."""
+
+    def __init__(self, path, index_path):
+        self.file = open(path, 'rb')
+        size = os.path.getsize(path)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        # Rebuild the index whenever the joke file is newer than it
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(path):
+            self._build_index(index_path)
+        with open(index_path, 'rb') as f:
+            self.offsets = array.array('Q')
+            self.offsets.frombytes(f.read())  # 8 bytes per joke; the joke text itself stays on disk
+
+    def _build_index(self, index_path):
+        """Scan the file once and write the start offset of every non-blank line."""
+        offsets = array.array('Q')
+        start = 0
+        end_of_file = len(self.data)
+        while start < end_of_file:
+            end = self.data.find(b'\n', start)
+            if end == -1:
+                end = end_of_file
+            if self.data[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path, 'wb') as f:
+            offsets.tofile(f)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        """Return joke number index as a (setup, punchline) tuple, reading only that line."""
+        if not 0 <= index < len(self.offsets):
+            raise IndexError("joke index out of range")
+        start = self.offsets[index]
+        end = self.data.find(b'\n', start)
+        line = self.data[start:end if end != -1 else len(self.data)]
+        return split_joke(line.decode('utf-8'))
+
+class JokeDeck:
+    """Deal joke numbers in a random order with no repeats until every joke has been told."""
+
+    HEADER = struct.Struct('<QQQ')  # Number of jokes, position in the deck, cards shuffled into place so far
+
+    def __init__(self, size, state_path):
+        self.size = size
+        new_deck = True
+        if os.path.exists(state_path) and os.path.getsize(state_path) == self.HEADER.size + 4 * size:
+            with open(state_path, 'rb') as f:
+                saved_size, _, _ = self.HEADER.unpack(f.read(self.HEADER.size))
+            new_deck = saved_size != size
+
+        if new_deck:
+            # Start from the identity order; shuffling happens one card at a time as jokes are drawn
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            with open(state_path, 'wb') as f:
+                f.write(self.HEADER.pack(size, 0, 0))
+                for chunk_start in range(0, size, 1 << 20):
+                    array.array('I', range(chunk_start, min(chunk_start + (1 << 20), size))).tofile(f)
+
+        # The deck lives in a memory-mapped file, so each draw's swap and position are saved as they happen
+        self.file = open(state_path, 'r+b')
+        self.state = mmap.mmap(self.file.fileno(), 0) if size else None
+        self.cards = memoryview(self.state)[self.HEADER.size:].cast('I') if size else None
+
+    def draw(self):
+        """Return the next joke number using one step of a Fisher-Yates shuffle."""
+        if not self.size:
+            raise IndexError("no jokes to draw")
+        position, shuffled = self._position()
+        if position >= shuffled:
+            self._shuffle_in(position)
+            shuffled = position + 1
+        self.HEADER.pack_into(self.state, 0, self.size, position + 1, shuffled)
+        return self.cards[position]
+
+    def peek(self, n):
+        """Return the next n joke numbers draw will deal (fewer near the end of the deck), shuffling them in now."""
+        if not self.size:
+            return []
+        position, shuffled = self._position()
+        end = min(position + n, self.size)
+        for index in range(max(shuffled, position), end):
+            self._shuffle_in(index)
+        self.HEADER.pack_into(self.state, 0, self.size, position, max(shuffled, end))
+        return list(self.cards[position:end])
+
+    def _position(self):
+        """Return the next position to deal and how many cards are already shuffled into place."""
+        _, position, shuffled = self.HEADER.unpack_from(self.state, 0)
+        if position >= self.size:
+            return 0, 0  # Every joke has been told; start a fresh shuffle
+        return position, shuffled
+
+    def _shuffle_in(self, index):
+        """Swap a random card from the undealt part of the deck into a position."""
+        pick = random.randrange(index, self.size)
+        self.cards[index], self.cards[pick] = self.cards[pick], self.cards[index]
+
+class CategoryIndex:
+    """
+    Look up jokes by category or keyword in the inverted index written by joke_ingest.py.
+
+    The file starts with the byte length of a JSON table of contents, which maps each term to the
+    start and length of its posting list. The posting lists follow as one uint32 array of joke
+    numbers that stays memory-mapped, so opening the index does not read them.
+    """
+
+    LENGTH = struct.Struct('<I')
+
+    def __init__(self, path):
+        self.categories = []
+        self.terms = {}
+        self.postings = None
+        if not os.path.exists(path):
+            return  # No index yet: only "Any" can be asked for
+
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (toc_length,) = self.LENGTH.unpack_from(self.data, 0)
+        toc = json.loads(self.data[self.LENGTH.size:self.LENGTH.size + toc_length])
+        self.categories = toc["categories"]
+        self.terms = toc["terms"]
+        self.postings = memoryview(self.data)[self.LENGTH.size + toc_length:].cast('I')
+
+    def count(self, term):
+        """Return how many jokes are tagged with a category or keyword."""
+        return self.terms.get(term.lower(), (0, 0))[1]
+
+    def jokes_for(self, term):
+        """Return the joke numbers tagged with a category or keyword, without copying them."""
+        start, count = self.terms.get(term.lower(), (0, 0))
+        return self.postings[start:start + count] if count else []
+
+    def pick(self, term, rng=random):
+        """Return a random joke number from a category or keyword, or None if nothing is tagged with it."""
+        start, count = self.terms.get(term.lower(), (0, 0))
+        if not count:
+            return None
+        return self.postings[start + rng.randrange(count)]
+
+def write_category_index(path, categories, postings):
+    """Write the inverted index read by CategoryIndex from a dict of term -> array('I') of joke numbers."""
+    terms = {}
+    start = 0
+    for term in sorted(postings):
+        terms[term] = [start, len(postings[term])]
+        start += len(postings[term])
+
+    toc = json.dumps({"categories": sorted(categories), "terms": terms}, separators=(',', ':')).encode('utf-8')
+    toc += b' ' * (-(CategoryIndex.LENGTH.size + len(toc)) % 4)  # Keep the posting lists 4-byte aligned
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(CategoryIndex.LENGTH.pack(len(toc)))
+        f.write(toc)
+        for term in sorted(postings):
+            postings[term].tofile(f)
@@ -0,0 +1,277 @@
+# Combine joke packs into the compact corpus read by the Alexa Jokes window.
+#
+# Every .txt, .jsonl and .csv file in Assets/jokepacks is read along with Assets/randomJokes.txt:
+#     python joke_ingest.py
+# Or name the packs and output folder yourself:
+#     python joke_ingest.py packs/dad.jsonl packs/puns.csv --out Assets/cache
+#
+# Each joke goes through the same stages as it streams past: normalisation, splitting into
+# setup and punchline, near-duplicate removal with MinHash, and category/keyword tagging.
+# The output is one "setup<TAB>punchline" line per joke (jokes.txt) and an inverted index of
+# categories and keywords (categories.idx). The window rebuilds both when a pack is newer.
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import the os module to find joke packs and compare file times
+import os
+
+# Import time to report how long ingestion took
+import time
+
+# Import re to break jokes into words for shingling and tagging
+import re
+
+# Import json and csv to read JSON Lines and CSV joke packs
+import json
+import csv
+
+# Import unicodedata to fold look-alike characters before comparing jokes
+import unicodedata
+
+# Import zlib for a fast, stable hash of each shingle
+import zlib
+
+# Import random to draw the fixed MinHash coefficients
+import random
+
+# Import array to collect posting lists compactly while streaming
+import array
+
+# Import Counter to tally what happened to each joke
+from collections import Counter
+
+# Import the splitting rules and index writer shared with the window
+from joke_corpus import split_joke, write_category_index
+
+# Folder next to this script holding the joke packs and the compiled corpus
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Assets")
+
+# Number of MinHash functions, split into LSH bands of BAND_ROWS each
+MINHASH_SIZE = 32
+BAND_ROWS = 4
+
+# Jokes whose estimated word-shingle similarity is at least this are treated as the same joke
+DUPLICATE_THRESHOLD = 0.8
+
+# Largest prime below 2**32, so every MinHash value fits in an unsigned 32-bit array slot
+MINHASH_PRIME = 4294967291
+
+# Fixed coefficients, so the same packs always give the same corpus
+_coefficients = random.Random(1)
+MINHASH_COEFFICIENTS = [
+    (_coefficients.randrange(1, MINHASH_PRIME), _coefficients.randrange(MINHASH_PRIME))
+    for _ in range(MINHASH_SIZE)
+]
+
+# Words that tag a joke with a category; every matching word is also indexed as a keyword
+CATEGORY_KEYWORDS = {
+    "animals": {"animal", "bear", "bee", "bird", "cat", "chicken", "cow", "dog", "duck", "elephant",
+                "fish", "frog", "horse", "lion", "monkey", "mouse", "owl", "penguin", "pig", "shark",
+                "sheep", "snake", "turkey", "zoo"},
+    "food": {"bread", "burger", "cake", "cheese", "chef", "coffee", "cookie", "egg", "food", "pasta",
+             "pizza", "restaurant", "sandwich", "soup", "spaghetti", "tea", "waiter"},
+    "school": {"class", "exam", "homework", "library", "math", "school", "student", "teacher"},
+    "science": {"astronaut", "atom", "chemist", "moon", "physics", "planet", "science", "scientist",
+                "space", "sun"},
+    "tech": {"alexa", "bug", "code", "computer", "internet", "keyboard", "phone", "programmer",
+             "robot", "software", "wifi"},
+    "work": {"boss", "doctor", "job", "janitor", "lawyer", "office", "work", "worker"},
+}
+KEYWORD_CATEGORIES = {word: category for category, words in CATEGORY_KEYWORDS.items() for word in words}
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+def read_text(path):
+    """Yield one joke per non-blank line of a plain text pack."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield {"text": line}
+
+def read_jsonl(path):
+    """Yield the jokes in a JSON Lines pack, skipping lines that are not JSON objects."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {}
+
+def read_csv(path):
+    """Yield the rows of a CSV pack with a header row naming its columns."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {key.strip().lower(): value for key, value in row.items() if key}
+
+# Pack readers by file extension; add a reader here to support another format
+SOURCE_READERS = {
+    ".txt": read_text,
+    ".jsonl": read_jsonl,
+    ".csv": read_csv,
+}
+
+def find_sources(assets_dir=ASSETS_DIR):
+    """Return randomJokes.txt followed by every supported pack in the jokepacks folder."""
+    sources = [os.path.join(assets_dir, "randomJokes.txt")]
+    packs_dir = os.path.join(assets_dir, "jokepacks")
+    if os.path.isdir(packs_dir):
+        sources += sorted(
+            os.path.join(packs_dir, name) for name in os.listdir(packs_dir)
+            if os.path.splitext(name)[1].lower() in SOURCE_READERS
+        )
+    return sources
+
+def corpus_is_stale(sources, out_dir):
+    """Return True if the compiled corpus is missing or older than any of its packs."""
+    outputs = [os.path.join(out_dir, "jokes.txt"), os.path.join(out_dir, "categories.idx")]
+    if not all(os.path.exists(path) for path in outputs):
+        return True
+    built = min(os.path.getmtime(path) for path in outputs)
+    return any(os.path.getmtime(path) > built for path in sources)
+
+def normalize_text(text):
+    """Fold Unicode look-alikes and collapse all whitespace, including tabs and newlines, to single spaces."""
+    return " ".join(unicodedata.normalize('NFKC', text or "").split())
+
+def normalize_record(record):
+    """Turn a pack record into a (setup, punchline, categories) tuple, or None if it holds no joke."""
+    setup = normalize_text(record.get("setup") or record.get("question"))
+    punchline = normalize_text(record.get("punchline") or record.get("answer"))
+    if not setup:
+        setup, punchline = split_joke(normalize_text(
+            record.get("text") or record.get("joke") or record.get("body")))
+    if not setup:
+        return None
+
+    tags = record.get("categories") or record.get("category") or record.get("tags") or []
+    if isinstance(tags, str):
+        tags = re.split(r'[;,|]', tags)
+    categories = {normalize_text(str(tag)).lower() for tag in tags} - {""}
+    return setup, punchline, categories
+
+def minhash(words):
+    """Return the MinHash signature of a joke's word 3-grams (or its words, for very short jokes)."""
+    if len(words) >= 3:
+        shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+    else:
+        shingles = set(words) or {""}
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+    return array.array('I', (
+        min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_COEFFICIENTS
+    ))
+
+class NearDuplicateFilter:
+    """Spot jokes that are the same as, or a light rewording of, one already kept."""
+
+    def __init__(self):
+        self.signatures = array.array('I')  # MINHASH_SIZE values per kept joke, end to end
+        self.buckets = {}                   # (band, hash of band values) -> first joke with them
+
+    def find_duplicate(self, words):
+        """Return the number of the kept joke this one nearly duplicates, or remember it and return None."""
+        signature = minhash(words)
+        bands = [
+            (band, hash(tuple(signature[band * BAND_ROWS:(band + 1) * BAND_ROWS])))
+            for band in range(MINHASH_SIZE // BAND_ROWS)
+        ]
+
+        # Only jokes sharing a whole band are compared, so each check costs a few lookups
+        checked = set()
+        for key in bands:
+            candidate = self.buckets.get(key)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            start = candidate * MINHASH_SIZE
+            same = sum(1 for i in range(MINHASH_SIZE) if self.signatures[start + i] == signature[i])
+            if same / MINHASH_SIZE >= DUPLICATE_THRESHOLD:
+                return candidate
+
+        joke_id = len(self.signatures) // MINHASH_SIZE
+        self.signatures.extend(signature)
+        for key in bands:
+            self.buckets.setdefault(key, joke_id)
+        return None
+
+def tag_joke(words, categories):
+    """Return the index terms for a joke: its categories plus any category keywords it contains."""
+    terms = set(categories)
+    for word in words:
+        keyword = word if word in KEYWORD_CATEGORIES else word.rstrip('s')  # "cows" is tagged as "cow"
+        if keyword in KEYWORD_CATEGORIES:
+            terms.add(KEYWORD_CATEGORIES[keyword])
+            terms.add(keyword)
+    return terms
+
+def read_sources(sources, stats):
+    """Stream records from every pack in turn, using the reader for its file extension."""
+    for path in sources:
+        reader = SOURCE_READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            print(f"Skipping {path}: no reader for this file type")
+            continue
+        if not os.path.exists(path):
+            print(f"Skipping {path}: file not found")
+            continue
+        for record in reader(path):
+            stats["read"] += 1
+            yield record
+
+def ingest(sources, out_dir):
+    """Stream the packs into jokes.txt and categories.idx in out_dir and return what happened to each joke."""
+    stats = Counter()
+    duplicates = NearDuplicateFilter()
+    categories = set()
+    postings = {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Write to a temporary file so a running window never sees a half-written corpus
+    corpus_path = os.path.join(out_dir, "jokes.txt")
+    with open(corpus_path + ".tmp", 'w', encoding='utf-8', newline='\n') as out:
+        for record in read_sources(sources, stats):
+            joke = normalize_record(record)
+            if joke is None:
+                stats["empty"] += 1
+                continue
+            setup, punchline, source_categories = joke
+
+            words = WORD_PATTERN.findall(f"{setup} {punchline}".lower())
+            joke_id = duplicates.find_duplicate(words)
+            if joke_id is None:
+                joke_id = stats["kept"]
+                out.write(f"{setup}\t{punchline}\n")
+                stats["kept"] += 1
+                terms = tag_joke(words, source_categories)
+            else:
+                stats["duplicates"] += 1
+                terms = source_categories  # A copy from another pack can still add its categories
+
+            categories |= source_categories
+            for term in terms:
+                if term in CATEGORY_KEYWORDS:
+                    categories.add(term)
+                posting = postings.setdefault(term, array.array('I'))
+                if not posting or posting[-1] != joke_id:
+                    posting.append(joke_id)
+
+    os.replace(corpus_path + ".tmp", corpus_path)
+    write_category_index(os.path.join(out_dir, "categories.idx"), categories, postings)
+    stats["categories"] = len(categories)
+    stats["terms"] = len(postings)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine joke packs into the Alexa Jokes corpus.")
+    parser.add_argument("sources", nargs="*", help="joke packs (.txt, .jsonl, .csv); defaults to the Assets folder")
+    parser.add_argument("--out", default=os.path.join(ASSETS_DIR, "cache"), help="folder for jokes.txt and categories.idx")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    stats = ingest(args.sources or find_sources(), args.out)
+    elapsed = time.perf_counter() - started
+
+    print(f"Read {stats['read']} records in {elapsed:.2f}s ({stats['read'] / elapsed:,.0f} records/s)")
+    print(f"Kept {stats['kept']}, dropped {stats['duplicates']} near duplicates and {stats['empty']} empty records")
+    print(f"Indexed {stats['categories']} categories and {stats['terms']} terms")
@@ -0,0 +1,111 @@
+# Load generator for the joke service.
+#
+# Start the service, then fire requests at it from many simulated kiosks:
+#     python joke_service.py --port 8765
+#     python joke_load.py --clients 32 --requests 2000 --batch 10 --category animals
+# Or call the service directly in this process to see its cost without HTTP:
+#     python joke_load.py --in-process --requests 100000
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import time to measure latency and throughput
+import time
+
+# Import threading to run one simulated kiosk per thread
+import threading
+
+# Import json to check each response decodes
+import json
+
+# Import http.client for keep-alive connections to the service
+import http.client
+
+# Import urlencode to build query strings
+from urllib.parse import urlencode
+
+def percentile(sorted_values, fraction):
+    """Return the value at the given fraction of an already sorted list."""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run_client(host, port, path, requests, latencies, errors):
+    """Send requests over one keep-alive connection, recording each latency in milliseconds."""
+    connection = http.client.HTTPConnection(host, port)
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+            json.loads(body)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port)  # Reconnect and carry on
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+
+def run_http(host, port, clients, requests, batch, category):
+    """Run the simulated kiosks in parallel and return the latencies, errors and elapsed time."""
+    query = {"category": category} if category else {}
+    if batch > 1:
+        path = "/jokes?" + urlencode(dict(query, n=batch))
+    else:
+        path = "/joke?" + urlencode(query)
+
+    latencies = []
+    errors = []
+    threads = [
+        threading.Thread(target=run_client, args=(host, port, path, requests, latencies, errors))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+def run_in_process(requests, batch, category):
+    """Call the service directly, without HTTP, and return the latencies, errors and elapsed time."""
+    from joke_service import JokeService
+    service = JokeService()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        call_started = time.perf_counter()
+        if batch > 1:
+            service.get_jokes(batch, category)
+        else:
+            service.next_joke(category)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    return latencies, [], time.perf_counter() - started
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure requests per second against the joke service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=16, help="simulated kiosks, one connection each")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per kiosk")
+    parser.add_argument("--batch", type=int, default=1, help="jokes per request; above 1 uses /jokes")
+    parser.add_argument("--category", default=None)
+    parser.add_argument("--in-process", action="store_true", help="call the service directly instead of over HTTP")
+    args = parser.parse_args()
+
+    if args.in_process:
+        latencies, errors, elapsed = run_in_process(args.requests, args.batch, args.category)
+    else:
+        latencies, errors, elapsed = run_http(
+            args.host, args.port, args.clients, args.requests, args.batch, args.category)
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f}s: {len(latencies) / elapsed:,.0f} requests/s, "
+          f"{len(latencies) * args.batch / elapsed:,.0f} jokes/s, {len(errors)} errors")
+    print(f"Latency p50 {percentile(latencies, 0.5):.2f} ms, p95 {percentile(latencies, 0.95):.2f} ms, "
+          f"p99 {percentile(latencies, 0.99):.2f} ms")
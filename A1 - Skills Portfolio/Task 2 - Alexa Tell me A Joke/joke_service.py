@@ -0,0 +1,271 @@
+# Headless joke service shared by the Alexa Jokes window and kiosk clients.
+#
+# Serve jokes over HTTP to many clients from one process:
+#     python joke_service.py --port 8765
+#     GET /joke?category=animals        one joke
+#     GET /jokes?n=20&category=food     a batch of jokes
+#     GET /categories                   the categories that can be asked for
+#     GET /speech?text=...              the text rendered to a WAV file
+# Or answer one JSON request per line on stdin, e.g. {"op": "get_jokes", "n": 5}:
+#     python joke_service.py --stdio
+# Measure requests per second with joke_load.py.
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import the os module to locate the Assets folder and the speech cache
+import os
+
+# Import sys to read and answer requests on stdin and stdout
+import sys
+
+# Import json to encode jokes for clients
+import json
+
+# Import random to pick batches of jokes from a category
+import random
+
+# Import hashlib to name rendered speech files after the text, voice and rate they contain
+import hashlib
+
+# Import threading and queue to keep the text-to-speech engine on one worker thread
+import threading
+import queue
+
+# Import Future to hand rendered speech back to the thread that asked for it
+from concurrent.futures import Future
+
+# Import the HTTP server classes for the kiosk endpoint
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Import the joke corpus, shuffle deck and category index
+from joke_corpus import JokeCorpus, JokeDeck, CategoryIndex
+
+# Import the ingestion pipeline to rebuild the corpus when a joke pack changes
+from joke_ingest import ASSETS_DIR, find_sources, corpus_is_stale, ingest
+
+# Words per minute for the text-to-speech voice, shared with the window
+SPEECH_RATE = 200
+
+# Largest batch a single get_jokes request may ask for
+MAX_BATCH = 1000
+
+def configure_voice(engine):
+    """Set the speech rate and select the second available voice, returning the voice id in use."""
+    engine.setProperty('rate', SPEECH_RATE)
+    voices = engine.getProperty('voices')
+    if len(voices) > 1:
+        engine.setProperty('voice', voices[1].id)
+    return engine.getProperty('voice')
+
+def speech_cache_path(cache_dir, text, voice_id, rate):
+    """Return the cache file for this text spoken with this voice and rate; changing either gives a new file."""
+    key = hashlib.sha256(f"{voice_id}\n{rate}\n{text}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.wav")
+
+class JokeService:
+    """Deal jokes and render them to speech without any GUI, safely from many threads."""
+
+    def __init__(self, assets_dir=ASSETS_DIR):
+        cache_dir = os.path.join(assets_dir, "cache")
+
+        # Rebuild the corpus from randomJokes.txt and any packs in Assets/jokepacks when one has changed
+        sources = find_sources(assets_dir)
+        if corpus_is_stale(sources, cache_dir):
+            ingest(sources, cache_dir)
+
+        self.jokes = JokeCorpus(os.path.join(cache_dir, "jokes.txt"), os.path.join(cache_dir, "jokes.idx"))
+        self.categories = CategoryIndex(os.path.join(cache_dir, "categories.idx"))
+        self.deck = JokeDeck(len(self.jokes), os.path.join(cache_dir, "jokeDeck.bin"))
+        self.deck_lock = threading.Lock()  # Each draw swaps two cards, so draws must not interleave
+
+        self.speech_dir = os.path.join(assets_dir, "tts_cache")
+        self.speech_requests = queue.Queue()
+        self.speech_thread = None
+        self.speech_lock = threading.Lock()
+
+    def joke(self, joke_id):
+        """Return joke number joke_id as a dict ready to send to a client."""
+        setup, punchline = self.jokes[joke_id]
+        return {"id": joke_id, "setup": setup, "punchline": punchline}
+
+    def next_joke(self, category=None):
+        """Deal the next joke, or a random joke from a category. Raises KeyError for an unknown category."""
+        if category:
+            joke_id = self.categories.pick(category)
+            if joke_id is None:
+                raise KeyError(f"no jokes in category {category!r}")
+        else:
+            with self.deck_lock:
+                joke_id = self.deck.draw()
+        return self.joke(joke_id)
+
+    def upcoming(self, n):
+        """Return the numbers of the next n jokes the deck will deal, so they can be prepared ahead."""
+        with self.deck_lock:
+            return self.deck.peek(n)
+
+    def get_jokes(self, n, category=None):
+        """Return up to n different jokes, dealt from the deck or sampled from a category."""
+        n = max(0, min(n, MAX_BATCH))
+        if category:
+            postings = self.categories.jokes_for(category)
+            if not len(postings):
+                raise KeyError(f"no jokes in category {category!r}")
+            picks = random.sample(range(len(postings)), min(n, len(postings)))
+            return [self.joke(postings[i]) for i in picks]
+
+        with self.deck_lock:
+            joke_ids = [self.deck.draw() for _ in range(min(n, len(self.jokes)))]
+        return [self.joke(joke_id) for joke_id in joke_ids]
+
+    def render_speech(self, text):
+        """Return the path of a WAV file of text being spoken, rendering it on the speech thread if needed."""
+        with self.speech_lock:
+            if self.speech_thread is None:
+                self.speech_thread = threading.Thread(target=self._speech_worker, daemon=True)
+                self.speech_thread.start()
+        result = Future()
+        self.speech_requests.put((text, result))
+        return result.result()
+
+    def _speech_worker(self):
+        """Own the TTS engine and render queued texts one at a time, reusing files already in the cache."""
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+            voice_id = configure_voice(engine)
+            os.makedirs(self.speech_dir, exist_ok=True)
+        except Exception as e:
+            engine_error = e  # Answer every request with the error rather than leaving callers waiting
+        else:
+            engine_error = None
+
+        while True:
+            text, result = self.speech_requests.get()
+            if engine_error is not None:
+                result.set_exception(engine_error)
+                continue
+            try:
+                path = speech_cache_path(self.speech_dir, text, voice_id, SPEECH_RATE)
+                if not os.path.exists(path):
+                    engine.save_to_file(text, path + ".tmp")
+                    engine.runAndWait()
+                    os.replace(path + ".tmp", path)  # Only complete files ever appear under the cache name
+                result.set_result(path)
+            except Exception as e:
+                result.set_exception(e)
+
+    def handle(self, request):
+        """Answer one request dict, as sent over stdio or built from an HTTP query, with a response dict."""
+        op = request.get("op")
+        category = request.get("category") or None
+        try:
+            if op == "next_joke":
+                return {"joke": self.next_joke(category)}
+            if op == "get_jokes":
+                return {"jokes": self.get_jokes(int(request.get("n", 1)), category)}
+            if op == "categories":
+                return {"categories": self.categories.categories}
+            if op == "speech":
+                if not request.get("text"):
+                    return {"error": "bad request: speech needs text"}
+                try:
+                    return {"path": self.render_speech(str(request["text"]))}
+                except Exception as e:
+                    return {"error": f"speech unavailable: {e}"}
+            return {"error": f"unknown op {op!r}"}
+        except KeyError as e:
+            return {"error": e.args[0]}
+        except (TypeError, ValueError) as e:
+            return {"error": f"bad request: {e}"}
+
+# Paths served over HTTP and the service operation each one maps to
+HTTP_ROUTES = {
+    "/joke": "next_joke",
+    "/jokes": "get_jokes",
+    "/categories": "categories",
+    "/speech": "speech",
+}
+
+class JokeRequestHandler(BaseHTTPRequestHandler):
+    """Answer kiosk requests with JSON, or WAV audio for /speech, over keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are separate writes; don't wait for an ACK between them
+    service = None  # Set by serve_http
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        op = HTTP_ROUTES.get(url.path)
+        if op is None:
+            self.send_body(404, "application/json", b'{"error": "not found"}')
+            return
+
+        request = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        request["op"] = op
+        response = self.service.handle(request)
+        if "error" in response:
+            if response["error"].startswith("no jokes"):
+                status = 404
+            elif response["error"].startswith("speech unavailable"):
+                status = 503
+            else:
+                status = 400
+            self.send_body(status, "application/json", json.dumps(response).encode('utf-8'))
+        elif op == "speech":
+            with open(response["path"], 'rb') as f:
+                self.send_body(200, "audio/wav", f.read())
+        else:
+            self.send_body(200, "application/json", json.dumps(response).encode('utf-8'))
+
+    def send_body(self, status, content_type, body):
+        """Send a complete response with a length, so the connection can be reused."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Logging every request would cost more than answering it
+
+def serve_http(service, host, port):
+    """Serve the joke service over HTTP, one thread per connection, until interrupted."""
+    JokeRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), JokeRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving {len(service.jokes)} jokes on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def serve_stdio(service):
+    """Answer one JSON request per line on stdin with one JSON response per line on stdout."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"error": "request is not JSON"}
+        else:
+            response = service.handle(request) if isinstance(request, dict) else {"error": "request is not an object"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Alexa jokes without the GUI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stdio", action="store_true", help="answer JSON requests on stdin instead of HTTP")
+    args = parser.parse_args()
+
+    if args.stdio:
+        serve_stdio(JokeService())
+    else:
+        serve_http(JokeService(), args.host, args.port)
@@ -0,0 +1,60 @@
+# Tests for splitting joke lines and dealing jokes from the deck.
+
+# Import pytest for parametrised cases
+import pytest
+
+# Import the corpus helpers under test
+from joke_corpus import JokeCorpus, JokeDeck, split_joke
+
+@pytest.mark.parametrize("line, expected", [
+    ("Why did the chicken cross the road?To get to the other side.\n",
+     ("Why did the chicken cross the road?", "To get to the other side.")),
+    ("What do you call a fake noodle?! An impasta.", ("What do you call a fake noodle?!", "An impasta.")),
+    ("Q: What is brown and sticky? A: A stick.", ("What is brown and sticky?", "A stick.")),
+    ("I used to be a banker. But I lost interest.", ("I used to be a banker.", "But I lost interest.")),
+    ("Setup with a question? inside\tThe punchline\r\n", ("Setup with a question? inside", "The punchline")),
+    ("A compiled one-liner? with nothing after it\t\n", ("A compiled one-liner? with nothing after it", "")),
+    ("Just a one-liner with no punctuation", ("Just a one-liner with no punctuation", "")),
+])
+def test_split_joke(line, expected):
+    assert split_joke(line) == expected
+
+def test_corpus_reads_jokes_by_number(tmp_path):
+    path = tmp_path / "jokes.txt"
+    path.write_text("First joke?Yes.\n\n   \nSecond\tjoke\nThird one-liner", encoding="utf-8")
+    corpus = JokeCorpus(str(path), str(tmp_path / "cache" / "jokes.idx"))
+
+    assert len(corpus) == 3
+    assert corpus[1] == ("Second", "joke")
+    assert corpus[2] == ("Third one-liner", "")
+    with pytest.raises(IndexError):
+        corpus[3]
+
+def test_deck_deals_every_joke_once_then_reshuffles(tmp_path):
+    deck = JokeDeck(50, str(tmp_path / "deck.bin"))
+    assert sorted(deck.draw() for _ in range(50)) == list(range(50))
+    assert sorted(deck.draw() for _ in range(50)) == list(range(50))
+
+def test_peek_returns_the_cards_draw_deals_next(tmp_path):
+    deck = JokeDeck(20, str(tmp_path / "deck.bin"))
+    deck.draw()
+    upcoming = deck.peek(3)
+    assert deck.peek(5)[:3] == upcoming
+    assert [deck.draw() for _ in range(5)][:3] == upcoming
+
+def test_peek_stops_at_the_end_of_the_deck(tmp_path):
+    deck = JokeDeck(4, str(tmp_path / "deck.bin"))
+    for _ in range(3):
+        deck.draw()
+    assert len(deck.peek(3)) == 1
+
+def test_deck_position_survives_reopening(tmp_path):
+    path = str(tmp_path / "deck.bin")
+    deck = JokeDeck(30, path)
+    dealt = [deck.draw() for _ in range(10)]
+    upcoming = deck.peek(2)
+
+    reopened = JokeDeck(30, path)
+    assert reopened.peek(2) == upcoming
+    rest = [reopened.draw() for _ in range(20)]
+    assert sorted(dealt + rest) == list(range(30))
@@ -1,105 +1,120 @@
+# Import the time module to keep each batch of list updates within a frame
+import time
+
+# Import os and sys to find the folder of components shared between the apps
+import os
+import sys
+
+# Put the folder of components shared between the apps on the import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Shared"))
+
+# Import the startup profiler shared by all three apps, which times each phase from here on
+from startup_profile import mark_startup, report_after_first_paint, timed_build, profile_startup, startup_elapsed_ms
+
 # Import CustomTkinter for a modern and sleek GUI design
 import customtkinter
+mark_startup("import customtkinter")
 
 # Import tkinter as tk for additional GUI components
 import tkinter as tk
 
 # Import messagebox from tkinter to display pop-up messages
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
+mark_startup("import tkinter")
 
 # PIL is essential for handling images within the application
 from PIL import Image, ImageTk
+mark_startup("import PIL")
 
 # List is used for type hinting, ensuring our data structures are clear
 from typing import List
 
-# OS module assists in handling file paths and checking file existence
-import os
-
 # CSV module facilitates reading and writing student records
 import csv
 
 # Copy module enables creating deep copies of student data
 import copy
 
+# Math and itertools modules help average percentages exactly and take the first records of a sorted file
+import math
+import itertools
+
+# Import deque to hold the records still waiting to be added to the records view, and Counter to tally merged changes
+from collections import deque, Counter
+
+# Import operator to read the sort keys
+import operator
+
+# Import the student records storage, which keeps every coursework mark in one flat buffer
+from student_store import Student, CourseworkMarks, read_students, parse_student, MARK_SCALE
+
+# Import the roster events, which tell each view and summary exactly which students changed
+from student_store import RosterEvents, ROW_INSERTED, ROW_UPDATED, ROW_DELETED
+
+# Import the filter query engine for the records view
+from student_query import QueryCache, QueryError
+
+# Import the shared record text, remembered until each student changes
+from student_format import RecordFormatter
+
+# Import the group-by summaries for the cohort analysis screen
+from student_stats import DIMENSIONS, MEASURES, STATISTICS, RosterSummary, pivot, table_columns
+
+# Import the external sort for marks files too large to load
+from student_sort import sorted_rows
+
+# Import the marks file watcher and the change-set merge, to pick up edits made by other programs
+from student_watch import MarksFileWatcher
+from student_diff import apply_changes
+
+# Import the task scheduler, which runs slow work on a worker thread so the window keeps responding
+from student_tasks import TaskScheduler
+mark_startup("import standard library")
+
 customtkinter.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
 customtkinter.set_default_color_theme("A1 - Skills Portfolio\\Task 3 - Student Records\\Assets\\lavender.json")
+mark_startup("load theme")
 
-# Define the Student class to manage individual student data and grade calculations
-class Student:
-    def __init__(self, name: str, number: int, coursework_marks: List[float], exam_mark: float):
-        """
-        Initialize a new Student instance with the provided details.
-        
-        Args:
-            name (str): The student's name.
-            number (int): The student's unique identification number.
-            coursework_marks (List[float]): A list of coursework marks.
-            exam_mark (float): The exam mark.
-        """
-        self.name = name
-        self.number = number
-        self.coursework_marks = coursework_marks
-        self.total_coursework = sum(coursework_marks)
-        self.exam_mark = exam_mark
-        self.total_marks = self.total_coursework + self.exam_mark
-        self.percentage = (self.total_marks / 160) * 100
-        self.grade = self.calculate_grade()
-
-    def calculate_grade(self) -> str:
-        """Calculate the grade based on the student's percentage."""
-        if self.percentage >= 70:
-            return 'A'
-        elif 60 <= self.percentage < 70:
-            return 'B'
-        elif 50 <= self.percentage < 60:
-            return 'C'
-        elif 40 <= self.percentage < 50:
-            return 'D'
-        else:
-            return 'F'
-
-def load_students(file_path: str) -> List[Student]:
+def load_students(file_path: str, marks_store: CourseworkMarks) -> List[Student]:
     """
     Load students from the specified file and return a list of Student objects.
+
+    Runs on the worker thread, so a missing file is raised as FileNotFoundError for the window to show.
     """
-    students_list = []
     if not os.path.exists(file_path):
-        # Display an error label if the file does not exist
-        error_label = customtkinter.CTkLabel(
-            display_frame,
-            text=f"Error: The file {file_path} does not exist.",
-            justify="center",
-            font=('Montserrat', 14, 'bold'),
-            text_color="red"
-        )
-        error_label.pack(pady=20)
-        return students_list
-
-    # Open and read the CSV file containing student data
-    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            if len(row) < 4:
-                print(f"Skipping invalid row: {row}")
-                continue
-            try:
-                number = int(row[0].strip())
-                name = row[1].strip()
-                coursework_marks = [float(mark) for mark in row[2:-1]]
-                exam_mark = float(row[-1].strip())
-                # Create a Student object and add it to the list
-                student = Student(
-                    name=name,
-                    number=number,
-                    coursework_marks=coursework_marks,
-                    exam_mark=exam_mark
-                )
-                students_list.append(student)
-            except ValueError as ve:
-                print(f"Error parsing row {row}: {ve}")
-                continue
-    return students_list
+        raise FileNotFoundError(f"Error: The file {file_path} does not exist.")
+    return read_students(file_path, marks_store)
+
+def load_roster(task):
+    """
+    Load the students, copy them to restore on close and start watching the marks file, on the worker thread.
+    """
+    marks_store = CourseworkMarks(scale=MARK_SCALE if fixed_point_marks else None)  # Swapped in once loaded
+    loaded = load_students(file_path, marks_store)
+    originals = copy.deepcopy((marks_store, loaded))
+    return marks_store, loaded, originals, MarksFileWatcher(file_path), RosterSummary(loaded)
+
+def roster_loaded(result):
+    """
+    Use the loaded students and let the user start.
+    """
+    global coursework, original_coursework, original_students, marks_watcher, roster_summary, watch_job
+    coursework, loaded, (original_coursework, original_students), marks_watcher, roster_summary = result
+    students.extend(loaded)
+    roster_events.subscribe(roster_summary.changed)  # Before any view, so views read the updated summary
+    mark_startup("load student records")
+    if profile_startup:
+        print(f"Loaded student records {startup_elapsed_ms():.1f} ms after starting")
+    title_start.configure(state="normal", text="START")
+    watch_job = root.after(WATCH_INTERVAL_MS, check_marks_file)
+
+def roster_failed(error):
+    """
+    Show why the students could not be loaded, and let the user start with an empty roster.
+    """
+    if error is not None:
+        messagebox.showerror("Error", str(error))
+    title_start.configure(state="normal", text="START")
 
 def save_students(file_path: str, students_to_save: List[Student]):
     """
@@ -108,74 +123,246 @@ def save_students(file_path: str, students_to_save: List[Student]):
     Args:
         file_path (str): The path to the student marks file.
         students_to_save (List[Student]): The list of students to save.
+
+    Runs on the worker thread, so errors are raised for the window to show.
     """
-    try:
-        with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            for student in students_to_save:
-                row = [student.number, student.name] + student.coursework_marks + [student.exam_mark]
-                writer.writerow(row)
-    except Exception as e:
-        # Display an error message if saving fails
-        messagebox.showerror("Error", f"Failed to save students: {e}")
+    with open(file_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for student in students_to_save:
+            row = [student.number, student.name, *student.coursework_marks, student.exam_mark]
+            writer.writerow(row)
 
 def clear_display():
     """
     Clear the display area by removing all child widgets.
     """
+    global record_stream_job
+    if record_stream_job is not None:
+        root.after_cancel(record_stream_job)  # Stop adding records to a screen that is going away
+        record_stream_job = None
+    for name in SCREEN_TASKS:
+        task_scheduler.cancel(name)  # Its results would be shown on a screen that is going away
     for widget in display_frame.winfo_children():
         widget.forget()
 
-def view_all_records():
+def show_busy(text):
     """
-    Display all student records in a scrollable frame and calculate the average percentage.
+    Show what the worker is doing in the corner of the window, or hide the busy indicator when it is done.
     """
-    clear_display()
+    if text is None:
+        busy_bar.stop()
+        busy_frame.place_forget()
+        return
+    busy_label.configure(text=text)
+    if not busy_frame.winfo_manager():
+        busy_frame.place(relx=1.0, rely=1.0, x=-20, y=-20, anchor="se")
+        busy_frame.lift()
+        busy_bar.start()
+
+def stream_records(container, records_to_show: List[Student], summary: str = None):
+    """
+    Add record labels to a frame a frame's worth at a time between events, then the summary.
 
-    # Create a scrollable frame inside the display_frame
-    scrollable_frame = customtkinter.CTkScrollableFrame(display_frame)
-    scrollable_frame.pack(expand=True, fill="both", padx=20, pady=20)
-
-    total_percentage = 0
-    for student in students:
-        # Format coursework marks for display
-        coursework_details = ", ".join([f"{mark}" for mark in student.coursework_marks])
-        # Create a formatted record string
-        record = (
-            f"Name: {student.name}\n"
-            f"Number: {student.number}\n"
-            f"Coursework Marks: {coursework_details} (Total: {student.total_coursework})\n"
-            f"Exam Mark: {student.exam_mark}\n"
-            f"Overall Percentage: {student.percentage:.2f}%\n"
-            f"Grade: {student.grade}\n\n"
+    Args:
+        container: The frame to add the labels to.
+        records_to_show (List[Student]): The students to show, in order.
+        summary (str): Text shown after the last record, if any.
+    """
+    remaining = iter(records_to_show)
+
+    def add_batch():
+        global record_stream_job
+        deadline = time.perf_counter() + FRAME_BUDGET
+        for student in remaining:
+            record = record_formatter.record(student, spaced=True)
+            # Create and pack a label for each student's record
+            record_label = customtkinter.CTkLabel(
+                container,
+                text=record,
+                justify="left",
+                anchor="w",
+                font=('Poppins', 16),
+                text_color="white"
+            )
+            record_label.pack(fill="both", padx=20, pady=5)
+            if time.perf_counter() >= deadline:
+                record_stream_job = root.after(1, add_batch)  # Let the window redraw and respond before the next batch
+                return
+
+        record_stream_job = None
+        if summary is None:
+            return
+        summary_label = customtkinter.CTkLabel(
+            container,
+            text=summary,
+            justify="left",
+            anchor="w",
+            font=('Montserrat', 24, 'bold'),
+            text_color="white"
         )
-        # Create and pack a label for each student's record
-        record_label = customtkinter.CTkLabel(
-            scrollable_frame,
-            text=record,
+        summary_label.pack(fill="both", padx=20, pady=10)
+
+    add_batch()
+
+class RecordListView:
+    """
+    Every student's record with the roster summary, built once and then patched from roster events,
+    so editing one student relabels one row rather than rebuilding the whole list.
+    """
+
+    def __init__(self, parent):
+        self.frame = customtkinter.CTkScrollableFrame(parent)
+        self.labels = {}                 # Student -> their record label, once it has been added
+        self.pending = deque(students)   # Students still to be added, a batch at a time
+        self.summary_label = None        # Added after the last of the first records
+        self.add_batch()
+
+    def show(self):
+        """Show the list, as it is now, in the display area."""
+        self.frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+    def record_label(self, student: Student):
+        return customtkinter.CTkLabel(
+            self.frame,
+            text=record_formatter.record(student, spaced=True),
             justify="left",
             anchor="w",
             font=('Poppins', 16),
             text_color="white"
         )
-        record_label.pack(fill="both", padx=20, pady=5)
-        total_percentage += student.percentage
-
-    # Calculate and display the average percentage
-    average_percentage = total_percentage / len(students) if students else 0
-    summary = (
-        f"Total Students: {len(students)}\n"
-        f"Average Percentage: {average_percentage:.2f}%"
-    )
-    summary_label = customtkinter.CTkLabel(
-        scrollable_frame,
-        text=summary,
-        justify="left",
-        anchor="w",
-        font=('Montserrat', 24, 'bold'),
-        text_color="white"
+
+    def summary_text(self) -> str:
+        assessment_averages = ", ".join(f"{mean:.1f}" for mean in roster_summary.coursework_means())
+        return (
+            f"Total Students: {roster_summary.count}\n"
+            f"Average Percentage: {roster_summary.average_percentage:.2f}%\n"
+            f"Coursework Averages: {assessment_averages or 'None'}"
+        )
+
+    def add_batch(self):
+        """Add the next batch of records, then the summary once they are all shown."""
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while self.pending and time.perf_counter() < deadline:
+            student = self.pending.popleft()
+            self.labels[student] = self.record_label(student)
+            self.labels[student].pack(fill="both", padx=20, pady=5)
+        if self.pending:
+            root.after(1, self.add_batch)  # Let the window redraw and respond before the next batch
+            return
+        self.summary_label = customtkinter.CTkLabel(
+            self.frame,
+            text=self.summary_text(),
+            justify="left",
+            anchor="w",
+            font=('Montserrat', 24, 'bold'),
+            text_color="white"
+        )
+        self.summary_label.pack(fill="both", padx=20, pady=10)
+
+    def changed(self, event: str, student: Student):
+        """Add, relabel or remove one student's record and refresh the summary, which has already seen the event."""
+        if event == ROW_INSERTED:
+            if self.summary_label is None:
+                self.pending.append(student)  # Still adding the first records; it joins the end of the queue
+            else:
+                self.labels[student] = self.record_label(student)
+                self.labels[student].pack(fill="both", padx=20, pady=5, before=self.summary_label)
+        elif event == ROW_UPDATED and student in self.labels:
+            self.labels[student].configure(text=record_formatter.record(student, spaced=True))
+        elif event == ROW_DELETED:
+            if student in self.labels:
+                self.labels.pop(student).destroy()
+            elif student in self.pending:
+                self.pending.remove(student)
+        if self.summary_label is not None:
+            self.summary_label.configure(text=self.summary_text())
+
+def view_all_records(query_text: str = ""):
+    """
+    Display all student records, or those matching a filter query, in a scrollable frame with their average percentage.
+
+    Args:
+        query_text (str): A filter such as "grade in (A, B) and exam_mark > 60"; empty shows everyone.
+    """
+    clear_display()
+
+    def show_everyone():
+        """
+        Show every record: the same list each time, kept up to date by roster events.
+        """
+        global all_records_view
+        if all_records_view is None:
+            all_records_view = RecordListView(display_frame)
+            roster_events.subscribe(all_records_view.changed)
+        all_records_view.show()
+
+    def show_matching(matching: List[Student]):
+        """
+        Show the records a query matched, found on the worker thread.
+        """
+        # Create a scrollable frame inside the display_frame
+        scrollable_frame = customtkinter.CTkScrollableFrame(display_frame)
+        scrollable_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+        # Calculate the average percentage of the students shown
+        average_percentage = math.fsum(student.percentage for student in matching) / len(matching) if matching else 0
+        summary = (
+            f"Matching Students: {len(matching)} of {len(students)}\n"
+            f"Average Percentage: {average_percentage:.2f}%"
+        )
+        stream_records(scrollable_frame, matching, summary)
+
+    def query_failed(error):
+        # Display query errors and fall back to showing everyone
+        messagebox.showerror("Query Error" if isinstance(error, QueryError) else "Error", str(error))
+        show_everyone()
+
+    # Create a frame for the filter query
+    filter_frame = customtkinter.CTkFrame(display_frame)
+    filter_frame.pack(pady=(20, 0))
+
+    query_entry = customtkinter.CTkEntry(
+        filter_frame,
+        font=('Montserrat', 16),
+        width=700,
+        placeholder_text="Filter, e.g. grade in (A, B) and exam_mark > 60 and coursework[2] < 10"
+    )
+    query_entry.pack(side="left", padx=(10, 20))
+    if query_text:
+        query_entry.insert(0, query_text)
+    query_entry.bind("<Return>", lambda event: view_all_records(query_entry.get()))
+
+    # Buttons to apply or clear the filter
+    filter_button = customtkinter.CTkButton(
+        filter_frame,
+        text="Filter",
+        width=150,
+        height=40,
+        font=('Montserrat', 16, 'bold'),
+        command=lambda: view_all_records(query_entry.get())
+    )
+    filter_button.pack(side="left", padx=(0, 10))
+    clear_button = customtkinter.CTkButton(
+        filter_frame,
+        text="Show All",
+        width=150,
+        height=40,
+        font=('Montserrat', 16, 'bold'),
+        command=view_all_records
     )
-    summary_label.pack(fill="both", padx=20, pady=10)
+    clear_button.pack(side="left")
+
+    if query_text.strip():
+        # Filter on the worker thread; a new filter replaces one still running
+        task_scheduler.submit(
+            "filter",
+            lambda task: record_queries.run(query_text, students),
+            on_done=show_matching,
+            on_error=query_failed,
+            label="Filtering records"
+        )
+    else:
+        show_everyone()
 
 def view_individual_record():
     """
@@ -191,15 +378,7 @@ def view_individual_record():
         student = next((s for s in students if s.name == name), None)
         if student:
             clear_display()
-            coursework_details = ", ".join([f"{mark}" for mark in student.coursework_marks])
-            record = (
-                f"Name: {student.name}\n"
-                f"Number: {student.number}\n"
-                f"Coursework Marks: {coursework_details} (Total: {student.total_coursework})\n"
-                f"Exam Mark: {student.exam_mark}\n"
-                f"Overall Percentage: {student.percentage:.2f}%\n"
-                f"Grade: {student.grade}\n"
-            )
+            record = record_formatter.record(student)
             # Create and pack a label for the selected student's record
             record_label = customtkinter.CTkLabel(
                 display_frame, 
@@ -265,81 +444,59 @@ def show_highest_score():
     """
     Display the student with the highest total marks.
     """
-    clear_display()
-    if not students:
-        # Display a message if no student data is available
-        no_data_label = customtkinter.CTkLabel(
-            display_frame, 
-            text="No student data available.", 
-            justify="center", 
-            text_color="red", 
-            font=('Montserrat', 14, 'bold')
-        )
-        no_data_label.pack(pady=20)
-        return
-    # Find the student with the highest total marks
-    highest_student = max(students, key=lambda s: s.total_marks)
-
-    coursework_details = ", ".join([f"{mark}" for mark in highest_student.coursework_marks])
-    record = (
-        f"Name: {highest_student.name}\n"
-        f"Number: {highest_student.number}\n"
-        f"Coursework Marks: {coursework_details} (Total: {highest_student.total_coursework})\n"
-        f"Exam Mark: {highest_student.exam_mark}\n"
-        f"Overall Percentage: {highest_student.percentage:.2f}%\n"
-        f"Grade: {highest_student.grade}\n"
-    )
-
-    # Create and pack a label for the highest scoring student
-    record_label = customtkinter.CTkLabel(
-        display_frame, 
-        text=record, 
-        justify="left", 
-        anchor="w", 
-        font=('Poppins', 16),
-        text_color="white"
-    )
-    record_label.pack(pady=20, padx=20)
+    show_score_extreme(highest=True)
 
 def show_lowest_score():
     """
     Display the student with the lowest total marks.
     """
+    show_score_extreme(highest=False)
+
+def show_score_extreme(highest: bool):
+    """
+    Find the student with the highest or lowest total marks on the worker thread, then display their record.
+
+    Args:
+        highest (bool): Whether to show the highest total rather than the lowest.
+    """
     clear_display()
-    if not students:
-        # Display a message if no student data is available
-        no_data_label = customtkinter.CTkLabel(
+
+    def show_student(student):
+        if student is None:
+            # Display a message if no student data is available
+            no_data_label = customtkinter.CTkLabel(
+                display_frame, 
+                text="No student data available.", 
+                justify="center", 
+                text_color="red", 
+                font=('Montserrat', 14, 'bold')
+            )
+            no_data_label.pack(pady=20)
+            return
+
+        record = record_formatter.record(student)
+
+        # Create and pack a label for the highest or lowest scoring student
+        record_label = customtkinter.CTkLabel(
             display_frame, 
-            text="No student data available.", 
-            justify="center", 
-            text_color="red", 
-            font=('Montserrat', 14, 'bold')
+            text=record, 
+            justify="left", 
+            anchor="w", 
+            font=('Poppins', 16),
+            text_color="white"
         )
-        no_data_label.pack(pady=20)
+        record_label.pack(pady=20, padx=20)
+
+    if not students:
+        show_student(None)
         return
-    # Find the student with the lowest total marks
-    lowest_student = min(students, key=lambda s: s.total_marks)
-
-    coursework_details = ", ".join([f"{mark}" for mark in lowest_student.coursework_marks])
-    record = (
-        f"Name: {lowest_student.name}\n"
-        f"Number: {lowest_student.number}\n"
-        f"Coursework Marks: {coursework_details} (Total: {lowest_student.total_coursework})\n"
-        f"Exam Mark: {lowest_student.exam_mark}\n"
-        f"Overall Percentage: {lowest_student.percentage:.2f}%\n"
-        f"Grade: {lowest_student.grade}\n"
-    )
-
-    # Create and pack a label for the lowest scoring student
-    record_label = customtkinter.CTkLabel(
-        display_frame, 
-        text=record, 
-        justify="left", 
-        anchor="w", 
-        font=('Poppins', 16),
-        text_color="white"
+    # Read from the snapshot's sorted totals, which are built once and then patched as the roster changes
+    task_scheduler.submit(
+        "stats",
+        lambda task: record_queries.snapshot(students).extreme("total_marks", highest),
+        on_done=show_student,
+        label="Finding the highest score" if highest else "Finding the lowest score"
     )
-    record_label.pack(pady=20, padx=20)
 
 def sort_student_records():
     """
@@ -357,16 +514,22 @@ def sort_student_records():
 
         # Determine the sorting key
         if key == "Name":
-            sorted_students = sorted(students, key=lambda s: s.name, reverse=reverse)
+            sort_key = operator.attrgetter('name')
         elif key == "Number":
-            sorted_students = sorted(students, key=lambda s: s.number, reverse=reverse)
+            sort_key = operator.attrgetter('number')
         elif key == "Total Marks":
-            sorted_students = sorted(students, key=lambda s: s.total_marks, reverse=reverse)
+            sort_key = operator.attrgetter('total_marks')
         else:
-            sorted_students = students
-
-        # Display the sorted records
-        display_sorted_records(sorted_students)
+            display_sorted_records(students)
+            return
+
+        # Sort on the worker thread; a new sort replaces one still running
+        task_scheduler.submit(
+            "sort",
+            lambda task: sorted(students, key=sort_key, reverse=reverse),
+            on_done=display_sorted_records,
+            label=f"Sorting by {key.lower()}"
+        )
 
     def display_sorted_records(sorted_students: List[Student]):
         """
@@ -378,27 +541,55 @@ def sort_student_records():
         clear_display()
         scrollable_frame = customtkinter.CTkScrollableFrame(display_frame)
         scrollable_frame.pack(expand=True, fill="both", padx=20, pady=20)
+        stream_records(scrollable_frame, sorted_students)
 
-        for student in sorted_students:
-            coursework_details = ", ".join([f"{mark}" for mark in student.coursework_marks])
-            record = (
-                f"Name: {student.name}\n"
-                f"Number: {student.number}\n"
-                f"Coursework Marks: {coursework_details} (Total: {student.total_coursework})\n"
-                f"Exam Mark: {student.exam_mark}\n"
-                f"Overall Percentage: {student.percentage:.2f}%\n"
-                f"Grade: {student.grade}\n\n"
-            )
-            # Create and pack a label for each sorted student's record
-            record_label = customtkinter.CTkLabel(
-                scrollable_frame,
-                text=record,
-                justify="left",
-                anchor="w",
-                font=('Poppins', 16),
-                text_color="white"
-            )
-            record_label.pack(fill="both", padx=20, pady=5)
+    def sorted_file_students(task, path: str, key: str, reverse: bool) -> List[Student]:
+        """
+        Return the first students of a marks file in sorted order, without loading the whole file. Runs on the worker thread.
+        """
+        rows = sorted_rows(path, key, reverse, SORT_MEMORY_BUDGET,
+                           progress=lambda count: task.progress(f"{count:,} rows sorted"))
+        first_students = []
+        marks_store = CourseworkMarks(scale=coursework.scale)  # Kept apart from the roster being edited
+        try:
+            for row in itertools.islice(rows, SORTED_FILE_PREVIEW):
+                try:
+                    first_students.append(parse_student(row, marks_store))
+                except ValueError as ve:
+                    print(f"Error parsing row {row}: {ve}")
+        finally:
+            rows.close()  # Remove the run files even when the file has more rows than are shown
+        return first_students
+
+    def sort_file():
+        """
+        Sort a marks file chosen by the user on disk and show its first records.
+        """
+        path = filedialog.askopenfilename(filetypes=[("Student marks", "*.txt *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        key = sort_key_var.get().lower().replace(" ", "_")
+        reverse = sort_order_var.get() == "Descending"
+        summary = (
+            f"{os.path.basename(path)} sorted by {sort_key_var.get()}, {sort_order_var.get().lower()}\n"
+            f"Showing up to the first {SORTED_FILE_PREVIEW} records"
+        )
+
+        def display_sorted_file(first_students: List[Student]):
+            clear_display()
+            scrollable_frame = customtkinter.CTkScrollableFrame(display_frame)
+            scrollable_frame.pack(expand=True, fill="both", padx=20, pady=20)
+            stream_records(scrollable_frame, first_students, summary)
+
+        # Sort on the worker thread, sharing a name with in-memory sorts so a new sort of either kind replaces it
+        task_scheduler.submit(
+            "sort",
+            sorted_file_students,
+            path, key, reverse,
+            on_done=display_sorted_file,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to sort {path}: {e}"),
+            label=f"Sorting {os.path.basename(path)}"
+        )
 
     # Create a frame for sort options
     sort_frame = customtkinter.CTkFrame(display_frame)
@@ -455,6 +646,17 @@ def sort_student_records():
     )
     sort_button.pack(side="left")
 
+    # Button to sort a marks file too large to load, such as an archive roster
+    sort_file_button = customtkinter.CTkButton(
+        sort_frame,
+        text="Sort File...",
+        width=200,
+        height=50,
+        font=('Montserrat', 16),
+        command=sort_file
+    )
+    sort_file_button.pack(side="left", padx=(20, 0))
+
 def add_student_record():
     """
     Provide a form to add a new student record.
@@ -484,9 +686,11 @@ def add_student_record():
                 name=name,
                 number=number,
                 coursework_marks=coursework_marks,
-                exam_mark=exam_mark
+                exam_mark=exam_mark,
+                marks_store=coursework
             )
             students.append(new_student)
+            roster_events.emit(ROW_INSERTED, new_student)
             # Inform the user of success
             messagebox.showinfo("Success", "Student record added successfully.")
             view_all_records()
@@ -553,6 +757,8 @@ def delete_student_record():
             confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {student.name}'s record?")
             if confirm:
                 students.remove(student)
+                student.coursework_marks = []  # Free the student's marks so they drop out of the averages
+                roster_events.emit(ROW_DELETED, student)
                 messagebox.showinfo("Deleted", f"{student.name}'s record has been deleted.")
                 view_all_records()
         else:
@@ -657,15 +863,11 @@ def update_student_record():
                 if not coursework_marks:
                     raise ValueError("At least one coursework mark is required.")
 
-                # Update the student's information
+                # Update the student's information, marks first as fixed-point mode may reject them
+                student.set_marks(coursework_marks, exam_mark)
                 student.name = new_name
                 student.number = new_number
-                student.coursework_marks = coursework_marks
-                student.total_coursework = sum(coursework_marks)
-                student.exam_mark = exam_mark
-                student.total_marks = student.total_coursework + student.exam_mark
-                student.percentage = (student.total_marks / 160) * 100
-                student.grade = student.calculate_grade()
+                roster_events.emit(ROW_UPDATED, student)
 
                 # Inform the user of success and refresh the records view
                 messagebox.showinfo("Success", "Student record updated successfully.")
@@ -769,9 +971,145 @@ def update_student_record():
     )
     update_select_button.pack(side="left")
 
+def cohort_analysis():
+    """
+    Summarise the students by one grouping, optionally crossed with a second, and export the summary.
+    """
+    clear_display()
+    pivot_table = None
+    results_frame = None
+
+    def option_name(name: str) -> str:
+        return name.replace("_", " ").title()
+
+    def option_key(label: str, names: List[str]):
+        return next((name for name in names if option_name(name) == label), None)
+
+    def show_pivot():
+        """
+        Summarise the roster by the selected groupings on the worker thread, then show the selected statistic.
+        """
+        rows = option_key(rows_var.get(), list(DIMENSIONS))
+        cross = option_key(columns_var.get(), list(DIMENSIONS))
+        measure = option_key(measure_var.get(), MEASURES)
+        # Summarised on a worker thread rather than in worker processes, which would re-run this script
+        task_scheduler.submit(
+            "pivot",
+            lambda task: pivot(table_columns(record_queries.snapshot(students)), rows, cross, measure),
+            on_done=pivot_ready,
+            label="Summarising"
+        )
+
+    def pivot_ready(table):
+        nonlocal pivot_table
+        pivot_table = table
+        display_pivot()
+
+    def display_pivot(*args):
+        """
+        Show one statistic of every group as a grid, with totals.
+        """
+        nonlocal results_frame
+        if pivot_table is None:
+            return
+        if results_frame is not None:
+            results_frame.destroy()
+        results_frame = customtkinter.CTkScrollableFrame(display_frame)
+        results_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+        statistic = option_key(statistic_var.get(), STATISTICS)
+        headers = [pivot_table.column_label(column) for column in pivot_table.column_keys]
+        lines = [
+            (pivot_table.row_label(row), [pivot_table.cells.get((row, column)) for column in pivot_table.column_keys], pivot_table.row_totals[row])
+            for row in pivot_table.row_keys
+        ]
+        lines.append(("Total", [pivot_table.column_totals[column] for column in pivot_table.column_keys], pivot_table.total))
+
+        # Header row, then one row per group and the totals
+        for column_index, header in enumerate(["", *headers, "Total"]):
+            header_label = customtkinter.CTkLabel(results_frame, text=header, font=('Montserrat', 16, 'bold'), text_color="white")
+            header_label.grid(row=0, column=column_index, padx=15, pady=5)
+        for row_index, (label, cells, total) in enumerate(lines, start=1):
+            row_label = customtkinter.CTkLabel(results_frame, text=label, font=('Montserrat', 16, 'bold'), text_color="white")
+            row_label.grid(row=row_index, column=0, padx=15, pady=5, sticky="w")
+            for column_index, cell in enumerate([*cells, total], start=1):
+                cell_label = customtkinter.CTkLabel(
+                    results_frame,
+                    text=cell.format(statistic) if cell is not None else "",
+                    font=('Poppins', 16),
+                    text_color="white"
+                )
+                cell_label.grid(row=row_index, column=column_index, padx=15, pady=5)
+
+    def export_pivot():
+        """
+        Save every statistic of the summary to a CSV file chosen by the user.
+        """
+        if pivot_table is None:
+            messagebox.showerror("Error", "Show a summary before exporting it.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not path:
+            return
+        try:
+            pivot_table.write_csv(path)
+            messagebox.showinfo("Exported", f"Summary saved to {path}.")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export summary: {e}")
+
+    # Create a frame for the summary options
+    options_frame = customtkinter.CTkFrame(display_frame)
+    options_frame.pack(pady=(20, 0))
+
+    # Dropdown menus for the groupings, the measure summarised and the statistic shown
+    rows_var = tk.StringVar(value=option_name("grade"))
+    columns_var = tk.StringVar(value="None")
+    measure_var = tk.StringVar(value=option_name("percentage"))
+    statistic_var = tk.StringVar(value=option_name("mean"))
+    menus = [
+        ("Group by:", rows_var, [option_name(name) for name in DIMENSIONS], None),
+        ("Across:", columns_var, ["None", *(option_name(name) for name in DIMENSIONS)], None),
+        ("Measure:", measure_var, [option_name(name) for name in MEASURES], None),
+        ("Show:", statistic_var, [option_name(name) for name in STATISTICS], display_pivot),
+    ]
+    for text, variable, values, command in menus:
+        menu_label = customtkinter.CTkLabel(options_frame, text=text, font=('Montserrat', 18), text_color="white")
+        menu_label.pack(side="left", padx=(10, 5))
+        menu = customtkinter.CTkOptionMenu(
+            options_frame,
+            values=values,
+            variable=variable,
+            font=('Montserrat', 16),
+            width=170,
+            command=command
+        )
+        menu.pack(side="left", padx=(0, 10))
+
+    # Buttons to calculate and export the summary
+    show_button = customtkinter.CTkButton(
+        options_frame,
+        text="Summarise",
+        width=150,
+        height=40,
+        font=('Montserrat', 16, 'bold'),
+        command=show_pivot
+    )
+    show_button.pack(side="left", padx=(10, 10))
+    export_button = customtkinter.CTkButton(
+        options_frame,
+        text="Export CSV",
+        width=150,
+        height=40,
+        font=('Montserrat', 16, 'bold'),
+        command=export_pivot
+    )
+    export_button.pack(side="left")
+
+    show_pivot()
+
 def main_menu_additions():
     """
-    Add additional buttons to the main menu for sorting, adding, deleting, and updating records.
+    Add additional buttons to the main menu for sorting, adding, deleting, updating and analysing records.
     """
     # Create a new frame for additional buttons below the existing button_frame
     additional_button_frame = customtkinter.CTkFrame(main_frame)
@@ -825,18 +1163,109 @@ def main_menu_additions():
     )
     update_button.pack(side="left", padx=(10,0))
 
+    # Frame and button for summarising the students by group
+    analysis_button_frame = customtkinter.CTkFrame(main_frame)
+    analysis_button_frame.pack(anchor="n", pady=(0, 10))
+
+    analysis_button = customtkinter.CTkButton(
+        analysis_button_frame,
+        text="Cohort Analysis",
+        width=300,
+        height=50,
+        font=('Montserrat', 18, 'bold'),
+        text_color="white",
+        command=cohort_analysis
+    )
+    analysis_button.pack()
+
+def poll_marks_file(task):
+    """
+    Read the rows other programs changed in the marks file, on the worker thread.
+    """
+    changes = marks_watcher.poll()
+    # Keep the changes when the original records are restored on close; only the worker touches the originals
+    apply_changes(original_students, changes, original_coursework)
+    return changes
+
+def check_marks_file():
+    """
+    Look for changes to the marks file on the worker thread, then merge them in.
+    """
+    if not closing:
+        task_scheduler.submit("watch", poll_marks_file, on_done=merge_marks_changes, on_error=marks_check_failed)
+
+def marks_check_failed(error):
+    """
+    Report a failed check of the marks file and try again shortly.
+    """
+    global watch_job
+    print(f"Could not check {file_path}: {error}")
+    watch_job = root.after(WATCH_INTERVAL_MS, check_marks_file)
+
+def merge_marks_changes(changes, start: int = 0, counts: Counter = None):
+    """
+    Merge the changes into the roster a slice at a time between events, then check the file again shortly.
+    """
+    global watch_job
+    counts = counts if counts is not None else Counter()
+    counts.update(apply_changes(students, changes[start:start + WATCH_BATCH], coursework, roster_events))
+    if start + WATCH_BATCH < len(changes):
+        watch_job = root.after(1, merge_marks_changes, changes, start + WATCH_BATCH, counts)
+        return
+    if counts:
+        print(f"Reloaded {file_path}: " + ", ".join(f"{count} {operation}" for operation, count in counts.items()))
+    watch_job = root.after(WATCH_INTERVAL_MS, check_marks_file)
+
+def restore_marks_file(task):
+    """
+    Save the original student records over the marks file, on the worker thread.
+    """
+    # Keep any changes other programs made since the last check
+    apply_changes(original_students, marks_watcher.poll(), original_coursework)
+    marks_watcher.close()
+    save_students(file_path, original_students)
+
 def on_close():
     """
     Restore the original student records upon closing the application.
     """
-    try:
-        save_students(file_path, original_students)
-    except Exception as e:
-        # Display an error message if restoration fails
-        messagebox.showerror("Error", f"Failed to restore original records: {e}")
-    finally:
-        # Destroy the main window to close the application
-        root.destroy()
+    global closing
+    if closing:
+        return  # Already saving
+    closing = True
+    if watch_job is not None:
+        root.after_cancel(watch_job)
+    task_scheduler.cancel_all()  # Stop any sort, filter or summary, and loading if it has not finished
+    busy_cancel.pack_forget()  # Saving the records cannot be cancelled
+    if marks_watcher is None:
+        finish_close()  # Nothing was loaded, so there is nothing to restore
+        return
+    task_scheduler.submit(
+        "save",
+        restore_marks_file,
+        on_done=lambda result: finish_close(),
+        on_error=restore_failed,
+        on_cancel=finish_close,  # Closing was already asked for, so never leave the window stuck open
+        label="Saving student records"
+    )
+
+def restore_failed(error):
+    """
+    Tell the user the original records could not be restored, then close anyway.
+    """
+    # Display an error message if restoration fails
+    messagebox.showerror("Error", f"Failed to restore original records: {error}")
+    finish_close()
+
+def finish_close():
+    """
+    Close the window once the original records have been restored.
+    """
+    if report_record_cache:
+        print(f"Record text cache: {record_formatter.stats()}")
+    task_scheduler.shutdown()
+    # Destroy the main window to close the application
+    root.destroy()
 
 # Define the path to the student marks file
 file_path = os.path.join(
@@ -846,17 +1275,71 @@ file_path = os.path.join(
     "studentMarks.txt"
 )
 
-# Load students from the specified file
-students: List[Student] = load_students(file_path)
+# Marks are floats unless run with --fixed-point, which stores exact tenths of a mark as integers
+fixed_point_marks = "--fixed-point" in sys.argv
+
+# Students are loaded on the worker thread once the window is up, with all of their coursework marks in
+# one shared buffer; roster_loaded fills these in
+coursework = CourseworkMarks(scale=MARK_SCALE if fixed_point_marks else None)
+students: List[Student] = []
+roster_summary = RosterSummary(students)
+
+# A deep copy of the original students, with their own marks buffer, to restore on close
+original_coursework, original_students = None, []
+
+# Watch the marks file so changes other programs make to it are merged in rather than overwritten on close
+marks_watcher = None
+WATCH_INTERVAL_MS = 500
+WATCH_BATCH = 50  # Changes merged into the roster between events
+watch_job = None  # Pending after() callback for the next check or slice of changes
+closing = False
+
+# Record text is built once per student version and reused on every screen
+record_formatter = RecordFormatter()
+report_record_cache = "--record-cache-stats" in sys.argv
 
-# Create a deep copy of the original students to restore later if needed
-original_students = copy.deepcopy(students)
+# Roster events tell the query snapshot and the records view which students changed, so only those are redone
+roster_events = RosterEvents()
+record_queries = QueryCache()
+roster_events.subscribe(record_queries.changed)
+all_records_view = None  # Built the first time every record is shown
+
+# Seconds of each 16 ms frame spent adding records to a view, leaving the rest for drawing and input
+FRAME_BUDGET = 0.012
+record_stream_job = None  # Pending after() callback while records are still being added
+
+# Tasks whose results belong to the screen they were started from, cancelled when it is cleared
+SCREEN_TASKS = ("filter", "sort", "pivot", "stats")
+
+# Memory for rows held while sorting a marks file on disk, and how many of its sorted records to show
+SORT_MEMORY_BUDGET = 64 * 1024 * 1024
+SORTED_FILE_PREVIEW = 500
 
 # Initialize the main application window with CustomTkinter
 root = customtkinter.CTk(fg_color="black")
 root.geometry("1366x768")  # Set the window size
 root.resizable(False, False)  # Make the window non-resizable
 root.title("Student Records")  # Set the window title
+mark_startup("create window")
+
+# Busy indicator shown in the corner while slow work runs on the worker thread
+busy_frame = customtkinter.CTkFrame(root)
+busy_label = customtkinter.CTkLabel(busy_frame, text="", font=('Montserrat', 14), text_color="white")
+busy_label.pack(side="left", padx=10, pady=5)
+busy_bar = customtkinter.CTkProgressBar(busy_frame, mode="indeterminate", width=120)
+busy_bar.pack(side="left", padx=(0, 10))
+busy_cancel = customtkinter.CTkButton(
+    busy_frame,
+    text="Cancel",
+    width=80,
+    height=28,
+    font=('Montserrat', 14, 'bold'),
+    command=lambda: task_scheduler.cancel_all()
+)
+busy_cancel.pack(side="left", padx=(0, 10), pady=5)
+
+# Slow work runs here, with results handed back to the window between events
+task_scheduler = TaskScheduler(root, on_busy=show_busy)
 
 # Create the title frame which displays the application title and start button
 title_frame = customtkinter.CTkFrame(root)
@@ -886,96 +1369,136 @@ background_label.place(x=0, y=0, relwidth=1, relheight=1)  # Stretch the image t
 # Start button to transition from the title frame to the main frame
 title_start = customtkinter.CTkButton(
     title_frame,
-    text="START",
+    text="LOADING",
     width=200,
     height=100,
     font=('Montserrat', 32, 'bold'),
     text_color="white",
-    command=lambda: [title_frame.forget(), main_frame.pack(expand=True, fill="both")]
+    state="disabled",  # Enabled once the students have loaded
+    command=lambda: [title_frame.forget(), show_main_screen()]
 )
 title_start.pack(anchor="center", side="bottom", pady=(0,50))
 title_frame.pack(expand=True, fill="both")  # Display the title frame initially
+mark_startup("build title screen")
 
-# Label for the main frame header
-main_header = customtkinter.CTkLabel(
-    main_frame,
-    text="Student Manager",
-    font=('Montserrat', 38, 'bold'),
-    text_color="white"
-) 
-main_header.pack(pady=(10,5))
-
-# Frame to hold the existing and additional buttons
-button_frame = customtkinter.CTkFrame(main_frame)
-button_frame.pack(anchor="n", pady=(10))
-
-# Button to view all student records
-view_all = customtkinter.CTkButton(
-    button_frame,
-    text="View All Student Records",
-    width=300,
-    height=50,
-    font=('Montserrat', 18, 'bold'),
-    text_color="white",
-    command=view_all_records
-)
-view_all.pack(side="left", padx=(0, 10))
-
-# Button to view an individual student's record
-view_individual = customtkinter.CTkButton(
-    button_frame,
-    text="View Individual Record",
-    width=300,
-    height=50,
-    font=('Montserrat', 18, 'bold'),
-    text_color="white",
-    command=view_individual_record
-)
-view_individual.pack(side="left", padx=10)
-
-# Button to show the highest scoring student
-show_highest = customtkinter.CTkButton(
-    button_frame,
-    text="Show Highest Score",
-    width=300,
-    height=50,
-    font=('Montserrat', 18, 'bold'),
-    text_color="white",
-    command=show_highest_score
-)
-show_highest.pack(side="left", padx=10)
-
-# Button to show the lowest scoring student
-show_lowest = customtkinter.CTkButton(
-    button_frame,
-    text="Show Lowest Score",
-    width=300,
-    height=50,
-    font=('Montserrat', 18, 'bold'),
-    text_color="white",
-    command=show_lowest_score
-)
-show_lowest.pack(side="left", padx=(10, 0))
-
-# Add new menu options (Sort, Add, Delete, Update) to the main menu
-main_menu_additions()
-
-# Frame where the records and other dynamic content will be displayed
-display_frame = customtkinter.CTkFrame(main_frame)
-display_frame.pack(expand=True, fill="both", padx=20, pady=20)
-
-# Initialize display_frame with a welcome message
-welcome_label = customtkinter.CTkLabel(
-    display_frame,
-    text="Welcome to the Student Records Manager!\nPlease select an option above to proceed.",
-    justify="center",
-    font=('Montserrat', 32),
-    text_color="white"
-)
-welcome_label.pack(expand=True)
+# The main menu is only built when START is first pressed (set to False to build it up front)
+lazy_screens = True
+main_screen_built = False
+
+
+def build_main_screen():
+    """
+    Create the main menu, its buttons and the display area.
+    """
+    global display_frame
+
+    # Label for the main frame header
+    main_header = customtkinter.CTkLabel(
+        main_frame,
+        text="Student Manager",
+        font=('Montserrat', 38, 'bold'),
+        text_color="white"
+    ) 
+    main_header.pack(pady=(10,5))
+
+    # Frame to hold the existing and additional buttons
+    button_frame = customtkinter.CTkFrame(main_frame)
+    button_frame.pack(anchor="n", pady=(10))
+
+    # Button to view all student records
+    view_all = customtkinter.CTkButton(
+        button_frame,
+        text="View All Student Records",
+        width=300,
+        height=50,
+        font=('Montserrat', 18, 'bold'),
+        text_color="white",
+        command=view_all_records
+    )
+    view_all.pack(side="left", padx=(0, 10))
+
+    # Button to view an individual student's record
+    view_individual = customtkinter.CTkButton(
+        button_frame,
+        text="View Individual Record",
+        width=300,
+        height=50,
+        font=('Montserrat', 18, 'bold'),
+        text_color="white",
+        command=view_individual_record
+    )
+    view_individual.pack(side="left", padx=10)
+
+    # Button to show the highest scoring student
+    show_highest = customtkinter.CTkButton(
+        button_frame,
+        text="Show Highest Score",
+        width=300,
+        height=50,
+        font=('Montserrat', 18, 'bold'),
+        text_color="white",
+        command=show_highest_score
+    )
+    show_highest.pack(side="left", padx=10)
+
+    # Button to show the lowest scoring student
+    show_lowest = customtkinter.CTkButton(
+        button_frame,
+        text="Show Lowest Score",
+        width=300,
+        height=50,
+        font=('Montserrat', 18, 'bold'),
+        text_color="white",
+        command=show_lowest_score
+    )
+    show_lowest.pack(side="left", padx=(10, 0))
+
+    # Add new menu options (Sort, Add, Delete, Update) to the main menu
+    main_menu_additions()
+
+    # Frame where the records and other dynamic content will be displayed
+    display_frame = customtkinter.CTkFrame(main_frame)
+    display_frame.pack(expand=True, fill="both", padx=20, pady=20)
+
+    # Initialize display_frame with a welcome message
+    welcome_label = customtkinter.CTkLabel(
+        display_frame,
+        text="Welcome to the Student Records Manager!\nPlease select an option above to proceed.",
+        justify="center",
+        font=('Montserrat', 32),
+        text_color="white"
+    )
+    welcome_label.pack(expand=True)
+
+def show_main_screen():
+    """
+    Show the main menu, building it first if this is the first visit.
+    """
+    global main_screen_built
+    if not main_screen_built:
+        main_screen_built = True
+        timed_build(build_main_screen)
+    main_frame.pack(expand=True, fill="both")
+
+if not lazy_screens:
+    show_main_screen()
+    main_frame.forget()  # Built but hidden until START is pressed
 
 # Set the protocol for window close to restore original records
 root.protocol("WM_DELETE_WINDOW", on_close)
 
+# Report startup timings once the window has been mapped and first drawn
+report_after_first_paint(root)
+
+# Load the students on the worker thread, then start watching the marks file for changes made by other programs
+task_scheduler.submit(
+    "load",
+    load_roster,
+    on_done=roster_loaded,
+    on_error=roster_failed,
+    on_cancel=lambda: roster_failed(None),
+    label="Loading student records"
+)
+
 # Start the main event loop
 root.mainloop()
\ No newline at end of file
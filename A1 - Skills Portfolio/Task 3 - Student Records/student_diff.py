@@ -0,0 +1,253 @@
+# Compare and merge student marks files between terms, for the Student Records window and the command line.
+#
+# List who was added, removed or had their marks changed, as a change set:
+#     python student_diff.py lastTerm.txt thisTerm.txt --changes changes.csv
+# Apply a change set to a marks file, writing the merged roster:
+#     python student_diff.py lastTerm.txt --apply changes.csv --output merged.txt
+#
+# Both files are streamed once and joined on student number with a hash table of the old file.
+# When the old file would not fit in the memory budget, both files are first split by student
+# number into partition files, and each pair of partitions is joined on its own.
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import csv to read rows the same way read_students does and to write change sets
+import csv
+
+# Import math and os to choose how many partitions the old file needs
+import math
+import os
+
+# Import tempfile to keep the partitions in a temporary folder
+import tempfile
+
+# Import time to report how long a comparison took
+import time
+
+# Import Counter to tally the changes made
+from collections import Counter
+
+# Import ExitStack to close every partition file together
+from contextlib import ExitStack
+
+# Iterator and List are used for type hinting
+from typing import Iterator, List, Optional
+
+# Import the row rules shared with read_students
+from student_store import (CourseworkMarks, RosterEvents, Student, parse_row, parse_student, read_students,
+                           ROW_INSERTED, ROW_UPDATED, ROW_DELETED)
+
+# Default memory for the old file's rows while joining
+MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Memory a line of the old file takes in the hash table, as a multiple of its length on disk
+MEMORY_PER_BYTE = 4
+
+def line_number(line: str) -> int:
+    """Return the student number at the start of a line without parsing the rest. Raises ValueError if there is none."""
+    return int(line.split(',', 1)[0])
+
+def parse_line(line: str):
+    """Return a line as a marks file row and its parsed fields. Raises ValueError under the read_students rules."""
+    row = next(csv.reader([line]), [])
+    return row, parse_row(row)
+
+def read_lines(path: str) -> Iterator[str]:
+    """Yield the lines of a file without their line endings."""
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        for line in file:
+            yield line.rstrip('\r\n')
+
+def join_rosters(old_lines, new_lines) -> Iterator[tuple]:
+    """
+    Yield ("add", row), ("update", row) and ("remove", row) changes that turn the old rows into the new ones.
+
+    Lines that are identical in both files are matched without being parsed. Lines read_students would
+    skip are skipped here too, so a row that becomes invalid counts as removed.
+    """
+    old = {}
+    for line in old_lines:
+        try:
+            old[line_number(line)] = line
+        except ValueError:
+            print(f"Skipping invalid row: {line}")
+
+    for line in new_lines:
+        try:
+            number = line_number(line)
+        except ValueError:
+            print(f"Skipping invalid row: {line}")
+            continue
+        old_line = old.pop(number, None)
+        if line == old_line:
+            continue  # Unchanged, which most rows are
+        try:
+            row, fields = parse_line(line)
+        except ValueError as ve:
+            print(f"Error parsing row {line}: {ve}")
+            if old_line is not None:
+                old[number] = old_line  # Reported as removed below
+            continue
+        if old_line is None:
+            yield "add", row
+            continue
+        try:
+            _, old_fields = parse_line(old_line)
+        except ValueError:
+            yield "add", row  # The old row was never loaded, so the student is new to the roster
+            continue
+        if fields != old_fields:
+            yield "update", row  # Rows differing only in spacing or number formatting are left alone
+
+    for line in old.values():
+        try:
+            row, _ = parse_line(line)
+        except ValueError:
+            continue
+        yield "remove", row
+
+def partition(path: str, folder: str, prefix: str, count: int) -> List[str]:
+    """Split a file's lines into count partition files by student number and return their paths."""
+    paths = [os.path.join(folder, f"{prefix}{index:04d}.csv") for index in range(count)]
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(part, mode='w', newline='', encoding='utf-8')) for part in paths]
+        for line in read_lines(path):
+            try:
+                number = line_number(line)
+            except ValueError:
+                print(f"Skipping invalid row: {line}")
+                continue
+            files[number % count].write(line + "\n")
+    return paths
+
+def diff_rosters(old_path: str, new_path: str, memory_budget: int = MEMORY_BUDGET, temp_dir=None) -> Iterator[tuple]:
+    """
+    Yield the changes from the old marks file to the new one, as (operation, row) pairs.
+
+    Args:
+        old_path (str): Last term's marks file.
+        new_path (str): This term's marks file.
+        memory_budget (int): Bytes the old file's rows may take in memory before both files are partitioned on disk.
+        temp_dir (str): Where to create partition files; the system temporary folder by default.
+    """
+    partitions = math.ceil(os.path.getsize(old_path) * MEMORY_PER_BYTE / memory_budget)
+    if partitions <= 1:
+        yield from join_rosters(read_lines(old_path), read_lines(new_path))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="student_diff_", dir=temp_dir) as folder:
+        old_parts = partition(old_path, folder, "old", partitions)
+        new_parts = partition(new_path, folder, "new", partitions)
+        for old_part, new_part in zip(old_parts, new_parts):
+            yield from join_rosters(read_lines(old_part), read_lines(new_part))
+
+def write_changes(changes, path: str) -> Counter:
+    """Write changes to a change set file, one "operation,row..." line each, and return how many of each there were."""
+    counts = Counter()
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for operation, row in changes:
+            writer.writerow([operation, *row])
+            counts[operation] += 1
+    return counts
+
+def read_changes(path: str) -> Iterator[tuple]:
+    """Yield the (operation, row) changes in a change set file."""
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        for line in csv.reader(file):
+            if line:
+                yield line[0], line[1:]
+
+def apply_changes(students: List[Student], changes, marks_store: CourseworkMarks,
+                  events: Optional[RosterEvents] = None) -> Counter:
+    """
+    Apply changes to a list of students in place and return how many of each were applied.
+
+    Added students keep their coursework marks in marks_store. Adding a student already in the roster
+    updates them, and updating one who is not adds them, so a change set can be applied to a roster that
+    has drifted from the file it was made from. Removing a student who is not in the roster, and rows
+    that do not parse, are skipped and counted as "skipped".
+
+    With events, an event is sent for every student inserted, updated or deleted; deletions are sent
+    once all of the changes have been applied.
+    """
+    by_number = {student.number: student for student in students}
+    removed = set()
+    counts = Counter()
+    for operation, row in changes:
+        try:
+            if operation == "remove":
+                number = int(row[0])  # Removing a student needs only their number
+            else:
+                number, name, coursework_marks, exam_mark = parse_row(row)
+            student = by_number.get(number)
+            if operation in ("add", "update") and student is None:
+                student = parse_student(row, marks_store)
+                students.append(student)
+                by_number[number] = student
+                operation = "add"
+                if events is not None:
+                    events.emit(ROW_INSERTED, student)
+            elif operation in ("add", "update"):
+                student.set_marks(coursework_marks, exam_mark)
+                student.name = name
+                operation = "update"
+                if events is not None:
+                    events.emit(ROW_UPDATED, student)
+            elif operation == "remove" and student is not None:
+                del by_number[number]
+                removed.add(student)
+            else:
+                counts["skipped"] += 1
+                continue
+        except (ValueError, IndexError) as ve:
+            print(f"Error applying change {operation} {row}: {ve}")
+            counts["skipped"] += 1
+            continue
+        counts[operation] += 1
+
+    if removed:
+        students[:] = [student for student in students if student not in removed]
+        marks_store.clear_rows(student.row for student in removed)  # Free their marks so they drop out of the averages
+        if events is not None:
+            for student in removed:
+                events.emit(ROW_DELETED, student)
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare or merge student marks files between terms.")
+    parser.add_argument("old", help="last term's marks file")
+    parser.add_argument("new", nargs="?", help="this term's marks file, to compare against")
+    parser.add_argument("--changes", help="write the change set to this file instead of printing it")
+    parser.add_argument("--apply", help="apply this change set to the old file")
+    parser.add_argument("--output", help="where to write the merged roster when applying changes")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_BUDGET / 1024 / 1024,
+                        help="memory for the old file's rows before partitioning on disk")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.apply:
+        if not args.output:
+            parser.error("--apply needs --output")
+        marks_store = CourseworkMarks()
+        students = read_students(args.old, marks_store)
+        counts = apply_changes(students, read_changes(args.apply), marks_store)
+        with open(args.output, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            for student in students:
+                writer.writerow([student.number, student.name, *student.coursework_marks, student.exam_mark])
+    elif args.new:
+        changes = diff_rosters(args.old, args.new, int(args.memory_mb * 1024 * 1024))
+        if args.changes:
+            counts = write_changes(changes, args.changes)
+        else:
+            counts = Counter()
+            for operation, row in changes:
+                print(operation, ",".join(row))
+                counts[operation] += 1
+    else:
+        parser.error("give a new marks file to compare, or --apply")
+
+    summary = ", ".join(f"{counts[operation]:,} {operation}" for operation in ("add", "update", "remove", "skipped"))
+    print(f"{summary} in {time.perf_counter() - started:.2f}s")
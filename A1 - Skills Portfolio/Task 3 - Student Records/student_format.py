@@ -0,0 +1,62 @@
+# Record text shown for each student by the Student Records window.
+#
+# Every screen that shows a student uses RecordFormatter, which keeps the text it built for each
+# student until that student changes, so showing, scrolling and re-sorting the same records again
+# reuses their text instead of building it again.
+
+# Import OrderedDict to keep the most recently shown records
+from collections import OrderedDict
+
+# Import the Student class for type hinting
+from student_store import Student
+
+# Records whose text is kept; large enough to hold a whole roster being scrolled or re-sorted
+RECORD_CACHE_SIZE = 100000
+
+def format_record(student: Student) -> str:
+    """Build the multi-line record shown for a student."""
+    # Format coursework marks for display
+    coursework_details = ", ".join([f"{mark}" for mark in student.coursework_marks])
+    return (
+        f"Name: {student.name}\n"
+        f"Number: {student.number}\n"
+        f"Coursework Marks: {coursework_details} (Total: {student.total_coursework})\n"
+        f"Exam Mark: {student.exam_mark}\n"
+        f"Overall Percentage: {student.percentage:.2f}%\n"
+        f"Grade: {student.grade}\n"
+    )
+
+class RecordFormatter:
+    """Build record text, remembering it by student version until the student changes."""
+
+    def __init__(self, size: int = RECORD_CACHE_SIZE):
+        self.size = size
+        self.records = OrderedDict()  # (version, spaced) -> text, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, student: Student, spaced: bool = False) -> str:
+        """
+        Return a student's record text.
+
+        Args:
+            student (Student): The student to show.
+            spaced (bool): Add a blank line after the record, as lists of records do.
+        """
+        key = (student.version, spaced)  # Versions are never reused, so the key also identifies the student
+        text = self.records.get(key)
+        if text is not None:
+            self.records.move_to_end(key)
+            self.hits += 1
+            return text
+
+        self.misses += 1
+        text = format_record(student) + ("\n" if spaced else "")
+        self.records[key] = text
+        if len(self.records) > self.size:
+            self.records.popitem(last=False)  # Forget the least recently shown record
+        return text
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters and how many records are held."""
+        return {"hits": self.hits, "misses": self.misses, "records": len(self.records)}
@@ -0,0 +1,534 @@
+# Filter queries over the student roster, shared by the Student Records window and its tools.
+#
+# A query combines comparisons with and, or, not and brackets, for example:
+#     grade in (A, B) and exam_mark > 60 and coursework[2] < 10
+#     name contains "Scott" or not (percentage >= 40)
+# Fields: name, number, grade, exam_mark, total_coursework, total_marks, percentage and
+# coursework[n], the n-th coursework mark counting from 1 (students without one never match).
+# Operators: = (or ==), !=, <, <=, >, >=, in (...), not in (...) and contains (names only).
+#
+# Each comparison is answered for the whole roster at once as a byte mask with one byte per
+# student, using an index where that is cheaper than scanning the column; masks are then
+# combined as big integers.
+
+# Import re to split a query into tokens
+import re
+
+# Import array for compact numeric columns and index orders
+import array
+
+# Import bisect to look up ranges in the sorted indexes
+import bisect
+
+# Import itertools and operator to compare whole columns without a Python loop per student
+import itertools
+import operator
+
+# Import threading so queries can run on a worker while roster events arrive on the window's thread
+import threading
+
+# Import OrderedDict to keep the most recently used query results
+from collections import OrderedDict
+
+# Import the roster events, to patch the snapshot instead of taking a new one
+from student_store import ROW_INSERTED, ROW_UPDATED, ROW_DELETED
+
+# List is used for type hinting, ensuring our data structures are clear
+from typing import List
+
+# Most pending roster events, as a share of the snapshot's rows, patched in rather than taking a new snapshot
+PATCH_LIMIT = 1 / 16
+
+# Numeric fields and the Student attribute each one reads
+NUMERIC_FIELDS = {
+    "number": "number",
+    "exam_mark": "exam_mark",
+    "total_coursework": "total_coursework",
+    "total_marks": "total_marks",
+    "percentage": "percentage",
+}
+
+COMPARISONS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# An indexed range is turned into a mask row by row, so only use it when it selects fewer rows than this share
+INDEX_SELECTIVITY = 1 / 8
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\d+(?:\.\d+)?)|"([^"]*)"|\'([^\']*)\'|(==|!=|<=|>=|[=<>(),\[\]])|([A-Za-z_][\w.]*))')
+
+class QueryError(ValueError):
+    """Raised for a query that cannot be parsed or refers to an unknown field."""
+
+def tokenize(text: str) -> list:
+    """Split a query into (kind, value) tokens: number, string, symbol or word."""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise QueryError(f"Unexpected character {text[position]!r} at position {position + 1}.")
+        number, double_quoted, single_quoted, symbol, word = match.groups()
+        if number is not None:
+            tokens.append(("number", float(number)))
+        elif double_quoted is not None or single_quoted is not None:
+            tokens.append(("string", double_quoted if double_quoted is not None else single_quoted))
+        elif symbol is not None:
+            tokens.append(("symbol", symbol))
+        else:
+            tokens.append(("word", word))
+        position = match.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+    return tokens
+
+class Parser:
+    """Recursive-descent parser turning tokens into a tuple tree of and/or/not nodes and comparisons."""
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, kind=None, value=None) -> bool:
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.position]
+        if kind and token_kind != kind:
+            return False
+        if value is not None and (token_value.lower() if token_kind == "word" else token_value) != value:
+            return False
+        return True
+
+    def take(self, kind=None, value=None):
+        if not self.peek(kind, value):
+            found = self.tokens[self.position][1] if self.position < len(self.tokens) else "the end of the query"
+            raise QueryError(f"Expected {value or kind} but found {found!r}.")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("The query is empty.")
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise QueryError(f"Unexpected {self.tokens[self.position][1]!r} after the end of the query.")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek("word", "or"):
+            self.take()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", tuple(nodes))
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek("word", "and"):
+            self.take()
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+
+    def parse_not(self):
+        if self.peek("word", "not"):
+            self.take()
+            return ("not", self.parse_not())
+        if self.peek("symbol", "("):
+            self.take()
+            node = self.parse_or()
+            self.take("symbol", ")")
+            return node
+        return self.parse_comparison()
+
+    def parse_field(self) -> str:
+        field = self.take("word").lower()
+        if field == "coursework":
+            self.take("symbol", "[")
+            position = self.take("number")
+            self.take("symbol", "]")
+            if position != int(position) or position < 1:
+                raise QueryError("Coursework positions are whole numbers starting at 1, as in coursework[1].")
+            return f"coursework[{int(position)}]"
+        if field not in NUMERIC_FIELDS and field not in ("name", "grade"):
+            raise QueryError(f"Unknown field {field!r}.")
+        return field
+
+    def parse_value(self):
+        if self.peek("number") or self.peek("string"):
+            return self.take()
+        return self.take("word")  # Bare words, such as grades: grade = A
+
+    def parse_comparison(self):
+        field = self.parse_field()
+        negated = False
+        if self.peek("word", "not"):
+            self.take()
+            negated = True
+            if not self.peek("word", "in"):
+                raise QueryError("Expected 'in' after 'not'.")
+        if self.peek("word", "in"):
+            self.take()
+            self.take("symbol", "(")
+            values = [self.parse_value()]
+            while self.peek("symbol", ","):
+                self.take()
+                values.append(self.parse_value())
+            self.take("symbol", ")")
+            node = ("in", field, tuple(sorted(set(values), key=str)))
+            return ("not", node) if negated else node
+        if self.peek("word", "contains"):
+            self.take()
+            if field != "name":
+                raise QueryError("Only name can be searched with contains.")
+            return ("contains", field, str(self.parse_value()))
+        op = self.take("symbol")
+        if op not in COMPARISONS:
+            raise QueryError(f"Unknown operator {op!r}.")
+        return ("compare", field, "=" if op == "==" else op, self.parse_value())
+
+def parse_query(text: str):
+    """Parse a query into its tuple tree. Equivalent spellings give equal trees, so the tree is a good cache key."""
+    return Parser(tokenize(text)).parse()
+
+class RosterTable:
+    """
+    A column-by-column snapshot of a roster, with indexes built the first time a query needs them.
+
+    When students are inserted, updated or deleted, patch their rows with insert, update and delete
+    rather than building a new table; every query between patches sees the same snapshot.
+    """
+
+    def __init__(self, students: list):
+        self.students = students = list(students)  # A copy, so the roster can change before its events are patched in
+        self.members = set(students)  # Who the copy holds, as it may be taken after a student is added but before the event
+        self.size = len(students)
+        self.names = [student.name for student in students]
+        self.grades = bytearray("".join(student.grade for student in students).encode('ascii'))  # One byte per student
+        self.numeric = {
+            field: array.array('d', map(operator.attrgetter(attribute), students))
+            for field, attribute in NUMERIC_FIELDS.items()
+        }
+        self.coursework = {}     # Position -> (column with NaN where missing, mask of students who have it)
+        self.sorted_index = {}   # Field -> (row order by value, values in that order)
+        self.name_index = None   # Name -> rows with that name
+        self.everyone = int.from_bytes(b'\x01' * self.size, 'little')
+
+    def coursework_column(self, position: int):
+        """Return the marks at a coursework position for every student, gathered once from the shared buffer."""
+        if position not in self.coursework:
+            if not self.students:
+                return array.array('d'), bytearray()
+            store = self.students[0].marks_store
+            # Copied together, as queries may run on a worker while the window edits marks
+            values, offsets = store.read(lambda store: (array.array('d', store.values), store.offsets[:]))
+            rows = list(map(operator.attrgetter('row'), self.students))
+            starts = list(map(offsets.__getitem__, rows))
+            ends = map(offsets.__getitem__, map(operator.add, rows, itertools.repeat(1)))
+            indices = list(map(operator.add, starts, itertools.repeat(position - 1)))
+            present = bytearray(map(operator.lt, indices, ends))
+
+            # Students without this assessment read a NaN placed after the last mark
+            missing = len(values)
+            values.append(float('nan'))
+            if present.count(0):
+                indices = [index if has_mark else missing for index, has_mark in zip(indices, present)]
+            column = array.array('d', map(values.__getitem__, indices))
+            if store.scale:
+                column = array.array('d', map(operator.truediv, column, itertools.repeat(store.scale)))
+            self.coursework[position] = (column, present)
+        return self.coursework[position]
+
+    def index(self, field: str):
+        """Return the rows sorted by a numeric field, and the field's values in that order."""
+        if field not in self.sorted_index:
+            column = self.numeric[field]
+            order = array.array('I', sorted(range(self.size), key=column.__getitem__))
+            self.sorted_index[field] = (order, array.array('d', map(column.__getitem__, order)))
+        return self.sorted_index[field]
+
+    def extreme(self, field: str, highest: bool = True):
+        """Return the first student with the highest or lowest value of a numeric field, or None if there are none."""
+        order, ordered_values = self.index(field)
+        if not order:
+            return None
+        position = bisect.bisect_left(ordered_values, ordered_values[-1]) if highest else 0
+        return self.students[order[position]]
+
+    def insert(self, student):
+        """Add a student at the end of every column and index, unless the snapshot already holds them."""
+        if student in self.members:
+            return
+        self.members.add(student)
+        row = self.size
+        self.students.append(student)
+        self.size += 1
+        self.names.append(student.name)
+        self.grades.append(ord(student.grade))
+        for field, attribute in NUMERIC_FIELDS.items():
+            value = getattr(student, attribute)
+            self.numeric[field].append(value)
+            if field in self.sorted_index:
+                order, ordered_values = self.sorted_index[field]
+                position = bisect.bisect_right(ordered_values, value)
+                order.insert(position, row)
+                ordered_values.insert(position, value)
+        self.patch_coursework(row, student)
+        if self.name_index is not None:
+            self.name_index.setdefault(student.name, []).append(row)
+        self.everyone |= 1 << (8 * row)
+
+    def update(self, student):
+        """Copy a student's current details into their row of every column and index."""
+        row = self.students.index(student)  # Compares identities in C, far cheaper than any one redraw
+        if self.name_index is not None and self.names[row] != student.name:
+            self.name_index[self.names[row]].remove(row)
+            if not self.name_index[self.names[row]]:
+                del self.name_index[self.names[row]]
+            self.name_index.setdefault(student.name, []).append(row)
+        self.names[row] = student.name
+        self.grades[row] = ord(student.grade)
+        for field, attribute in NUMERIC_FIELDS.items():
+            column = self.numeric[field]
+            value = getattr(student, attribute)
+            if field in self.sorted_index:
+                order, ordered_values = self.sorted_index[field]
+                self.unindex(order, ordered_values, row, column[row])
+                position = bisect.bisect_right(ordered_values, value)
+                order.insert(position, row)
+                ordered_values.insert(position, value)
+            column[row] = value
+        self.patch_coursework(row, student)
+
+    def delete(self, student):
+        """Remove a student's row; the rows after it move up by one."""
+        row = self.students.index(student)
+        del self.students[row]
+        self.members.discard(student)
+        self.size -= 1
+        del self.names[row]
+        del self.grades[row]
+        for field, column in self.numeric.items():
+            if field in self.sorted_index:
+                order, ordered_values = self.sorted_index[field]
+                self.unindex(order, ordered_values, row, column[row])
+                # Renumber the rows after it in C: subtracting True takes one off
+                order[:] = array.array('I', map(operator.sub, order, map(operator.gt, order, itertools.repeat(row))))
+            del column[row]
+        for column, present in self.coursework.values():
+            del column[row]
+            del present[row]
+        self.name_index = None  # Rebuilt by the next name query, as every later row number changed
+        self.everyone >>= 8
+
+    def unindex(self, order, ordered_values, row: int, value: float):
+        """Remove a row from a sorted index, finding it among the rows with its old value."""
+        start = bisect.bisect_left(ordered_values, value)
+        position = start + order[start:bisect.bisect_right(ordered_values, value)].index(row)
+        del order[position]
+        del ordered_values[position]
+
+    def patch_coursework(self, row: int, student):
+        """Set a student's mark in every coursework column gathered so far."""
+        store = student.marks_store
+        # A copy rather than a view, which would stop the buffer growing while this runs on a worker
+        marks = store.read(lambda store: store.values[store.offsets[student.row]:store.offsets[student.row + 1]])
+        for position, (column, present) in self.coursework.items():
+            has_mark = len(marks) >= position
+            value = marks[position - 1] / (store.scale or 1) if has_mark else float('nan')
+            if row == len(column):
+                column.append(value)
+                present.append(has_mark)
+            else:
+                column[row] = value
+                present[row] = has_mark
+
+    def mask_from_rows(self, rows) -> int:
+        mask = bytearray(self.size)
+        for row in rows:
+            mask[row] = 1
+        return int.from_bytes(mask, 'little')
+
+    def evaluate(self, node) -> int:
+        """Return a node's matches as an integer with byte i set to 1 when student i matches."""
+        kind = node[0]
+        if kind == "and":
+            mask = self.everyone
+            for child in node[1]:
+                mask &= self.evaluate(child)
+                if not mask:
+                    break  # Nothing can match any more
+            return mask
+        if kind == "or":
+            mask = 0
+            for child in node[1]:
+                mask |= self.evaluate(child)
+            return mask
+        if kind == "not":
+            return self.everyone ^ self.evaluate(node[1])
+        return int.from_bytes(self.leaf_mask(node), 'little')
+
+    def leaf_mask(self, node) -> bytes:
+        """Answer one comparison for every student as one byte each, choosing the cheapest way."""
+        kind, field = node[0], node[1]
+
+        if field == "grade":
+            values = node[2] if kind == "in" else (node[3],)
+            table = bytearray(256)
+            for value in values:
+                if len(str(value)) == 1:
+                    table[ord(str(value).upper())] = 1
+            if kind == "compare" and node[2] not in ("=", "!="):
+                raise QueryError("Grades can only be compared with =, != or in.")
+            mask = self.grades.translate(table)  # One pass over the grade bytes in C
+            return mask.translate(bytes.maketrans(b'\x00\x01', b'\x01\x00')) if node[2:3] == ("!=",) else mask
+
+        if field == "name":
+            if kind == "contains":
+                return bytes(map(operator.contains, self.names, itertools.repeat(node[2])))
+            if kind == "in" or node[2] in ("=", "!="):
+                if self.name_index is None:
+                    self.name_index = {}
+                    for row, name in enumerate(self.names):
+                        self.name_index.setdefault(name, []).append(row)
+                values = node[2] if kind == "in" else (node[3],)
+                mask = self.mask_from_rows(row for value in values for row in self.name_index.get(str(value), ()))
+                if node[2:3] == ("!=",):
+                    mask ^= self.everyone
+                return mask.to_bytes(self.size, 'little')
+            return bytes(map(COMPARISONS[node[2]], self.names, itertools.repeat(str(node[3]))))
+
+        # Numeric fields and coursework positions
+        values = node[2] if kind == "in" else (node[3],)
+        if not all(isinstance(value, float) for value in values):
+            raise QueryError(f"{field} must be compared with numbers.")
+
+        if field.startswith("coursework["):
+            column, present = self.coursework_column(int(field[len("coursework["):-1]))
+            if kind == "in":
+                mask = bytes(map(set(values).__contains__, column))
+            else:
+                mask = bytes(map(COMPARISONS[node[2]], column, itertools.repeat(values[0])))
+            # Missing marks never match, not even with !=
+            return (int.from_bytes(mask, 'little') & int.from_bytes(present, 'little')).to_bytes(self.size, 'little')
+
+        column = self.numeric[field]
+        if kind == "in" or node[2] != "!=":
+            rows = self.index_rows(field, node)
+            if rows is not None:
+                return self.mask_from_rows(rows).to_bytes(self.size, 'little')
+        if kind == "in":
+            return bytes(map(set(values).__contains__, column))
+        return bytes(map(COMPARISONS[node[2]], column, itertools.repeat(values[0])))
+
+    def index_rows(self, field: str, node):
+        """Return the rows matching a range or equality through the sorted index, or None if scanning is cheaper."""
+        order, ordered_values = self.index(field)
+        if node[0] == "in":
+            spans = [(bisect.bisect_left(ordered_values, value), bisect.bisect_right(ordered_values, value))
+                     for value in node[2]]
+        else:
+            op, value = node[2], node[3]
+            left = bisect.bisect_left(ordered_values, value)
+            right = bisect.bisect_right(ordered_values, value)
+            spans = [{"=": (left, right), "<": (0, left), "<=": (0, right),
+                      ">": (right, self.size), ">=": (left, self.size)}[op]]
+        if sum(end - start for start, end in spans) > self.size * INDEX_SELECTIVITY:
+            return None
+        return itertools.chain.from_iterable(order[start:end] for start, end in spans)
+
+    def rows(self, mask: int) -> List[int]:
+        """Return the row numbers set in a mask."""
+        return list(itertools.compress(range(self.size), mask.to_bytes(self.size, 'little')))
+
+class QueryCache:
+    """
+    Run queries against the current roster, remembering recent results until the roster changes.
+
+    Subscribe changed to the roster's RosterEvents. Events are kept until the next query and then
+    patched into the snapshot, unless there are so many that a new snapshot is cheaper.
+
+    Queries may run on a worker thread while events arrive on another, but only one thread may
+    query at a time.
+    """
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        self.results = OrderedDict()  # Parsed query -> matching rows, least recently used first
+        self.table = None
+        self.pending = []        # (event, student) not yet patched into the table
+        self.tracking = False    # Whether events are being kept for a snapshot
+        self.generation = 0      # Counts roster events, so results worked out during one are not kept
+        self.lock = threading.Lock()  # Guards pending, results and generation between the two threads
+        self.hits = 0
+        self.misses = 0
+
+    def changed(self, event: str, student):
+        """Note a roster event, to patch into the snapshot before the next query."""
+        with self.lock:
+            if self.tracking:
+                self.pending.append((event, student))
+            self.results.clear()
+            self.generation += 1
+
+    def reset(self):
+        """Forget the snapshot, for when the roster is replaced rather than edited."""
+        with self.lock:
+            self.table = None
+            self.pending = []
+            self.tracking = False
+            self.results.clear()
+            self.generation += 1
+
+    def snapshot(self, students: list) -> RosterTable:
+        """Return the column snapshot of the roster, patched with any changes since it was taken."""
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if self.table is None or len(pending) > self.table.size * PATCH_LIMIT:
+                # Patching that many rows would take longer than a new snapshot. The roster is copied
+                # together with taking the events, so any later events are kept for the next call.
+                self.table = None
+                roster = list(students)
+                self.tracking = True
+        if self.table is None:
+            self.table = RosterTable(roster)
+            return self.table
+
+        patches = {ROW_INSERTED: self.table.insert, ROW_UPDATED: self.table.update, ROW_DELETED: self.table.delete}
+        for event, student in pending:
+            try:
+                patches[event](student)
+            except ValueError:
+                # An event for a student the snapshot never had
+                with self.lock:
+                    self.pending = []
+                    roster = list(students)
+                self.table = RosterTable(roster)
+                break
+        return self.table
+
+    def run(self, text: str, students: list) -> list:
+        """Return the students matching a query."""
+        query = parse_query(text)
+        with self.lock:
+            generation = self.generation
+            rows = self.results.get(query)
+            if rows is not None:
+                self.results.move_to_end(query)
+                self.hits += 1
+                table = self.table
+        if rows is None:
+            self.misses += 1
+            table = self.snapshot(students)
+            rows = table.rows(table.evaluate(query))
+            with self.lock:
+                if generation == self.generation:  # Keep it only if the roster did not change meanwhile
+                    self.results[query] = rows
+                    if len(self.results) > self.size:
+                        self.results.popitem(last=False)
+        return [table.students[row] for row in rows]
@@ -0,0 +1,160 @@
+# Sort marks files too large to load, for the Student Records window and the command line.
+#
+# Sort an archive roster by total marks, highest first, using at most 256 MB for rows in memory:
+#     python student_sort.py archive.txt sorted.txt --key total_marks --descending --memory-mb 256
+#
+# The file is read in chunks that fit the memory budget; each chunk is sorted and written to a
+# temporary run file, and the runs are then merged with heapq.merge, reading one row of each at a time.
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import csv to read and write rows in the marks file format
+import csv
+
+# Import heapq to merge the sorted runs
+import heapq
+
+# Import math for exactly rounded totals
+import math
+
+# Import os, sys and tempfile to size rows and keep the runs in a temporary folder
+import os
+import sys
+import tempfile
+
+# Import time to report how long a sort took
+import time
+
+# Import ExitStack to close every run file before the temporary folder is removed
+from contextlib import ExitStack
+
+# Iterator and List are used for type hinting
+from typing import Iterator, List
+
+# Import the row rules shared with read_students
+from student_store import parse_row
+
+# Keys rows can be sorted by, each read from a row of the marks file: number, name, coursework marks..., exam mark
+SORT_KEYS = {
+    "name": lambda row: row[1].strip(),
+    "number": lambda row: int(row[0]),
+    "total_marks": lambda row: math.fsum(map(float, row[2:])),
+    "exam_mark": lambda row: float(row[-1]),
+    "total_coursework": lambda row: math.fsum(map(float, row[2:-1])),
+}
+
+# Default memory for rows held while sorting a chunk
+MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Most runs merged at once; more runs are merged in several passes so few files are open together
+MAX_MERGE_RUNS = 64
+
+def row_size(row: List[str]) -> int:
+    """Approximate memory taken by a row and its strings while it waits to be sorted."""
+    return sys.getsizeof(row) + sum(map(sys.getsizeof, row)) + 8  # Plus the chunk list's pointer to it
+
+def read_chunks(file_path: str, memory_budget: int) -> Iterator[List[List[str]]]:
+    """Yield the valid rows of a marks file in chunks that each fit the memory budget."""
+    chunk = []
+    used = 0
+    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+        for row in csv.reader(file):
+            if len(row) < 4:
+                print(f"Skipping invalid row: {row}")
+                continue
+            try:
+                parse_row(row)  # Skip the same rows read_students would
+            except ValueError as ve:
+                print(f"Error parsing row {row}: {ve}")
+                continue
+            chunk.append(row)
+            used += row_size(row)
+            if used >= memory_budget:
+                yield chunk
+                chunk = []
+                used = 0
+    if chunk:
+        yield chunk
+
+def write_run(rows, folder: str, number: int) -> str:
+    """Write sorted rows to a new run file and return its path."""
+    path = os.path.join(folder, f"run{number:06d}.csv")
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(rows)
+    return path
+
+def merge_runs(paths: List[str], key, reverse: bool, stack: ExitStack) -> Iterator[List[str]]:
+    """Return the rows of several sorted run files merged in order; stack closes the files."""
+    readers = [csv.reader(stack.enter_context(open(path, mode='r', newline='', encoding='utf-8'))) for path in paths]
+    return heapq.merge(*readers, key=key, reverse=reverse)
+
+def sorted_rows(file_path: str, key: str = "name", reverse: bool = False,
+                memory_budget: int = MEMORY_BUDGET, temp_dir=None, progress=None) -> Iterator[List[str]]:
+    """
+    Yield the rows of a marks file sorted by key, holding about memory_budget bytes of rows at a time.
+
+    Args:
+        file_path (str): The marks file to sort.
+        key (str): One of SORT_KEYS.
+        reverse (bool): Sort from highest to lowest instead.
+        memory_budget (int): Bytes of rows to sort in memory before spilling them to a run file.
+        temp_dir (str): Where to create the run files; the system temporary folder by default.
+        progress: Called with the number of rows read after each chunk is sorted; raising from it stops the sort.
+
+    Rows with equal keys stay in the order they appear in the file. The run files are removed when
+    the rows have all been read or the iterator is closed.
+    """
+    if key not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key {key!r}.")
+    key_function = SORT_KEYS[key]
+
+    with tempfile.TemporaryDirectory(prefix="student_sort_", dir=temp_dir) as folder:
+        runs = []
+        rows_read = 0
+        for chunk in read_chunks(file_path, memory_budget):
+            chunk.sort(key=key_function, reverse=reverse)
+            runs.append(write_run(chunk, folder, len(runs)))
+            rows_read += len(chunk)
+            del chunk  # Release the rows before reading the next chunk
+            if progress is not None:
+                progress(rows_read)
+
+        # Merge runs in groups until one pass can merge them all; merging preserves file order for equal keys
+        while len(runs) > MAX_MERGE_RUNS:
+            merged = []
+            for start in range(0, len(runs), MAX_MERGE_RUNS):
+                with ExitStack() as stack:
+                    rows = merge_runs(runs[start:start + MAX_MERGE_RUNS], key_function, reverse, stack)
+                    merged.append(write_run(rows, folder, len(runs) + len(merged)))
+                for path in runs[start:start + MAX_MERGE_RUNS]:
+                    os.remove(path)
+            runs = merged
+
+        with ExitStack() as stack:
+            yield from merge_runs(runs, key_function, reverse, stack)
+
+def sort_file(file_path: str, output_path: str, key: str = "name", reverse: bool = False,
+              memory_budget: int = MEMORY_BUDGET) -> int:
+    """Write a marks file's rows sorted by key to output_path and return how many rows were written."""
+    count = 0
+    with open(output_path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for row in sorted_rows(file_path, key, reverse, memory_budget):
+            writer.writerow(row)
+            count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sort a student marks file that may not fit in memory.")
+    parser.add_argument("file", help="marks file to sort")
+    parser.add_argument("output", help="where to write the sorted rows")
+    parser.add_argument("--key", choices=list(SORT_KEYS), default="name")
+    parser.add_argument("--descending", action="store_true")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_BUDGET / 1024 / 1024,
+                        help="memory for rows held while sorting")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = sort_file(args.file, args.output, args.key, args.descending, int(args.memory_mb * 1024 * 1024))
+    print(f"Sorted {count:,} rows by {args.key} in {time.perf_counter() - started:.2f}s")
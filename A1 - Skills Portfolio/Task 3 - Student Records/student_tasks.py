@@ -0,0 +1,170 @@
+# Run slow work for the Student Records window on a worker thread, so the window keeps responding.
+#
+# Submit a function with a name; it runs on the worker with its Task as the first argument, and its
+# result is handed to on_done on the window's thread. Submitting another task with the same name
+# cancels the one still waiting or running, so only the latest sort, filter or summary is shown.
+# Work that takes a while should call task.check() or task.progress(...) now and then, which stop it
+# early once it has been cancelled.
+#
+# Workers are threads rather than processes: worker processes would re-run the window's script, and
+# the work reads the roster the window is editing. Results are collected by polling with root.after,
+# as Tk may only be used from the thread running its event loop.
+
+# Import queue and threading to hand results and cancellation between threads
+import queue
+import threading
+
+# Import ThreadPoolExecutor to run the work
+from concurrent.futures import ThreadPoolExecutor
+
+# How often finished work and progress are collected while any task is outstanding
+POLL_MS = 15
+
+class TaskCancelled(Exception):
+    """Raised by Task.check once the task has been cancelled, to stop its work early."""
+
+class Task:
+    """One piece of work, with its callbacks and the flags shared with the worker running it."""
+
+    def __init__(self, name: str, label, on_done, on_error, on_cancel):
+        self.name = name
+        self.label = label  # Shown by the busy indicator; unlabelled tasks run quietly
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.cancel_event = threading.Event()
+        self.status = None   # Latest progress text from the worker
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled. Call it from the work between steps."""
+        if self.cancel_event.is_set():
+            raise TaskCancelled(self.name)
+
+    def progress(self, status: str):
+        """Report how far the work has got, shown on the busy indicator at its next poll."""
+        self.check()
+        self.status = status
+
+class TaskScheduler:
+    """Run tasks on worker threads and deliver their results on the Tk thread."""
+
+    def __init__(self, root, workers: int = 1, on_busy=None):
+        """
+        Args:
+            root: The Tk window whose event loop results are delivered on.
+            workers (int): Worker threads. One keeps tasks from running against each other.
+            on_busy: Called with the busy indicator's text whenever it changes, or None when nothing is running.
+        """
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="student-task")
+        self.on_busy = on_busy
+        self.tasks = {}                      # Name -> the latest task of that name still to finish
+        self.finished = queue.SimpleQueue()  # (task, result, error) put by the workers
+        self.poll_job = None
+        self.busy_text = None
+
+    def submit(self, name: str, function, *args, on_done=None, on_error=None, on_cancel=None, label=None) -> Task:
+        """
+        Run function(task, *args) on a worker, cancelling any earlier task with the same name.
+
+        Args:
+            name (str): Tasks with the same name replace each other.
+            function: The work. It must not use Tk; its result is passed to on_done.
+            on_done: Called on the Tk thread with the result.
+            on_error: Called on the Tk thread with the exception if the work raised one.
+            on_cancel: Called on the Tk thread if the task is cancelled or replaced.
+            label (str): Text for the busy indicator while the task runs; None runs it quietly.
+        """
+        task = Task(name, label, on_done, on_error, on_cancel)
+        previous = self.tasks.get(name)
+        self.tasks[name] = task
+        if previous is not None:
+            self.stop(previous)
+        task.future = self.executor.submit(self.run, task, function, args)
+        self.update_busy()
+        self.start_polling()
+        return task
+
+    def run(self, task: Task, function, args):
+        """Do a task's work on a worker thread and queue its outcome for the Tk thread."""
+        try:
+            task.check()  # Cancelled while it waited for a worker
+            self.finished.put((task, function(task, *args), None))
+        except Exception as e:
+            self.finished.put((task, None, e))
+
+    def cancel(self, name: str):
+        """Cancel the outstanding task with a name, if there is one."""
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            self.stop(task)
+            self.update_busy()
+
+    def stop(self, task: Task):
+        """Cancel a task that is no longer outstanding and tell its on_cancel."""
+        task.cancel()
+        task.future.cancel()  # Never starts if it is still waiting for a worker
+        if task.on_cancel is not None:
+            task.on_cancel()
+
+    def cancel_all(self, labelled_only: bool = True):
+        """Cancel the tasks shown on the busy indicator, or every task."""
+        for name, task in list(self.tasks.items()):
+            if task.label is not None or not labelled_only:
+                self.cancel(name)
+
+    def start_polling(self):
+        if self.poll_job is None:
+            self.poll_job = self.root.after(POLL_MS, self.poll)
+
+    def poll(self):
+        """Deliver finished tasks and progress, then check again shortly while any task is outstanding."""
+        self.poll_job = None
+        while True:
+            try:
+                task, result, error = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if self.tasks.get(task.name) is not task:
+                continue  # Cancelled or replaced; its outcome is no longer wanted
+            del self.tasks[task.name]
+            if error is not None:
+                if task.on_error is not None:
+                    task.on_error(error)
+                else:
+                    print(f"Task {task.name} failed: {error}")
+            elif task.on_done is not None:
+                task.on_done(result)
+        self.update_busy()
+        if self.tasks:
+            self.start_polling()
+
+    def update_busy(self):
+        """Tell on_busy what the most recent labelled task is doing, if that has changed."""
+        labelled = [task for task in self.tasks.values() if task.label is not None]
+        text = None
+        if labelled:
+            task = labelled[-1]
+            text = f"{task.label}: {task.status}" if task.status else task.label
+        if text != self.busy_text:
+            self.busy_text = text
+            if self.on_busy is not None:
+                self.on_busy(text)
+
+    @property
+    def busy(self) -> bool:
+        return any(task.label is not None for task in self.tasks.values())
+
+    def shutdown(self):
+        """Cancel everything and let the worker threads finish. Call it before the window is destroyed."""
+        self.cancel_all(labelled_only=False)
+        self.on_busy = None  # The indicator is going away with the window
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,184 @@
+# Notice when another program changes the student marks file, and work out which rows it changed.
+#
+# The Student Records window polls a MarksFileWatcher and applies its changes with apply_changes.
+# Changes are noticed with inotify on Linux, or by comparing the file's size and modification time
+# elsewhere. A 64-bit hash of each line is kept as its checksum, so only the lines that differ from the
+# last read are parsed.
+
+# Import os and sys to read the file's details and find out whether inotify is available
+import os
+import sys
+
+# Import struct to read inotify events
+import struct
+
+# Import itertools and operator to compare checksums without a Python loop per line
+import itertools
+import operator
+
+# Import ctypes to call inotify without any extra packages
+import ctypes
+import ctypes.util
+
+# List is used for type hinting
+from typing import List
+
+# Import the row rules and cheap number lookup used by the roster diff
+from student_diff import line_number, parse_line
+
+# inotify events that mean the file now has new contents: written and closed, replaced, or deleted
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+INOTIFY_EVENT = struct.Struct('iIII')  # Watch descriptor, mask, cookie, name length; then the name
+
+def open_inotify(directory: str):
+    """Return a non-blocking inotify descriptor watching a folder, or None where inotify is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if descriptor < 0:
+            return None
+        if libc.inotify_add_watch(descriptor, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE) < 0:
+            os.close(descriptor)
+            return None
+        return descriptor
+    except (OSError, AttributeError):
+        return None
+
+class LineIndex:
+    """The checksum and student number of every line of a marks file, as last read."""
+
+    def __init__(self, data: bytes):
+        lines = split_lines(data)
+        self.checksums = list(map(hash, lines))
+        self.numbers = [number_or_none(line) for line in lines]
+
+    def update(self, data: bytes) -> List[tuple]:
+        """
+        Index new contents of the file and return the ("add" | "update" | "remove", row) changes since the last.
+
+        Lines before the first changed line and after the last changed line are matched by checksum
+        alone. In between, lines whose checksum was already there have only moved; just the remaining
+        lines are parsed.
+        """
+        lines = split_lines(data)
+        checksums = list(map(hash, lines))
+        if checksums == self.checksums:
+            return []  # Saved again without changes
+
+        # Skip the unchanged lines at the start and the end, finding the first difference from each end in C
+        limit = min(len(checksums), len(self.checksums))
+        start = next(itertools.compress(itertools.count(), map(operator.ne, checksums, self.checksums)), limit)
+        end = next(itertools.compress(itertools.count(), map(operator.ne, reversed(checksums), reversed(self.checksums))), limit)
+        end = min(end, limit - start)  # The unchanged start and end must not overlap
+        old_end = len(self.checksums) - end
+        new_end = len(checksums) - end
+
+        # Lines in the changed region whose checksum is still there have moved, such as after an insertion
+        old_region = dict(zip(self.checksums[start:old_end], self.numbers[start:old_end]))
+        new_checksums = checksums[start:new_end]
+        still_there = set(new_checksums)
+        gone = {
+            number for number in itertools.compress(
+                self.numbers[start:old_end], map(operator.not_, map(still_there.__contains__, self.checksums[start:old_end])))
+            if number is not None
+        }
+        region_numbers = list(map(old_region.get, new_checksums))
+        new_lines = itertools.compress(range(start, new_end), map(operator.not_, map(old_region.__contains__, new_checksums)))
+
+        changes = []
+        for index in new_lines:
+            line = lines[index].decode('utf-8', errors='replace')
+            number = region_numbers[index - start] = number_or_none(lines[index])
+            if number is None:
+                if line.strip():
+                    print(f"Skipping invalid row: {line}")
+                continue
+            try:
+                row, _ = parse_line(line)
+            except ValueError as ve:
+                print(f"Error parsing row {line}: {ve}")
+                continue  # Dropped from the roster, like read_students would, and removed below if it was there
+            changes.append(("update" if number in gone else "add", row))
+            gone.discard(number)
+        changes.extend(("remove", [str(number)]) for number in gone)
+
+        self.numbers = self.numbers[:start] + region_numbers + self.numbers[old_end:]
+        self.checksums = checksums
+        return changes
+
+def split_lines(data: bytes) -> List[bytes]:
+    """Split file contents into lines without their endings, whether they end in \\n or \\r\\n."""
+    return data.splitlines()
+
+def number_or_none(line: bytes):
+    """Return the student number a line starts with, or None if it has none."""
+    try:
+        return line_number(line.decode('utf-8', errors='replace'))
+    except ValueError:
+        return None
+
+class MarksFileWatcher:
+    """Watch a marks file for changes made by other programs and report which rows changed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inotify = open_inotify(os.path.dirname(os.path.abspath(path)))
+        self.signature = self.stat_signature()
+        try:
+            with open(path, 'rb') as file:
+                self.index = LineIndex(file.read())
+        except OSError:
+            self.index = LineIndex(b'')
+
+    def stat_signature(self):
+        """Return what the file's details say about its contents, or None if it cannot be read."""
+        try:
+            details = os.stat(self.path)
+        except OSError:
+            return None
+        return details.st_mtime_ns, details.st_size, details.st_ino
+
+    def file_changed(self) -> bool:
+        """Return whether the file may have changed since the last call, without reading it."""
+        if self.inotify is not None:
+            name = os.fsencode(os.path.basename(self.path))
+            changed = False
+            while True:
+                try:
+                    events = os.read(self.inotify, 4096)
+                except BlockingIOError:
+                    return changed  # No more events waiting
+                offset = 0
+                while offset < len(events):
+                    _, _, _, length = INOTIFY_EVENT.unpack_from(events, offset)
+                    start = offset + INOTIFY_EVENT.size
+                    if events[start:start + length].rstrip(b'\0') == name:
+                        changed = True
+                    offset = start + length
+
+        signature = self.stat_signature()
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        return True
+
+    def poll(self) -> List[tuple]:
+        """Return the changes other programs made to the file since it was last read, or [] if there are none."""
+        if not self.file_changed():
+            return []
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except OSError as e:
+            print(f"Could not reload {self.path}: {e}")  # Deleted or locked; keep the roster as it is
+            return []
+        return self.index.update(data)
+
+    def close(self):
+        if self.inotify is not None:
+            os.close(self.inotify)
+            self.inotify = None
@@ -0,0 +1,9 @@
+# Let the tests import the Student Records modules that sit beside this folder.
+
+# Import os to find the folder above this one
+import os
+
+# Import sys to put that folder on the import path
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
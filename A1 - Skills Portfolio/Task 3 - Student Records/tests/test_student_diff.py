@@ -0,0 +1,73 @@
+# Tests for diffing marks files, in memory and through partition files, and applying the change sets.
+
+# Import random to build two terms of a roster
+import random
+
+# Import the diff under test and the store it loads students with
+from student_diff import apply_changes, diff_rosters, join_rosters, read_changes, write_changes
+from student_store import CourseworkMarks, RosterEvents, read_students
+
+OLD_LINES = [
+    "1,Ann Lee,10.0,11.0,12.0,50.0",
+    "2,Bob Scott,5.0,5.0,5.0,40.0",
+    "3,Cat Curry,8.0,8.0,8.0,60.0",
+    "4,Dan Scott,1.0,2.0,3.0,20.0",
+    "not a row",
+    "5,Eve Stone,7.0,x,7.0,70.0",
+]
+
+NEW_LINES = [
+    "1,Ann Lee,10.0,11.0,12.0,50.0",   # Unchanged
+    "2, Bob Scott ,5,5.0,5.0,40",      # Only spacing and number formatting differ
+    "3,Cat Curry,8.0,9.0,8.0,60.0",    # Updated
+    "4,Dan Scott,1.0,oops,3.0,20.0",   # Became invalid, so removed
+    "5,Eve Stone,7.0,7.0,7.0,70.0",    # Was invalid, so new to the roster
+    "6,Fay Wong,1.0,1.0,1.0,10.0",     # Added
+    "also not a row",
+]
+
+def test_join_reports_only_real_changes():
+    changes = list(join_rosters(iter(OLD_LINES), iter(NEW_LINES)))
+    assert sorted(changes) == sorted([
+        ("update", ["3", "Cat Curry", "8.0", "9.0", "8.0", "60.0"]),
+        ("add", ["5", "Eve Stone", "7.0", "7.0", "7.0", "70.0"]),
+        ("add", ["6", "Fay Wong", "1.0", "1.0", "1.0", "10.0"]),
+        ("remove", ["4", "Dan Scott", "1.0", "2.0", "3.0", "20.0"]),
+    ])
+
+def write_term(path, seed, count):
+    rng = random.Random(seed)
+    lines = [f"{number},Student {number},{rng.randint(0, 2)}.0,{rng.randint(0, 2)}.0,{rng.randint(0, 2)}.0,50.0"
+             for number in rng.sample(range(count * 2), count)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def test_partitioned_diff_matches_in_memory_diff(tmp_path):
+    old_path, new_path = tmp_path / "old.txt", tmp_path / "new.txt"
+    write_term(old_path, 1, 500)
+    write_term(new_path, 2, 500)
+
+    in_memory = list(diff_rosters(str(old_path), str(new_path)))
+    partitioned = list(diff_rosters(str(old_path), str(new_path), memory_budget=4096, temp_dir=str(tmp_path)))
+    assert {"add", "update", "remove"} <= {operation for operation, _ in in_memory}
+    assert sorted(partitioned) == sorted(in_memory)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new.txt", "old.txt"]  # Partitions removed
+
+def roster_rows(students):
+    return sorted((student.number, student.name, student.coursework_marks, student.exam_mark) for student in students)
+
+def test_applying_the_diff_gives_the_new_roster(tmp_path):
+    old_path, new_path, changes_path = tmp_path / "old.txt", tmp_path / "new.txt", tmp_path / "changes.csv"
+    write_term(old_path, 3, 300)
+    write_term(new_path, 4, 300)
+    counts = write_changes(diff_rosters(str(old_path), str(new_path), memory_budget=4096), str(changes_path))
+
+    marks_store = CourseworkMarks()
+    students = read_students(str(old_path), marks_store)
+    events = RosterEvents()
+    received = []
+    events.subscribe(lambda event, student: received.append(event))
+    applied = apply_changes(students, read_changes(str(changes_path)), marks_store, events)
+
+    assert applied == counts
+    assert len(received) == sum(counts.values())
+    assert roster_rows(students) == roster_rows(read_students(str(new_path), CourseworkMarks()))
@@ -0,0 +1,102 @@
+# Tests for the filter query language, checked against the same filters written in Python.
+
+# Import random to build a roster with varied marks
+import random
+
+# Import pytest for parametrised cases and expected errors
+import pytest
+
+# Import the query modules and the roster they run over
+from student_query import QueryCache, QueryError, RosterTable, parse_query
+from student_store import ROW_DELETED, ROW_INSERTED, ROW_UPDATED, CourseworkMarks, RosterEvents, Student
+
+NAMES = ["Ann Lee", "Bob Scott", "Cat Curry", "Dan Scott", "Eve Stone"]
+
+def make_roster(count, seed=0):
+    rng = random.Random(seed)
+    store = CourseworkMarks()
+    return [
+        Student(rng.choice(NAMES), 1000 + number,
+                [float(rng.randint(0, 20)) for _ in range(rng.choice([2, 3]))], float(rng.randint(0, 100)), store)
+        for number in range(count)
+    ]
+
+def coursework(student, position):
+    marks = student.coursework_marks
+    return marks[position - 1] if len(marks) >= position else None
+
+# Each query with the same filter written in Python
+QUERIES = [
+    ("grade = A", lambda s: s.grade == 'A'),
+    ("grade in (a, B) and exam_mark > 60", lambda s: s.grade in "AB" and s.exam_mark > 60),
+    ("not grade != F", lambda s: s.grade == 'F'),
+    ("number = 1010", lambda s: s.number == 1010),
+    ("number in (1001, 1003, 99)", lambda s: s.number in (1001, 1003)),
+    ("number >= 1390", lambda s: s.number >= 1390),
+    ("percentage < 40 or total_coursework >= 55", lambda s: s.percentage < 40 or s.total_coursework >= 55),
+    ("name contains \"Scott\"", lambda s: "Scott" in s.name),
+    ("name = 'Eve Stone' or name = \"Ann Lee\"", lambda s: s.name in ("Eve Stone", "Ann Lee")),
+    ("name != \"Eve Stone\"", lambda s: s.name != "Eve Stone"),
+    ("coursework[3] > 10", lambda s: coursework(s, 3) is not None and coursework(s, 3) > 10),
+    ("coursework[3] != 5", lambda s: coursework(s, 3) is not None and coursework(s, 3) != 5),
+    ("not (exam_mark <= 50 and (grade = C or grade = D))",
+     lambda s: not (s.exam_mark <= 50 and s.grade in "CD")),
+]
+
+@pytest.mark.parametrize("text, expected", QUERIES, ids=[text for text, _ in QUERIES])
+def test_query_matches_python_filter(text, expected):
+    roster = make_roster(400)
+    table = RosterTable(roster)
+    assert [table.students[row] for row in table.rows(table.evaluate(parse_query(text)))] == list(filter(expected, roster))
+
+def test_equivalent_spellings_parse_to_the_same_tree():
+    assert parse_query("grade in (B, A, A)") == parse_query("GRADE IN (A,B)")
+    assert parse_query("exam_mark == 50") == parse_query("exam_mark = 50")
+    assert parse_query("(grade = A) and exam_mark > 1") == parse_query("grade = A and exam_mark > 1")
+
+@pytest.mark.parametrize("text", [
+    "", "grade =", "height > 4", "exam_mark > \"high\"", "exam_mark contains 4", "grade < A",
+    "coursework[0] > 1", "coursework[1.5] > 1", "grade = A)", "(grade = A", "exam_mark not 4",
+])
+def test_bad_queries_raise_query_error(text):
+    roster = make_roster(10)
+    with pytest.raises(QueryError):
+        RosterTable(roster).evaluate(parse_query(text))
+
+def test_cache_patches_roster_events_into_its_snapshot():
+    roster = make_roster(400)
+    events = RosterEvents()
+    cache = QueryCache()
+    events.subscribe(cache.changed)
+    for text, _ in QUERIES:
+        cache.run(text, roster)  # Builds every index and coursework column the queries need
+
+    rng = random.Random(1)
+    for _ in range(10):
+        added = Student("New Student", 2000 + len(roster), [20.0, 20.0, 20.0], 100.0, roster[0].marks_store)
+        roster.append(added)
+        events.emit(ROW_INSERTED, added)
+        changed = rng.choice(roster)
+        changed.set_marks([float(rng.randint(0, 20))], float(rng.randint(0, 100)))
+        changed.name = rng.choice(NAMES)
+        events.emit(ROW_UPDATED, changed)
+        removed = roster.pop(rng.randrange(len(roster)))
+        events.emit(ROW_DELETED, removed)
+
+        for text, expected in QUERIES:
+            assert cache.run(text, roster) == list(filter(expected, roster)), text
+
+def test_cache_reuses_results_until_the_roster_changes():
+    roster = make_roster(50)
+    events = RosterEvents()
+    cache = QueryCache()
+    events.subscribe(cache.changed)
+
+    first = cache.run("grade = A", roster)
+    assert cache.run("GRADE  ==  A", roster) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    roster[0].set_marks([20.0, 20.0, 20.0], 100.0)
+    events.emit(ROW_UPDATED, roster[0])
+    assert roster[0] in cache.run("grade = A", roster)
+    assert cache.misses == 2
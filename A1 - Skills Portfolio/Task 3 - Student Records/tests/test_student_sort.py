@@ -0,0 +1,43 @@
+# Tests for sorting marks files through run files, which must keep equal keys in file order.
+
+# Import csv to write the marks file being sorted
+import csv
+
+# Import random to build rows with many equal keys
+import random
+
+# Import pytest for parametrised cases
+import pytest
+
+# Import the sort under test
+import student_sort
+from student_sort import SORT_KEYS, sorted_rows
+
+def write_marks(path, count, seed=0):
+    rng = random.Random(seed)
+    rows = [[str(1000 + number), rng.choice(["Ann Lee", "Bob Scott", "Cat Curry"]),
+             *(str(float(rng.randint(0, 3))) for _ in range(3)), str(float(rng.randint(0, 3)))]
+            for number in range(count)]
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerows(rows)
+    return rows
+
+@pytest.mark.parametrize("key", sorted(SORT_KEYS))
+@pytest.mark.parametrize("reverse", [False, True])
+def test_equal_keys_keep_file_order_across_runs(tmp_path, monkeypatch, key, reverse):
+    monkeypatch.setattr(student_sort, "MAX_MERGE_RUNS", 3)  # Merge the runs in several passes
+    path = tmp_path / "marks.txt"
+    rows = write_marks(path, 300)
+
+    result = list(sorted_rows(str(path), key, reverse, memory_budget=2000, temp_dir=str(tmp_path)))
+    assert result == sorted(rows, key=SORT_KEYS[key], reverse=reverse)
+    assert list(tmp_path.iterdir()) == [path]  # The run files were removed
+
+def test_invalid_rows_are_skipped(tmp_path):
+    path = tmp_path / "marks.txt"
+    path.write_text("2,Bob,1,2,3,4\nnot,a,valid,row\n1,Ann,1,2\nshort,row\n", encoding="utf-8")
+    assert [row[1] for row in sorted_rows(str(path), "number")] == ["Ann", "Bob"]
+
+def test_unknown_key_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        list(sorted_rows(str(tmp_path / "marks.txt"), "height"))
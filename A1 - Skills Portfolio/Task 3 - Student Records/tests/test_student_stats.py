@@ -0,0 +1,76 @@
+# Tests for pivot summaries, which must not depend on how the students are chunked.
+
+# Import math and statistics to work out the expected summaries directly
+import math
+import statistics
+
+# Import pytest for parametrised cases and expected errors
+import pytest
+
+# Import the summaries under test and the roster they read
+import student_stats
+from student_query import RosterTable
+from student_stats import DIMENSIONS, Aggregate, pivot, synthetic_columns, table_columns
+from student_store import CourseworkMarks, Student
+
+def group_key(columns, dimension, index):
+    if dimension is None:
+        return None
+    column, width = DIMENSIONS[dimension]
+    value = columns[column][index]
+    return value if width is None else value // width * width
+
+def expected_cells(columns, rows, cross, measure):
+    groups = {}
+    for index, value in enumerate(columns[measure]):
+        key = (group_key(columns, rows, index), group_key(columns, cross, index))
+        groups.setdefault(key, []).append(value)
+    return groups
+
+def assert_matches(cell, values):
+    assert cell.count == len(values)
+    assert cell.sum == math.fsum(values)
+    assert cell.min == min(values) and cell.max == max(values)
+    assert cell.mean == pytest.approx(statistics.fmean(values))
+    assert cell.stddev == pytest.approx(statistics.pstdev(values))
+
+@pytest.mark.parametrize("rows, cross, measure", [
+    ("grade", None, "percentage"),
+    ("grade", "coursework_band", "exam_mark"),
+    ("number_range", "exam_band", "total_marks"),
+])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pivot_matches_direct_grouping_whatever_the_chunks(monkeypatch, rows, cross, measure, workers):
+    monkeypatch.setattr(student_stats, "CHUNK_SIZE", 700)
+    columns = synthetic_columns(5000, seed=3)
+    table = pivot(columns, rows, cross, measure, workers)
+
+    groups = expected_cells(columns, rows, cross, measure)
+    assert set(table.cells) == set(groups)
+    for key, values in groups.items():
+        assert_matches(table.cells[key], values)
+    assert_matches(table.total, list(columns[measure]))
+
+def test_merging_gives_the_summary_of_all_values():
+    values = [0.1 * n for n in range(1, 200)]
+    merged = Aggregate()
+    for start in range(0, len(values), 37):
+        merged.merge(Aggregate(values[start:start + 37]))
+    assert_matches(merged, values)
+
+def test_pivot_of_a_roster_snapshot():
+    store = CourseworkMarks()
+    students = [Student(f"Student {n}", 1000 + n, [20.0, 20.0, float(n)], 50.0 + n, store) for n in range(20)]
+    table = pivot(table_columns(RosterTable(students)), "grade")
+    counts = {table.row_label(row): table.cells[(row, None)].count for row in table.row_keys}
+    expected = {}
+    for student in students:
+        expected[student.grade] = expected.get(student.grade, 0) + 1
+    assert counts == expected
+
+def test_unknown_dimension_or_measure_is_rejected():
+    columns = synthetic_columns(10)
+    with pytest.raises(ValueError):
+        pivot(columns, "height")
+    with pytest.raises(ValueError):
+        pivot(columns, "grade", measure="height")
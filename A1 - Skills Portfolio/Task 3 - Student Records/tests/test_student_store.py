@@ -0,0 +1,49 @@
+# Tests for fixed-point marks and the grades worked out from them.
+
+# Import pytest for parametrised cases and expected errors
+import pytest
+
+# Import the store under test
+from student_store import GRADE_BOUNDARIES, MARK_SCALE, TOTAL_MARKS, CourseworkMarks, Student
+
+def fixed_point_student(coursework_marks, exam_mark):
+    return Student("Test Student", 1000, coursework_marks, exam_mark, CourseworkMarks(scale=MARK_SCALE))
+
+@pytest.mark.parametrize("boundary, grade", GRADE_BOUNDARIES)
+def test_grade_boundaries_are_exact(boundary, grade):
+    total = boundary * TOTAL_MARKS / 100  # The total that scores exactly the boundary
+    coursework = [0.1, 0.2, 0.3]
+    at_boundary = fixed_point_student(coursework, round(total - 0.6, 1))
+    below = fixed_point_student(coursework, round(total - 0.7, 1))
+
+    assert at_boundary.percentage == boundary
+    assert at_boundary.grade == grade
+    assert below.grade != grade
+
+def test_lowest_total_is_an_f():
+    assert fixed_point_student([0.0, 0.0, 0.0], 0.0).grade == 'F'
+
+def test_totals_add_up_exactly():
+    student = fixed_point_student([0.1, 0.2, 0.7], 11.1)
+    assert student.total_coursework == 1.0
+    assert student.total_marks == 12.1
+    assert student.coursework_marks == [0.1, 0.2, 0.7]
+
+def test_marks_finer_than_the_scale_are_rejected():
+    store = CourseworkMarks(scale=MARK_SCALE)
+    with pytest.raises(ValueError):
+        Student("Test Student", 1000, [1.25], 40.0, store)
+    with pytest.raises(ValueError):
+        Student("Test Student", 1000, [1.0], 40.05, store)
+    assert len(store) == 0
+
+def test_set_marks_regrades_and_moves_later_rows():
+    store = CourseworkMarks(scale=MARK_SCALE)
+    first = Student("First", 1, [10.0, 10.0], 40.0, store)
+    second = Student("Second", 2, [5.0, 5.0, 5.0], 50.0, store)
+
+    first.set_marks([20.0, 20.0, 20.0], 52.0)
+    assert first.grade == 'A'
+    assert first.coursework_marks == [20.0, 20.0, 20.0]
+    assert second.coursework_marks == [5.0, 5.0, 5.0]
+    assert store.row_sums() == [60.0, 15.0]
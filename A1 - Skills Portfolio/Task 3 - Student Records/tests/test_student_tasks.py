@@ -0,0 +1,144 @@
+# Tests for the background task scheduler, with a stand-in for the Tk window's event loop.
+
+# Import threading to hold work on the worker until a test lets it go
+import threading
+
+# Import time to give up waiting for a worker that never finishes
+import time
+
+# Import pytest for the scheduler fixture and expected errors
+import pytest
+
+# Import the scheduler under test
+from student_tasks import TaskCancelled, TaskScheduler
+
+class FakeRoot:
+    """Keeps the callbacks the scheduler schedules with after, for the test to run as the Tk thread."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def pump(self, until, timeout=5.0):
+        """Run the scheduled callbacks until until() is true."""
+        deadline = time.monotonic() + timeout
+        while not until():
+            assert time.monotonic() < deadline, "timed out waiting for the scheduler"
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.001)
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+@pytest.fixture
+def scheduler(root):
+    busy = []
+    scheduler = TaskScheduler(root, on_busy=busy.append)
+    scheduler.busy_texts = busy
+    yield scheduler
+    scheduler.shutdown()
+
+def blocked_work(release):
+    """Work that waits for release, checking for cancellation, then returns "done"."""
+    def work(task):
+        while not release.wait(0.001):
+            task.check()
+        return "done"
+    return work
+
+def test_result_is_delivered_on_the_polling_thread(root, scheduler):
+    results = []
+    scheduler.submit("sum", lambda task, a, b: a + b, 2, 3,
+                     on_done=lambda result: results.append((result, threading.current_thread())))
+    root.pump(lambda: results)
+    assert results == [(5, threading.current_thread())]
+    assert not scheduler.tasks
+
+def test_error_is_delivered_to_on_error(root, scheduler):
+    errors = []
+    scheduler.submit("fail", lambda task: 1 / 0, on_error=errors.append)
+    root.pump(lambda: errors)
+    assert isinstance(errors[0], ZeroDivisionError)
+
+def test_same_name_replaces_the_running_task(root, scheduler):
+    release = threading.Event()
+    done, cancelled = [], []
+    first = scheduler.submit("filter", blocked_work(release), on_done=done.append,
+                             on_cancel=lambda: cancelled.append("first"))
+    scheduler.submit("filter", lambda task: "second", on_done=done.append,
+                     on_cancel=lambda: cancelled.append("second"))
+    assert first.cancelled
+    assert cancelled == ["first"]
+
+    root.pump(lambda: done)
+    assert done == ["second"]
+    assert cancelled == ["first"]
+
+def test_cancelled_work_stops_at_its_next_check(root, scheduler):
+    release = threading.Event()
+    started = threading.Event()
+
+    def work(task):
+        started.set()
+        while not release.is_set():
+            task.progress("working")
+        return "done"
+
+    done = []
+    task = scheduler.submit("summary", work, on_done=done.append, label="Summarising")
+    started.wait(5)
+    root.pump(lambda: scheduler.busy_texts[-1] == "Summarising: working")
+    scheduler.cancel("summary")
+    task.future.result(timeout=5)  # The worker stopped without release being set
+    _, _, error = scheduler.finished.get_nowait()
+    assert isinstance(error, TaskCancelled)
+    assert scheduler.busy_texts[-1] is None
+    assert done == []
+
+def test_cancel_all_leaves_unlabelled_tasks(root, scheduler):
+    release = threading.Event()
+    done, cancelled = [], []
+    scheduler.submit("watch", blocked_work(release), on_done=done.append)
+    scheduler.submit("sort", blocked_work(release), on_cancel=lambda: cancelled.append("sort"), label="Sorting")
+    assert scheduler.busy
+
+    scheduler.cancel_all()
+    assert cancelled == ["sort"]
+    assert not scheduler.busy
+    release.set()
+    root.pump(lambda: done)
+    assert done == ["done"]
+
+def close_window(scheduler, release, closed):
+    """Do what the Student Records window does on closing: stop the labelled work, then save."""
+    scheduler.cancel_all()
+    scheduler.submit("save", blocked_work(release), on_done=lambda result: closed.append("saved"),
+                     on_cancel=lambda: closed.append("cancelled"), label="Saving student records")
+
+def test_closing_finishes_once_the_save_is_done(root, scheduler):
+    release = threading.Event()
+    closed = []
+    scheduler.submit("sort", blocked_work(release), label="Sorting")
+    close_window(scheduler, release, closed)
+    assert scheduler.busy_texts[-1] == "Saving student records"
+
+    release.set()
+    root.pump(lambda: closed)
+    assert closed == ["saved"]
+
+def test_cancelling_the_save_still_closes_the_window(root, scheduler):
+    release = threading.Event()
+    closed = []
+    close_window(scheduler, release, closed)
+
+    scheduler.cancel_all()  # Cancel pressed on the busy indicator while saving
+    assert closed == ["cancelled"]
+    release.set()
+    scheduler.shutdown()
+    assert closed == ["cancelled"]  # Not told again when the scheduler shuts down
@@ -0,0 +1,51 @@
+# Tests for working out which rows of the marks file another program changed.
+
+# Import the line index under test
+from student_watch import LineIndex
+
+BEFORE = (b"1,Ann Lee,10.0,11.0,12.0,50.0\r\n"
+          b"2,Bob Scott,5.0,5.0,5.0,40.0\r\n"
+          b"3,Cat Curry,8.0,8.0,8.0,60.0\r\n"
+          b"4,Dan Scott,1.0,2.0,3.0,20.0\r\n")
+
+def lines(data):
+    return data.splitlines(keepends=True)
+
+def test_saving_unchanged_contents_reports_nothing():
+    index = LineIndex(BEFORE)
+    assert index.update(BEFORE) == []
+    assert index.update(BEFORE.replace(b"\r\n", b"\n")) == []  # Only the line endings changed
+
+def test_edited_line_is_an_update():
+    index = LineIndex(BEFORE)
+    after = BEFORE.replace(b"5.0,5.0,5.0,40.0", b"5.0,6.0,5.0,40.0")
+    assert index.update(after) == [("update", ["2", "Bob Scott", "5.0", "6.0", "5.0", "40.0"])]
+
+def test_inserted_and_deleted_lines_leave_moved_lines_alone():
+    index = LineIndex(BEFORE)
+    first, second, third, fourth = lines(BEFORE)
+    after = first + b"9,New Student,1.0,1.0,1.0,1.0\n" + third + second + fourth
+    assert index.update(after) == [("add", ["9", "New Student", "1.0", "1.0", "1.0", "1.0"])]
+
+    assert sorted(index.update(first + third + second)) == [("remove", ["4"]), ("remove", ["9"])]
+    assert index.numbers == [1, 3, 2]
+
+def test_removed_lines_are_reported_by_number():
+    index = LineIndex(BEFORE)
+    first, second, third, fourth = lines(BEFORE)
+    assert sorted(index.update(first + fourth)) == [("remove", ["2"]), ("remove", ["3"])]
+    assert index.numbers == [1, 4]
+
+def test_line_that_stops_parsing_is_removed_until_it_is_fixed():
+    index = LineIndex(BEFORE)
+    broken = BEFORE.replace(b"8.0,8.0,8.0", b"8.0,oops,8.0")
+    assert index.update(broken) == [("remove", ["3"])]
+    # Its number is still on the line, so it comes back as an update, which apply_changes adds
+    assert index.update(BEFORE) == [("update", ["3", "Cat Curry", "8.0", "8.0", "8.0", "60.0"])]
+
+def test_moving_a_student_to_another_line_number_is_an_update():
+    index = LineIndex(BEFORE)
+    first, second, third, fourth = lines(BEFORE)
+    after = first + third + second.replace(b"40.0", b"41.0") + fourth
+    assert index.update(after) == [("update", ["2", "Bob Scott", "5.0", "5.0", "5.0", "41.0"])]
+    assert index.numbers == [1, 3, 2, 4]